@@ -0,0 +1,241 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import aprefetch_related_objects
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django_filters.utils import translate_validation
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from parts.models import Part, User
+
+from .authentication import StatelessJWTAuthentication
+from .cache import catalog_cache
+from .conditional import (atable_stamp, check_conditional, part_stamp,
+                          set_conditional_headers)
+from .pagination import KeysetPaginator, TenOnPagePaginator
+from .renderers import ORJSONRenderer
+from .rows import part_rows
+from .serializers import AuthorPartSerializer, PartSerializer
+from .views import get_catalog_queryset, get_user_parts_queryset
+
+
+class AsyncReadView(View):
+    """
+    GET на async ORM для ASGI (settings.ASYNC_VIEWS).
+
+    Остальные методы и ответы не в компактном JSON (браузерный API,
+    indent, 406 на неподдерживаемый Accept) уходят синхронной DRF вьюхе
+    sync_view, запись работает как раньше. Аутентификация, лимиты,
+    фильтры, пагинация и формат ответа - те же классы, что у DRF вьюх,
+    настройки берутся из класса sync_view.
+    """
+    sync_view = None
+    renderer = ORJSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Как у DRF: JWT без сессии, CSRF не нужен и для проксируемой записи
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    @property
+    def viewset(self):
+        return self.sync_view.cls
+
+    def accepts_json(self, request):
+        """
+        Согласование формата как у DRF вьюхи: True, если она ответила бы
+        рендерером self.renderer без параметров в media type
+        """
+        negotiator = self.viewset.content_negotiation_class()
+        renderers = [renderer() for renderer in self.viewset.renderer_classes]
+        try:
+            renderer, media_type = negotiator.select_renderer(
+                Request(request),
+                renderers
+            )
+        except (exceptions.NotAcceptable, Http404):
+            # 406 или 404 на неизвестный format отдаст DRF вьюха
+            return False
+        return (
+            type(renderer) is type(self.renderer)
+            and media_type == self.renderer.media_type
+        )
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or not self.accepts_json(request):
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+        try:
+            await self.initial(request)
+            response = await self.get(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(request, exc)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    async def initial(self, request):
+        result = await StatelessJWTAuthentication().aauthenticate(request)
+        request.user, request.auth = result or (AnonymousUser(), None)
+        for permission_class in self.viewset.permission_classes:
+            permission = permission_class()
+            if permission.has_permission(request, self):
+                continue
+            if not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+        # Как DRF: проверяются все лимиты, ждать - по самому долгому
+        durations = []
+        for throttle_class in self.viewset.throttle_classes:
+            throttle = throttle_class()
+            allowed = await sync_to_async(
+                throttle.allow_request,
+                thread_sensitive=False
+            )(request, self)
+            if not allowed:
+                durations.append(throttle.wait())
+        if durations:
+            raise exceptions.Throttled(max(
+                (duration for duration in durations if duration is not None),
+                default=None
+            ))
+
+    def handle_exception(self, request, exc):
+        if isinstance(exc, (
+            exceptions.NotAuthenticated,
+            exceptions.AuthenticationFailed
+        )):
+            exc.auth_header = StatelessJWTAuthentication().authenticate_header(
+                request
+            )
+        response = exception_handler(exc, {'view': self, 'request': request})
+        if response is None:
+            raise exc
+        rendered = self.render(response.data, response.status_code)
+        for header in ('WWW-Authenticate', 'Retry-After'):
+            if header in response:
+                rendered[header] = response[header]
+        return rendered
+
+    def render(self, data, status=200):
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status,
+            content_type=self.renderer.media_type
+        )
+
+    def filter_queryset(self, request, queryset):
+        # Как DjangoFilterBackend: ошибки фильтров - ValidationError DRF
+        filterset_class = getattr(self.viewset, 'filterset_class', None)
+        if filterset_class is None:
+            return queryset
+        filterset = filterset_class(
+            request.GET,
+            queryset=queryset,
+            request=request
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+
+class AsyncPartListView(AsyncReadView):
+    """Каталог, как PartViewSet.list"""
+
+    async def get(self, request):
+        if request.user.is_authenticated:
+            return self.render(await self.list_rows(request))
+        # Анонимный каталог одинаков для всех, отдаем из кэша
+        data, status = await catalog_cache.aget_data(
+            request,
+            lambda: self.list_rows(request)
+        )
+        response = self.render(data)
+        response['X-Cache'] = status
+        return response
+
+    async def list_rows(self, request):
+        queryset = self.filter_queryset(
+            request,
+            get_catalog_queryset(request.user)
+        )
+        paginator = KeysetPaginator()
+        page = await paginator.apaginate_queryset(
+            part_rows.values(queryset),
+            request,
+            self.viewset
+        )
+        return paginator.get_paginated_data(await part_rows.amap(page, request))
+
+
+class AsyncPartDetailView(AsyncReadView):
+    """Карточка запчасти, как PartViewSet.retrieve"""
+
+    async def get(self, request, pk):
+        part = await aget_object_or_404(
+            Part.objects.with_related(images=False).with_favorited(request.user),
+            pk=pk,
+            is_visible=True
+        )
+        is_author = part.author_id == request.user.id
+        # Не опубликованый пост видит только автор
+        if not (part.is_approved or is_author):
+            raise Http404
+        response, etag, timestamp = check_conditional(
+            request,
+            part_stamp(part, is_author),
+            self.renderer.media_type
+        )
+        if response is None:
+            await aprefetch_related_objects([part], 'images')
+            serializer_class = AuthorPartSerializer if is_author else PartSerializer
+            response = self.render(
+                serializer_class(part, context={'request': request}).data
+            )
+        return set_conditional_headers(response, etag, timestamp)
+
+
+class AsyncReferenceListView(AsyncReadView):
+    """Список справочника, как list у MarkViewSet и соседей"""
+
+    async def get(self, request):
+        viewset = self.viewset
+        response, etag, timestamp = check_conditional(
+            request,
+            await atable_stamp(*viewset.stamp_models),
+            self.renderer.media_type
+        )
+        if response is None:
+            paginator = TenOnPagePaginator()
+            page, count = await paginator.apaginate_queryset(
+                self.filter_queryset(request, viewset.queryset.all()),
+                request
+            )
+            data = viewset.serializer_class(
+                page,
+                many=True,
+                context={'request': request}
+            ).data
+            response = self.render(paginator.get_paginated_data(data, count))
+        return set_conditional_headers(response, etag, timestamp)
+
+
+class AsyncUserPartsListView(AsyncReadView):
+    """Запчасти пользователя, как UserPartsListView"""
+
+    async def get(self, request, pk):
+        is_author = pk == request.user.id
+        if not is_author:
+            await aget_object_or_404(User.objects.only('pk'), pk=pk)
+        paginator = KeysetPaginator()
+        page = await paginator.apaginate_queryset(
+            get_user_parts_queryset(pk, is_author, request.user),
+            request,
+            self.viewset
+        )
+        serializer_class = AuthorPartSerializer if is_author else PartSerializer
+        data = serializer_class(page, many=True, context={'request': request}).data
+        return self.render(paginator.get_paginated_data(data))
@@ -0,0 +1,194 @@
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from parts.models import User
+from parts.routers import acheck_pin, check_pin, use_primary
+
+# Поля пользователя в claims токена: все, что нужно проверкам прав
+USER_CLAIMS = ('username', 'is_moder', 'is_superuser', 'is_staff')
+VERSION_CLAIM = 'ver'
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh токен с ролями и версией пользователя, access копирует их"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class TokenVersionCache:
+    """
+    token_version активных пользователей в памяти процесса.
+    Версия перечитывается из БД не чаще раза в USER_CACHE_TTL секунд
+    на пользователя, поэтому бан, смена роли или пароля начинают
+    действовать не позже чем через TTL.
+    """
+    # Больше записей - чистим истекшие, что бы словарь не рос без конца
+    max_size = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    @staticmethod
+    def get_queryset(user_id):
+        return User.objects.filter(
+            pk=user_id,
+            is_active=True
+        ).values_list('token_version', flat=True)
+
+    def get_fresh(self, user_id, now):
+        entry = self._versions.get(user_id)
+        if entry is not None and entry[1] >= now:
+            return entry
+
+    def store(self, user_id, version, now):
+        entry = (version, now + settings.USER_CACHE_TTL)
+        with self._lock:
+            if len(self._versions) >= self.max_size:
+                self._versions = {
+                    key: value for key, value in self._versions.items()
+                    if value[1] >= now
+                }
+            self._versions[user_id] = entry
+        return entry
+
+    def get(self, user_id):
+        """Текущая версия или None, если пользователя нет или он забанен"""
+        now = time.monotonic()
+        entry = self.get_fresh(user_id, now) or self.store(
+            user_id, self.get_queryset(user_id).first(), now
+        )
+        return entry[0]
+
+    async def aget(self, user_id):
+        """get для асинхронных вьюх"""
+        now = time.monotonic()
+        entry = self.get_fresh(user_id, now) or self.store(
+            user_id, await self.get_queryset(user_id).afirst(), now
+        )
+        return entry[0]
+
+    def is_current(self, token):
+        return self.get(token[api_settings.USER_ID_CLAIM]) == token[VERSION_CLAIM]
+
+    async def ais_current(self, token):
+        version = await self.aget(token[api_settings.USER_ID_CLAIM])
+        return version == token[VERSION_CLAIM]
+
+
+token_versions = TokenVersionCache()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication без запроса пользователя на чтение.
+    Для GET пользователь собирается из подписанных claims: id и роли
+    загружены, остальные поля отложены и читаются из БД при первом
+    обращении, claim ver сверяется с token_versions. Запросы на запись
+    могут сохранить request.user, поэтому для них пользователь читается
+    из БД, как и для токенов без claim ver (выданных раньше). Вьюхи, где
+    доступ дает роль, используют UserJWTAuthentication. Пользователь,
+    недавно писавший в БД, читает из основной (parts.routers.check_pin).
+    """
+    stateless_methods = SAFE_METHODS
+
+    def authenticate(self, request):
+        # Экземпляр аутентификации создается на каждый запрос
+        self.stateless = request.method in self.stateless_methods
+        return super().authenticate(request)
+
+    async def aauthenticate(self, request):
+        """authenticate для асинхронных вьюх, только GET"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        await acheck_pin(validated_token.get(api_settings.USER_ID_CLAIM))
+        if VERSION_CLAIM not in validated_token:
+            user = await sync_to_async(super().get_user)(validated_token)
+            return user, validated_token
+        user = self.make_user(validated_token)
+        if not await token_versions.ais_current(validated_token):
+            raise AuthenticationFailed('Токен отозван', code='token_revoked')
+        return user, validated_token
+
+    def get_user(self, validated_token):
+        stateless = getattr(self, 'stateless', False)
+        if not stateless and VERSION_CLAIM in validated_token:
+            use_primary()
+        # До пользователя: его отложенные поля читаются из той же БД
+        check_pin(validated_token.get(api_settings.USER_ID_CLAIM))
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        if not stateless:
+            user = super().get_user(validated_token)
+            if user.token_version != validated_token[VERSION_CLAIM]:
+                raise AuthenticationFailed('Токен отозван', code='token_revoked')
+            return user
+        user = self.make_user(validated_token)
+        if not token_versions.is_current(validated_token):
+            raise AuthenticationFailed('Токен отозван', code='token_revoked')
+        return user
+
+    @staticmethod
+    def make_user(validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            claims = [validated_token[claim] for claim in USER_CLAIMS]
+        except KeyError:
+            raise InvalidToken('Токен не содержит данных пользователя')
+        values = dict(zip(USER_CLAIMS, claims), id=user_id, is_active=True)
+        # from_db ждет значения в порядке полей модели
+        fields = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        return User.from_db(
+            router.db_for_read(User),
+            fields,
+            [values[field] for field in fields]
+        )
+
+
+class UserJWTAuthentication(StatelessJWTAuthentication):
+    """
+    Пользователь и версия токена из основной БД на каждый запрос, в том
+    числе на чтение. Для вьюх, где доступ дает роль: бан, снятие роли или
+    смена пароля действуют сразу, а не через USER_CACHE_TTL.
+    """
+    stateless_methods = ()
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = UserRefreshToken
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """Новый access только по refresh токену с актуальной версией"""
+    token_class = UserRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if VERSION_CLAIM in refresh and not token_versions.is_current(refresh):
+            raise AuthenticationFailed('Токен отозван', code='token_revoked')
+        return super().validate(attrs)
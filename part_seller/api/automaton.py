@@ -0,0 +1,239 @@
+import re
+import threading
+
+
+class TransitionCache(object):
+    """Построенная часть ДКА: состояния и переходы между ними"""
+
+    def __init__(self, start):
+        self.states = [start]
+        self.state_ids = {start: 0}
+        self.transitions = {}
+
+    def state_id(self, state):
+        if state not in self.state_ids:
+            self.state_ids[state] = len(self.states)
+            self.states.append(state)
+        return self.state_ids[state]
+
+
+class PatternAutomaton(object):
+    """
+    Поиск по регулярному выражению за линейное время.
+
+    Поддерживается подмножество синтаксиса, на котором написан
+    RegexpProc.PATTERN_1: альтернатива верхнего уровня, \\w, классы [...],
+    группы без квантификатора и квантификаторы {m,n}.
+    Каждый символ текста один раз нормализуется в маску классов, которым
+    он соответствует (с теми же флагами re, поэтому гомоглифы,
+    разделители и регистр обрабатываются как в регулярке).
+    Дальше работает ДКА, который строится лениво по мере встречи новых
+    пар (состояние, маска), без возвратов.
+    Один автомат разделяют потоки запросов: достройка ДКА идет под
+    блокировкой, а переполненный кэш не чистится, а заменяется новым,
+    поэтому уже идущий поиск дочитывает текст по своему.
+    """
+    START = 0
+    FINAL = -1
+    # Ограничения кэшей, что бы необычный текст не раздувал память
+    max_chars = 10000
+    max_states = 20000
+    max_transitions = 200000
+
+    def __init__(self, pattern, flags=0):
+        self.atoms = []
+        self.branches = [
+            self.trim(self.parse_sequence(branch))
+            for branch in self.split_branches(pattern)
+        ]
+        # Позиция НКА - (ветка, номер слота), слот - один символ шаблона
+        self.slots = [self.expand(elements) for elements in self.branches]
+        self.start = self.closure(
+            (branch, 0) for branch in range(len(self.slots))
+        )
+        self.atom_patterns = [re.compile(atom, flags) for atom in self.atoms]
+        self.char_masks = {}
+        self._lock = threading.Lock()
+        self.cache = TransitionCache(self.start)
+
+    def split_branches(self, pattern):
+        branches, depth, start, i = [], 0, 0, 0
+        while i < len(pattern):
+            char = pattern[i]
+            if char == '\\':
+                i += 1
+            elif char == '[':
+                i = self.class_end(pattern, i)
+            elif char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif char == '|' and depth == 0:
+                branches.append(pattern[start:i])
+                start = i + 1
+            i += 1
+        branches.append(pattern[start:])
+        return branches
+
+    @staticmethod
+    def class_end(pattern, i):
+        """Индекс закрывающей скобки класса, начатого в позиции i"""
+        i += 1
+        if i < len(pattern) and pattern[i] == '^':
+            i += 1
+        if i < len(pattern) and pattern[i] == ']':
+            i += 1
+        while i < len(pattern) and pattern[i] != ']':
+            if pattern[i] == '\\':
+                i += 1
+            i += 1
+        if i >= len(pattern):
+            raise ValueError('Незакрытый класс символов')
+        return i
+
+    def atom_index(self, source):
+        if source not in self.atoms:
+            self.atoms.append(source)
+        return self.atoms.index(source)
+
+    def parse_sequence(self, pattern):
+        """Список элементов (номер атома, минимум, максимум)"""
+        elements, i = [], 0
+        while i < len(pattern):
+            char = pattern[i]
+            if char == '(':
+                end = self.group_end(pattern, i)
+                if end + 1 < len(pattern) and pattern[end + 1] in '{*+?':
+                    raise ValueError('Квантификатор группы не поддерживается')
+                elements.extend(self.parse_sequence(pattern[i + 1:end]))
+                i = end + 1
+                continue
+            if char == '[':
+                end = self.class_end(pattern, i)
+            elif char == '\\':
+                end = i + 1
+            elif char in '|)*+?{':
+                raise ValueError(f'Неподдерживаемый синтаксис: {pattern[i:]}')
+            else:
+                end = i
+            atom = self.atom_index(pattern[i:end + 1])
+            i = end + 1
+            low = high = 1
+            if i < len(pattern) and pattern[i] == '{':
+                close = pattern.index('}', i)
+                low, _, high = pattern[i + 1:close].partition(',')
+                low, high = int(low), int(high or low)
+                i = close + 1
+            elif i < len(pattern) and pattern[i] in '*+?':
+                raise ValueError('Допустимы только квантификаторы {m,n}')
+            elements.append((atom, low, high))
+        return elements
+
+    def group_end(self, pattern, i):
+        depth = 0
+        while i < len(pattern):
+            if pattern[i] == '\\':
+                i += 1
+            elif pattern[i] == '[':
+                i = self.class_end(pattern, i)
+            elif pattern[i] == '(':
+                depth += 1
+            elif pattern[i] == ')':
+                depth -= 1
+                if depth == 0:
+                    return i
+            i += 1
+        raise ValueError('Незакрытая группа')
+
+    @staticmethod
+    def trim(elements):
+        """
+        Для проверки наличия совпадения необязательные повторы по краям
+        не нужны: если совпадение есть с ними, оно есть и без них.
+        """
+        while elements and elements[0][1] == 0:
+            elements = elements[1:]
+        while elements and elements[-1][1] == 0:
+            elements = elements[:-1]
+        if elements:
+            atom, low, _ = elements[0]
+            elements = [(atom, low, low)] + elements[1:]
+            atom, low, _ = elements[-1]
+            elements = elements[:-1] + [(atom, low, low)]
+        return elements
+
+    @staticmethod
+    def expand(elements):
+        """Слоты (атом, необязательный) вместо квантификаторов"""
+        slots = []
+        for atom, low, high in elements:
+            slots.extend((atom, False) for _ in range(low))
+            slots.extend((atom, True) for _ in range(high - low))
+        return slots
+
+    def closure(self, positions):
+        result, stack = set(), list(positions)
+        while stack:
+            branch, slot = stack.pop()
+            if (branch, slot) in result:
+                continue
+            result.add((branch, slot))
+            slots = self.slots[branch]
+            if slot < len(slots) and slots[slot][1]:
+                stack.append((branch, slot + 1))
+        return frozenset(result)
+
+    def is_final(self, state):
+        return any(slot == len(self.slots[branch]) for branch, slot in state)
+
+    def get_mask(self, char):
+        mask = self.char_masks.get(char)
+        if mask is None:
+            if len(self.char_masks) >= self.max_chars:
+                self.char_masks.clear()
+            mask = 0
+            for index, atom in enumerate(self.atom_patterns):
+                if atom.fullmatch(char):
+                    mask |= 1 << index
+            self.char_masks[char] = mask
+        return mask
+
+    def add_transition(self, cache, state_id, char):
+        """Переход ДКА по символу, FINAL - найдено совпадение"""
+        with self._lock:
+            result = cache.transitions.get((state_id, char))
+            if result is not None:
+                return result
+            if cache is self.cache and (
+                len(cache.states) >= self.max_states
+                or len(cache.transitions) >= self.max_transitions
+            ):
+                self.cache = TransitionCache(self.start)
+            mask = self.get_mask(char)
+            moved = (
+                (branch, slot + 1)
+                for branch, slot in cache.states[state_id]
+                if slot < len(self.slots[branch])
+                and mask >> self.slots[branch][slot][0] & 1
+            )
+            # Совпадение может начаться с любого символа
+            state = self.closure(moved) | self.start
+            result = self.FINAL if self.is_final(state) else cache.state_id(state)
+            cache.transitions[state_id, char] = result
+            return result
+
+    def search(self, text):
+        """Есть ли в тексте совпадение с шаблоном"""
+        if self.is_final(self.start):
+            return True
+        state = self.START
+        cache = self.cache
+        transitions = cache.transitions
+        for char in text:
+            next_state = transitions.get((state, char))
+            if next_state is None:
+                next_state = self.add_transition(cache, state, char)
+            if next_state == self.FINAL:
+                return True
+            state = next_state
+        return False
@@ -0,0 +1,102 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from parts.catalog import aget_catalog_version, get_catalog_version
+
+
+class CatalogResponseCache:
+    """
+    Кэш ответов списка каталога для анонимных запросов.
+    Ключ - версия каталога и нормализованные параметры запроса
+    (фильтры, курсор, сортировка), старые версии истекают по TTL.
+    """
+    prefix = 'catalog_response'
+    hits_key = 'catalog_response_hits'
+    misses_key = 'catalog_response_misses'
+
+    @staticmethod
+    def normalize_params(request):
+        # GET есть и у Request DRF, и у HttpRequest асинхронных вьюх
+        params = []
+        for name in sorted(request.GET):
+            values = sorted(
+                value.strip()
+                for value in request.GET.getlist(name)
+                if value.strip()
+            )
+            if values:
+                params.append((name, values))
+        return urlencode(params, doseq=True)
+
+    def make_key(self, request, version=None):
+        if version is None:
+            version = get_catalog_version()
+        params = md5(self.normalize_params(request).encode()).hexdigest()
+        return f'{self.prefix}:{version}:{request.get_host()}:{params}'
+
+    @staticmethod
+    def count(key):
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, 1, None)
+
+    @staticmethod
+    async def acount(key):
+        if not await cache.aadd(key, 1, None):
+            try:
+                await cache.aincr(key)
+            except ValueError:
+                await cache.aadd(key, 1, None)
+
+    def stats(self):
+        """
+        Счетчики с последней очистки CACHES: общие для всех воркеров при
+        общем бэкенде, с LocMem - процесса, который принял запрос.
+        """
+        hits = cache.get(self.hits_key, 0)
+        misses = cache.get(self.misses_key, 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else 0,
+            'version': get_catalog_version(),
+        }
+
+    def get_response(self, request, handler):
+        key = self.make_key(request)
+        data = cache.get(key)
+        if data is not None:
+            self.count(self.hits_key)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        self.count(self.misses_key)
+        response = handler()
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TTL)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    async def aget_data(self, request, handler):
+        """
+        get_response для асинхронных вьюх: handler - корутина, которая
+        возвращает данные ответа. Результат - (данные, 'HIT' или 'MISS').
+        """
+        key = self.make_key(request, await aget_catalog_version())
+        data = await cache.aget(key)
+        if data is not None:
+            await self.acount(self.hits_key)
+            return data, 'HIT'
+        await self.acount(self.misses_key)
+        data = await handler()
+        await cache.aset(key, data, settings.CATALOG_CACHE_TTL)
+        return data, 'MISS'
+
+
+catalog_cache = CatalogResponseCache()
@@ -0,0 +1,122 @@
+from hashlib import md5
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def table_stamp(*models):
+    """
+    Метка версии таблиц справочников: последнее изменение и число строк
+    (число строк меняется при удалении).
+    """
+    return join_table_stamps([
+        model.objects.aggregate(updated_at=Max('updated_at'), count=Count('id'))
+        for model in models
+    ])
+
+
+async def atable_stamp(*models):
+    """table_stamp для асинхронных вьюх"""
+    return join_table_stamps([
+        await model.objects.aaggregate(
+            updated_at=Max('updated_at'),
+            count=Count('id')
+        )
+        for model in models
+    ])
+
+
+def join_table_stamps(stamps):
+    tags, last_modified = [], None
+    for stamp in stamps:
+        tags.append(f'{stamp["updated_at"]}-{stamp["count"]}')
+        if stamp['updated_at'] and (
+            last_modified is None or stamp['updated_at'] > last_modified
+        ):
+            last_modified = stamp['updated_at']
+    return '-'.join(tags), last_modified
+
+
+def part_stamp(part, is_author):
+    """Метка карточки запчасти: своя версия и версии справочников в ней"""
+    updated = [
+        part.updated_at,
+        part.mark.updated_at,
+        part.model.updated_at,
+        part.location.updated_at,
+        part.category.updated_at if part.category else None
+    ]
+    # Избранное и имя автора не меняют updated_at, но меняют ответ
+    is_favorited = getattr(part, 'is_favorited', False)
+    version = '-'.join(
+        [str(part.pk), str(is_author), str(is_favorited), part.author.username]
+        + [str(date) for date in updated]
+    )
+    return version, max(date for date in updated if date)
+
+
+def check_conditional(request, stamp, media_type):
+    """
+    (ответ 304/412 или None, etag, timestamp) по метке версии.
+    Общая часть ConditionalGetMixin и асинхронных вьюх. Тело, а значит
+    и ETag, зависит от выбранного по Accept типа ответа: JSON, JSON с
+    отступами (indent=4) или браузерный API.
+    """
+    version, last_modified = stamp
+    etag = '"%s"' % md5(f'{version}-{media_type}'.encode()).hexdigest()
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=timestamp
+    )
+    return response, etag, timestamp
+
+
+def set_conditional_headers(response, etag, timestamp):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    patch_vary_headers(response, ('Authorization', 'Accept'))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Условный GET для list/retrieve.
+    ETag и Last-Modified считаются по метке версии до выборки объектов
+    и сериализации, при совпадении сразу отдается 304.
+    """
+
+    def get_version_stamp(self, request, *args, **kwargs):
+        """(строка версии, дата изменения) или None - без проверки"""
+        return None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        stamp = self.get_version_stamp(request, *args, **kwargs)
+        if stamp is None:
+            return handler(request, *args, **kwargs)
+        response, etag, timestamp = check_conditional(
+            request,
+            stamp,
+            request.accepted_media_type
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return set_conditional_headers(response, etag, timestamp)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class ReferenceConditionalGetMixin(ConditionalGetMixin):
+    """Справочники: версия по таблицам из stamp_models"""
+    stamp_models = ()
+
+    def get_version_stamp(self, request, *args, **kwargs):
+        return table_stamp(*self.stamp_models)
@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+from parts.references import reference_cache
+
+
+class ReferencePrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField для справочников.
+    pk проверяется по reference_cache, без запроса в БД.
+    """
+
+    def __init__(self, reference, **kwargs):
+        self.reference = reference
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = reference_cache.get(self.reference, pk)
+        if obj is None or not obj.is_visible:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
@@ -1,10 +1,16 @@
 import json
 
 import django_filters
-from django.db.models import Q
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
 
+from parts.attributes import normalize_color
 from parts.models import Location, Mark, Model, Part
 
+from .search import build_search_query
+
 
 class ModelFilter(django_filters.FilterSet):
     """Фильтр для модели"""
@@ -73,7 +79,10 @@ class PartFilter(django_filters.FilterSet):
         lookup_expr='icontains'
     )
     color = django_filters.CharFilter(method='filter_by_color')
+    color_prefix = django_filters.CharFilter(method='filter_by_color_prefix')
     is_new_part = django_filters.BooleanFilter(method='filter_by_is_new_part')
+    attributes = django_filters.CharFilter(method='filter_by_attributes')
+    search = django_filters.CharFilter(method='full_text_search')
 
     class Meta:
         model = Part
@@ -86,8 +95,11 @@ class PartFilter(django_filters.FilterSet):
             'mark_list',
             'location',
             'color',
+            'color_prefix',
             'category',
-            'is_new_part'
+            'is_new_part',
+            'attributes',
+            'search'
         ]
 
     # Обработка фильтра mark_list
@@ -96,7 +108,35 @@ class PartFilter(django_filters.FilterSet):
         return queryset.filter(Q(mark__id__in=mark_list))
 
     def filter_by_color(self, queryset, name, value):
-        return queryset.filter(json_data__color__icontains=value)
+        # Вхождение подстроки, как прежний json_data__color__icontains.
+        # LIKE '%...%' индекс не берет, поэтому подходящие цвета находятся
+        # отдельным запросом по part_color_idx, а выборка - по равенству
+        colors = Part.objects.colors_containing(normalize_color(value))
+        return queryset.filter(color__in=colors)
+
+    def filter_by_color_prefix(self, queryset, name, value):
+        # Начало названия по индексу part_color_idx
+        return queryset.filter(color__startswith=normalize_color(value))
 
     def filter_by_is_new_part(self, queryset, name, value):
-        return queryset.filter(json_data__is_new_part=value)
+        return queryset.filter(is_new_part=value)
+
+    def filter_by_attributes(self, queryset, name, value):
+        # Вхождение в json_data по GIN индексу part_json_data_gin
+        try:
+            attributes = json.loads(value)
+        except ValueError:
+            raise ValidationError({name: 'Ожидается JSON объект'})
+        if not isinstance(attributes, dict):
+            raise ValidationError({name: 'Ожидается JSON объект'})
+        return queryset.filter(json_data__contains=attributes)
+
+    def full_text_search(self, queryset, name, value):
+        # Поиск по GIN индексу, самые релевантные запчасти выше
+        query = build_search_query(value)
+        if query is None:
+            return queryset
+        # double precision, что бы ранг без потерь попадал в курсор пагинации
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        ).order_by('-rank', 'id')
@@ -1,15 +1,51 @@
-from rest_framework.pagination import PageNumberPagination
+import binascii
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from decimal import Decimal
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class TenOnPagePaginator(PageNumberPagination):
     page_size = 10
 
     def get_paginated_response(self, data):
-        return Response({
-            'count': self.page.paginator.count,
+        return Response(self.get_paginated_data(data, self.page.paginator.count))
+
+    @staticmethod
+    def get_paginated_data(data, count):
+        return {
+            'count': count,
             'result': data,
-        })
+        }
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Страница для асинхронных вьюх: COUNT и срез через async ORM.
+        Возвращает (объекты, count), номер страницы как у DRF.
+        """
+        count = await queryset.acount()
+        num_pages = max(1, math.ceil(count / self.page_size))
+        page_number = request.GET.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            page_number = num_pages
+        try:
+            number = int(page_number)
+        except (TypeError, ValueError):
+            number = 0
+        if not 1 <= number <= num_pages:
+            raise NotFound(self.invalid_page_message)
+        bottom = (number - 1) * self.page_size
+        page = [obj async for obj in queryset[bottom:bottom + self.page_size]]
+        return page, count
 
 
 class FiveOnPagePaginator(PageNumberPagination):
@@ -20,3 +56,171 @@ class FiveOnPagePaginator(PageNumberPagination):
             'count': self.page.paginator.count,
             'result': data,
         })
+
+
+class KeysetPaginator(BasePagination):
+    """
+    Пагинация по ключу сортировки.
+    Страница выбирается условием по индексу вместо OFFSET,
+    поэтому дальние страницы стоят столько же, сколько первая.
+    Общего числа записей в ответе нет: COUNT(*) по каталогу стоит
+    дороже самой страницы. Клиенты, которым оно нужно, передают ?count=1.
+    """
+    page_size = 10
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    count_query_param = 'count'
+    default_ordering = 'id'
+    # Имя в запросе -> поле для order_by, вьюха может переопределить
+    # через атрибут keyset_ordering_fields
+    ordering_fields = {
+        'id': 'id',
+        'price': 'price',
+        'uploaded_at': 'uploaded_at',
+    }
+    invalid_cursor_message = 'Некорректный курсор.'
+    count = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset, cursor = self.get_page_queryset(queryset, request, view)
+        self.count = queryset.count() if self.count_requested(request) else None
+        return self.set_page(list(page_queryset), cursor)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset для асинхронных вьюх"""
+        page_queryset, cursor = self.get_page_queryset(queryset, request, view)
+        self.count = (
+            await queryset.acount() if self.count_requested(request) else None
+        )
+        return self.set_page([row async for row in page_queryset], cursor)
+
+    def count_requested(self, request):
+        return request.GET.get(self.count_query_param) in ('1', 'true')
+
+    def get_page_queryset(self, queryset, request, view):
+        self.base_url = request.build_absolute_uri()
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request, queryset)
+        reverse = cursor is not None and cursor['reverse']
+        # При движении назад выбираем в обратном порядке и разворачиваем
+        descending = self.descending != reverse
+        if cursor is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(cursor, descending)
+            )
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + self.field, prefix + 'id')
+        return queryset[:self.page_size + 1], cursor
+
+    def set_page(self, results, cursor):
+        reverse = cursor is not None and cursor['reverse']
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        paginated = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'result': data,
+        }
+        if self.count is not None:
+            paginated['count'] = self.count
+        return paginated
+
+    def get_ordering(self, request, queryset, view):
+        fields = dict(getattr(view, 'keyset_ordering_fields', self.ordering_fields))
+        default = self.default_ordering
+        if 'rank' in queryset.query.annotations:
+            # Результаты полнотекстового поиска по умолчанию по релевантности
+            fields['rank'] = 'rank'
+            default = '-rank'
+        ordering = request.GET.get(self.ordering_query_param, default)
+        if ordering.lstrip('-') not in fields:
+            ordering = default
+        # Курсор действителен только для сортировки, в которой он выдан
+        self.ordering = ordering
+        return fields[ordering.lstrip('-')], ordering.startswith('-')
+
+    def get_sort_field(self, queryset):
+        """Поле модели или аннотация, по которой идет сортировка"""
+        if self.field in queryset.query.annotations:
+            return queryset.query.annotations[self.field].output_field
+        model = queryset.model
+        for name in self.field.split('__'):
+            field = model._meta.get_field(name)
+            model = field.related_model
+        return field
+
+    def get_position_filter(self, cursor, descending):
+        value, pk = cursor['position']
+        lookup = 'lt' if descending else 'gt'
+        if self.field == 'id':
+            return Q(**{f'id__{lookup}': pk})
+        # Условие по самому полю дает Postgres границу для range scan
+        return Q(**{f'{self.field}__{lookup}e': value}) & (
+            Q(**{f'{self.field}__{lookup}': value}) | Q(**{f'id__{lookup}': pk})
+        )
+
+    def get_position(self, instance):
+        # Строка values() или объект модели
+        if isinstance(instance, dict):
+            value, pk = instance[self.field], instance['id']
+        else:
+            value = reduce(getattr, self.field.split('__'), instance)
+            pk = instance.id
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        return value, pk
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            value, pk = cursor['position']
+            if cursor['ordering'] != self.ordering:
+                raise ValueError
+            # Значение из курсора попадает в SQL, приводим его как ORM
+            value = self.get_sort_field(queryset).to_python(value)
+            if value is None:
+                raise ValueError
+            cursor['position'] = value, int(pk)
+            cursor['reverse'] = bool(cursor['reverse'])
+        except (
+            TypeError, ValueError, KeyError, UnicodeError, binascii.Error,
+            ValidationError, FieldDoesNotExist
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps({
+            'position': position,
+            'ordering': self.ordering,
+            'reverse': reverse
+        })
+        encoded = urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), True)
@@ -0,0 +1,33 @@
+from io import BytesIO
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser на orjson для тел в UTF-8.
+    Остальные кодировки и то, что orjson не принял, разбирает
+    стандартный парсер, поэтому и ошибки у клиента те же.
+    """
+    renderer_class = ORJSONRenderer
+    # orjson читает целые больше 64 бит как float, json - как int.
+    # Такие тела ищем по 19 цифрам подряд, translate быстрее регулярки
+    digits = bytes(48 if 48 <= char <= 57 else 32 for char in range(256))
+    long_number = b'0' * 19
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if self.long_number in body.translate(self.digits):
+            return super().parse(BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -12,21 +12,22 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.author == request.user
+        return obj.author_id == request.user.id
 
 
 class IsModerOnly(permissions.BasePermission):
     message = 'Staff only'
 
     def has_permission(self, request, view):
+        # У AnonymousUser нет is_moder
+        if not request.user.is_authenticated:
+            return False
         if request.user.is_moder or request.user.is_superuser:
             return True
         return False
 
     def has_object_permission(self, request, view, obj):
-        if request.user.is_moder or request.user.is_superuser:
-            return True
-        return False
+        return self.has_permission(request, view)
 
 
 class IsAuthorOnly(permissions.BasePermission):
@@ -35,4 +36,4 @@ class IsAuthorOnly(permissions.BasePermission):
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        return obj.author_id == request.user.id
@@ -0,0 +1,49 @@
+import math
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson.
+
+    Вывод побайтно совпадает с JSONRenderer при настройках DRF по
+    умолчанию (компактный JSON, UTF-8 без экранирования). Типы, которых
+    нет в orjson, переводятся тем же JSONEncoder DRF. С отступами, другими
+    настройками JSON и на данных, которые orjson не принимает (целые
+    больше 64 бит), работает стандартный рендерер.
+
+    Не совпадает только запись float в экспоненте: 1e-6 у orjson, 1e-06
+    у json, значение то же. Float в ответах бывают лишь в json_data.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def __init__(self):
+        self.encoder = self.encoder_class()
+
+    def default(self, obj):
+        value = self.encoder.default(obj)
+        # Decimal JSONEncoder переводит во float. Экспоненту orjson пишет
+        # иначе, а NaN и Infinity - как null, json DRF на них падает
+        if type(value) is float and (
+            not math.isfinite(value) or 'e' in repr(value)
+        ):
+            raise TypeError
+        return value
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как в JSONRenderer: U+2028 и U+2029 экранируются для javascript
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,167 @@
+from operator import itemgetter
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from parts.models import PartImage
+
+
+def to_decimal(value):
+    # Как DecimalField DRF с COERCE_DECIMAL_TO_STRING
+    return format(value, 'f')
+
+
+def to_datetime(value):
+    # Как DateTimeField DRF: текущая таймзона, ISO 8601 и Z вместо +00:00
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def to_str(value):
+    # str() связанного объекта, для пустой связи 'None' как у str(None)
+    return 'None' if value is None else value
+
+
+class RowMapper:
+    """
+    Сборка dict из строк values() без полей сериалайзера.
+
+    fields - пары (ключ ответа, колонка), колонка - имя для values(),
+    кортеж (колонки, функция) для вычисляемых значений или None, если
+    значение заполняется отдельно. prefix - путь до модели, если строки
+    выбираются через связь (например 'part__' для избранного). Функции
+    чтения строк готовятся один раз при создании маппера.
+    """
+
+    def __init__(self, fields, prefix=''):
+        self.prefix = prefix
+        self.columns = []
+        self.getters = []
+        for key, source in fields:
+            if source is None:
+                getter = self.empty
+            elif isinstance(source, str):
+                source = prefix + source
+                self.add_column(source)
+                getter = itemgetter(source)
+            else:
+                columns = [prefix + column for column in source[0]]
+                for column in columns:
+                    self.add_column(column)
+                getter = self.make_getter(columns, source[1])
+            self.getters.append((key, getter))
+
+    @staticmethod
+    def empty(row):
+        return None
+
+    def add_column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+
+    @staticmethod
+    def make_getter(columns, convert):
+        if len(columns) == 1:
+            column = columns[0]
+            return lambda row: convert(row[column])
+        get_values = itemgetter(*columns)
+        return lambda row: convert(*get_values(row))
+
+    # Необязательные аннотации запроса, выбираются, если есть в queryset
+    annotations = ()
+
+    def values(self, queryset, *extra):
+        # extra - колонки, нужные вызывающему коду, например для курсора
+        columns = list(self.columns)
+        columns += [column for column in extra if column not in columns]
+        columns += [
+            name for name in self.annotations
+            if name in queryset.query.annotations
+        ]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def map(self, rows):
+        getters = self.getters
+        return [{key: get(row) for key, get in getters} for row in rows]
+
+
+class PartRowMapper(RowMapper):
+    """Вывод PartSerializer для списка запчастей"""
+    image_fields = ('image', 'thumbnail', 'thumbnail_webp')
+    # rank нужен курсору пагинации при полнотекстовом поиске,
+    # is_favorited - Part.objects.with_favorited
+    annotations = ('rank', 'is_favorited')
+
+    def __init__(self, prefix=''):
+        super().__init__((
+            ('id', 'id'),
+            ('mark', (
+                ('mark_id', 'mark__name', 'mark__producer_country_name'),
+                lambda pk, name, country: {
+                    'id': pk,
+                    'name': name,
+                    'producer_country_name': country,
+                }
+            )),
+            ('model', 'model__name'),
+            ('name', 'name'),
+            ('category', (('category__name',), to_str)),
+            ('json_data', 'json_data'),
+            ('description', 'description'),
+            ('images', None),
+            ('location', 'location__name'),
+            ('price', (('price',), to_decimal)),
+            ('author', 'author__username'),
+            ('contact', 'contact'),
+            ('sold', 'sold'),
+            ('uploaded_at', (('uploaded_at',), to_datetime)),
+            ('is_favorited', None),
+        ), prefix)
+
+    def get_images_queryset(self, part_ids):
+        return PartImage.objects.filter(part_id__in=part_ids).order_by(
+            'id'
+        ).values_list('part_id', *self.image_fields)
+
+    def add_image(self, images, row, request):
+        part_id, *names = row
+        images.setdefault(part_id, []).append({
+            field: request.build_absolute_uri(default_storage.url(name))
+            if name else None
+            for field, name in zip(self.image_fields, names)
+        })
+
+    def get_images(self, part_ids, request):
+        images = {}
+        for row in self.get_images_queryset(part_ids):
+            self.add_image(images, row, request)
+        return images
+
+    async def aget_images(self, part_ids, request):
+        images = {}
+        async for row in self.get_images_queryset(part_ids):
+            self.add_image(images, row, request)
+        return images
+
+    def map(self, rows, request):
+        data = super().map(rows)
+        images = self.get_images([part['id'] for part in data], request)
+        return self.add_extra(data, rows, images)
+
+    async def amap(self, rows, request):
+        """map для асинхронных вьюх, фото через async ORM"""
+        data = super().map(rows)
+        images = await self.aget_images([part['id'] for part in data], request)
+        return self.add_extra(data, rows, images)
+
+    @staticmethod
+    def add_extra(data, rows, images):
+        for part, row in zip(data, rows):
+            part['images'] = images.get(part['id'], [])
+            part['is_favorited'] = row.get('is_favorited', False)
+        return data
+
+part_rows = PartRowMapper()
+favorite_part_rows = PartRowMapper('part__')
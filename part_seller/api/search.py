@@ -0,0 +1,36 @@
+import re
+from functools import lru_cache
+
+import pymorphy2
+from django.contrib.postgres.search import SearchQuery
+
+SEARCH_CONFIG = 'russian'
+WORD_PATTERN = re.compile(r'\w+', re.U)
+
+
+@lru_cache(maxsize=1)
+def get_morph_analyzer():
+    # Словари pymorphy2 грузятся долго, анализатор создаем один раз
+    return pymorphy2.MorphAnalyzer()
+
+
+@lru_cache(maxsize=4096)
+def lemmatize(word):
+    """Нормальная форма слова: 'амортизаторы' -> 'амортизатор'"""
+    return get_morph_analyzer().parse(word)[0].normal_form
+
+
+def build_search_query(text):
+    """
+    Поисковый запрос по тексту пользователя.
+    Каждое слово ищется в исходной или нормальной форме,
+    все слова должны присутствовать в документе.
+    """
+    query = None
+    for word in WORD_PATTERN.findall(text.lower()):
+        term = SearchQuery(word, config=SEARCH_CONFIG)
+        lemma = lemmatize(word)
+        if lemma != word:
+            term |= SearchQuery(lemma, config=SEARCH_CONFIG)
+        query = term if query is None else query & term
+    return query
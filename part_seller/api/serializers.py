@@ -3,11 +3,14 @@ from djoser.serializers import UserCreateSerializer
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from parts.attributes import ATTRIBUTE_TYPES
 from parts.models import (Category, Location, Mark,
                           Model, Part, PartImage,
                           User, Favorite
                           )
+from parts.references import reference_cache
 
+from .fields import ReferencePrimaryKeyField
 from .validators import RegexpProc, UsernameValidator
 
 
@@ -41,17 +44,20 @@ class PartImageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PartImage
-        fields = ('image',)
+        # Миниатюры null, пока фото в обработке
+        fields = ('image', 'thumbnail', 'thumbnail_webp')
 
 
 class PartSerializer(serializers.ModelSerializer):
     """Сериалайзер для запчасти"""
-    model = serializers.PrimaryKeyRelatedField(queryset=Model.objects.filter(is_visible=True))
-    mark = serializers.PrimaryKeyRelatedField(queryset=Mark.objects.filter(is_visible=True))
-    location = serializers.PrimaryKeyRelatedField(queryset=Location.objects.filter(is_visible=True))
-    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.filter(is_visible=True))
+    model = ReferencePrimaryKeyField('model', queryset=Model.objects.filter(is_visible=True))
+    mark = ReferencePrimaryKeyField('mark', queryset=Mark.objects.filter(is_visible=True))
+    location = ReferencePrimaryKeyField('location', queryset=Location.objects.filter(is_visible=True))
+    category = ReferencePrimaryKeyField('category', queryset=Category.objects.filter(is_visible=True))
     author = serializers.StringRelatedField(read_only=True)
     images = PartImageSerializer(many=True, read_only=True)
+    # Аннотация Part.objects.with_favorited, без нее False
+    is_favorited = serializers.BooleanField(read_only=True, default=False)
 
     class Meta:
         model = Part
@@ -70,38 +76,26 @@ class PartSerializer(serializers.ModelSerializer):
             'contact',
             'sold',
             'uploaded_at',
+            'is_favorited',
         )
 
+    reference_errors = (
+        ('model', 'Модель не найдена.'),
+        ('mark', 'Марка не найдена.'),
+        ('location', 'Местоположение не найдено.'),
+        ('category', 'Категория не найдена.'),
+    )
+
     def to_internal_value(self, data):
         # Преобразуем названия в объекты модели без учета регистра
         data = data.copy()
-        try:
-            data['model'] = Model.objects.get(name__iexact=data['model']).id
-        except Model.DoesNotExist:
-            raise ValidationError({'model': 'Модель не найдена.'})
-        except KeyError:
-            pass
-
-        try:
-            data['mark'] = Mark.objects.get(name__iexact=data['mark']).id
-        except Mark.DoesNotExist:
-            raise ValidationError({'mark': 'Марка не найдена.'})
-        except KeyError:
-            pass
-
-        try:
-            data['location'] = Location.objects.get(name__iexact=data['location']).id
-        except Location.DoesNotExist:
-            raise ValidationError({'location': 'Местоположение не найдено.'})
-        except KeyError:
-            pass
-
-        try:
-            data['category'] = Category.objects.get(name__iexact=data['category']).id
-        except Category.DoesNotExist:
-            raise ValidationError({'category': 'Категория не найдена.'})
-        except KeyError:
-            pass
+        for field, message in self.reference_errors:
+            if field not in data:
+                continue
+            obj = reference_cache.get_by_name(field, data[field])
+            if obj is None:
+                raise ValidationError({field: message})
+            data[field] = obj.id
 
         return super().to_internal_value(data)
 
@@ -125,8 +119,16 @@ class PartSerializer(serializers.ModelSerializer):
         return value
 
     def validate_json_data(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Ожидается JSON объект')
         for param, val in value.items():
-            if RegexpProc.test(val):
+            # color и is_new_part попадают в типизированные колонки
+            expected = ATTRIBUTE_TYPES.get(param, (str, int, float, bool))
+            if not isinstance(val, expected):
+                raise serializers.ValidationError(
+                    f'{param}: Не корректный тип значения'
+                )
+            if isinstance(val, str) and RegexpProc.test(val):
                 raise serializers.ValidationError(
                     f'{param}: Не корректные данные'
                 )
@@ -182,7 +184,8 @@ class ModerPartSerializer(AuthorPartSerializer):
 
 class CustomUserCreateSerializer(UserCreateSerializer):
     """Сериалайзер для создания пользователя"""
-    location = serializers.PrimaryKeyRelatedField(
+    location = ReferencePrimaryKeyField(
+        'location',
         queryset=Location.objects.filter(is_visible=True)
     )
 
@@ -199,12 +202,11 @@ class CustomUserCreateSerializer(UserCreateSerializer):
 
     def to_internal_value(self, data):
         data = data.copy()
-        try:
-            data['location'] = Location.objects.get(name__iexact=data['location']).id
-        except Location.DoesNotExist:
-            raise ValidationError({'location': 'Местоположение не найдено.'})
-        except KeyError:
-            pass
+        if 'location' in data:
+            location = reference_cache.get_by_name('location', data['location'])
+            if location is None:
+                raise ValidationError({'location': 'Местоположение не найдено.'})
+            data['location'] = location.id
 
         return super().to_internal_value(data)
 
@@ -254,6 +256,27 @@ class FavoriteSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        part_serializer = PartSerializer(instance.part)
+        part_serializer = PartSerializer(instance.part, context=self.context)
         representation['part'] = part_serializer.data
+        representation['part']['is_favorited'] = True
         return representation
+
+
+class ModerationClaimSerializer(serializers.Serializer):
+    """Размер пачки, которую модератор берет из очереди"""
+    size = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.MODERATION_MAX_CLAIM_SIZE,
+        default=settings.MODERATION_CLAIM_SIZE
+    )
+
+
+class ModerationDecisionSerializer(serializers.Serializer):
+    """Решение модератора по одной взятой запчасти"""
+    id = serializers.IntegerField()
+    is_approved = serializers.BooleanField()
+    moder_comment = serializers.CharField(
+        allow_blank=True,
+        default='',
+        max_length=250
+    )
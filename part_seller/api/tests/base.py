@@ -0,0 +1,80 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from api.authentication import UserRefreshToken
+from api.throttling import SlidingWindowRateThrottle
+from parts.models import Category, Location, Mark, Model, Part, User
+
+
+class PartsDataMixin:
+    """Справочники, автор, второй пользователь и модератор"""
+
+    @classmethod
+    def create_test_data(cls):
+        cls.location = Location.objects.create(name='Москва')
+        cls.mark = Mark.objects.create(name='Лада', producer_country_name='Россия')
+        cls.model = Model.objects.create(name='Веста', mark=cls.mark)
+        cls.category = Category.objects.create(name='Двигатель')
+        cls.author = cls.create_user('author')
+        cls.other = cls.create_user('other')
+        cls.moder = cls.create_user('moder', is_moder=True)
+
+    @classmethod
+    def create_user(cls, username, **kwargs):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='password',
+            location=cls.location,
+            contact='89990000000',
+            **kwargs
+        )
+
+    @classmethod
+    def create_part(cls, author=None, **kwargs):
+        """Запчасть в обход API и лимита автора"""
+        values = {
+            'name': 'Поршень',
+            'description': 'Поршень в сборе',
+            'location': cls.location,
+            'mark': cls.mark,
+            'model': cls.model,
+            'category': cls.category,
+            'price': Decimal('1000.00'),
+            'json_data': {'color': 'черный', 'is_new_part': True},
+            'contact': '89990000000',
+            'is_approved': True,
+            'author': author or cls.author,
+        }
+        values.update(kwargs)
+        return Part.objects.create(**values)
+
+
+class PartsAPITestCase(PartsDataMixin, APITestCase):
+    """
+    Данные PartsDataMixin на весь класс. Лимиты запросов отключены, кэш
+    Django (версии каталога и справочников, ответы каталога) чистый в
+    каждом тесте.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_data()
+
+    def setUp(self):
+        cache.clear()
+        throttle = mock.patch.object(
+            SlidingWindowRateThrottle,
+            'allow_request',
+            lambda throttle, request, view: True
+        )
+        throttle.start()
+        self.addCleanup(throttle.stop)
+
+    def authenticate(self, user):
+        """Настоящий JWT, а не force_authenticate: как в рабочих запросах"""
+        token = UserRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
@@ -0,0 +1,170 @@
+import threading
+import time
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from parts import moderation, quota
+from parts.models import ARCHIVE_STATUSES, ArchivedPart, Part, PartImage
+
+from .base import PartsAPITestCase, PartsDataMixin
+
+
+class ArchiveTests(PartsAPITestCase):
+    """Удаленные и проданные запчасти уходят из каталога в архив"""
+
+    def setUp(self):
+        super().setUp()
+        self.part = self.create_part()
+        self.authenticate(self.author)
+
+    def get_ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [part['id'] for part in response.json()['result']]
+
+    def assertArchived(self, status):
+        catalog = reverse('part-list')
+        archive = reverse('part-archive')
+        self.assertNotIn(self.part.pk, self.get_ids(catalog))
+        self.assertEqual(self.get_ids(archive), [self.part.pk])
+        self.assertEqual(self.get_ids(archive, status=status), [self.part.pk])
+        other = 'sold' if status == 'deleted' else 'deleted'
+        self.assertEqual(self.get_ids(archive, status=other), [])
+        self.authenticate(self.moder)
+        self.assertEqual(
+            self.get_ids(reverse('moderation-archive')),
+            [self.part.pk]
+        )
+
+    def test_live(self):
+        self.assertIn(self.part.pk, self.get_ids(reverse('part-list')))
+        self.assertEqual(self.get_ids(reverse('part-archive')), [])
+
+    def test_deleted(self):
+        response = self.client.delete(reverse('part-detail', args=[self.part.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertArchived('deleted')
+
+    def test_sold(self):
+        response = self.client.patch(
+            reverse('part-detail', args=[self.part.pk]),
+            {'sold': True},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertArchived('sold')
+
+    def test_unknown_status(self):
+        response = self.client.get(reverse('part-archive'), {'status': 'lost'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_foreign_keys(self):
+        # Внешние ключи на parts_part остаются в БД
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PartImage.objects.create(part_id=self.part.pk + 1000, image='x.jpg')
+            connection.cursor().execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    def test_archive_index(self):
+        # Недавний архив читается по частичным индексам в порядке id,
+        # а не сортировкой всех проданных и удаленных строк
+        for status in (None, 'sold', 'deleted'):
+            queryset = ArchivedPart.objects.all()
+            if status is not None:
+                queryset = queryset.filter(ARCHIVE_STATUSES[status])
+            for queryset in (queryset, queryset.filter(author=self.author)):
+                with self.subTest(status=status), transaction.atomic():
+                    connection.cursor().execute(
+                        'SET LOCAL enable_seqscan = off; '
+                        'SET LOCAL enable_bitmapscan = off'
+                    )
+                    plan = queryset.order_by('id')[:11].explain()
+                    self.assertRegex(plan, r'part_archive_(author_)?idx')
+                    # Merge Append без узла Sort над ветками
+                    self.assertNotRegex(plan, r'\bSort  \(')
+
+
+class ArchiveMoveTests(PartsDataMixin, TransactionTestCase):
+    """
+    Запчасть уходит в архив, пока другой запрос ждет блокировку ее
+    строки: ожидающий видит новое состояние строки, а не ошибку
+    """
+
+    def setUp(self):
+        self.create_test_data()
+
+    @staticmethod
+    def wait_for_lock_waiter(timeout=5):
+        deadline = time.monotonic() + timeout
+        with connection.cursor() as cursor:
+            while time.monotonic() < deadline:
+                cursor.execute(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE wait_event_type = 'Lock' "
+                    "AND datname = current_database()"
+                )
+                if cursor.fetchone()[0]:
+                    return True
+                time.sleep(0.01)
+        return False
+
+    def move_while_locking(self, part, changes, lock):
+        """lock() в транзакции, пока другая транзакция меняет part"""
+        updated = threading.Event()
+        waited = []
+
+        def move():
+            try:
+                with transaction.atomic():
+                    Part.objects.filter(pk=part.pk).update(**changes)
+                    updated.set()
+                    waited.append(self.wait_for_lock_waiter())
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=move)
+        thread.start()
+        self.assertTrue(updated.wait(5))
+        try:
+            with transaction.atomic():
+                result = lock()
+        finally:
+            thread.join()
+        self.assertEqual(waited, [True])
+        return result
+
+    def test_lock_active(self):
+        part = self.create_part()
+        for changes in ({'sold': True}, {'is_visible': False}):
+            with self.subTest(**changes):
+                Part.objects.filter(pk=part.pk).update(is_visible=True, sold=False)
+                was_active = self.move_while_locking(
+                    part,
+                    changes,
+                    lambda: quota.lock_active(part)
+                )
+                self.assertFalse(was_active)
+
+    def test_lock_active_restore(self):
+        # Строка не подходила под условие до восстановления, но блокировка
+        # все равно ждет транзакцию, которая ее восстанавливает
+        part = self.create_part(sold=True)
+        was_active = self.move_while_locking(
+            part,
+            {'sold': False},
+            lambda: quota.lock_active(part)
+        )
+        self.assertTrue(was_active)
+
+    def test_moderation_submit(self):
+        part = self.create_part(is_approved=False, moder_checked=False)
+        moderation.claim(self.moder, 10)
+        saved = self.move_while_locking(
+            part,
+            {'is_visible': False},
+            lambda: moderation.submit(self.moder, {part.pk: (True, '')})
+        )
+        self.assertEqual(saved, [])
+        part.refresh_from_db()
+        self.assertFalse(part.is_approved)
@@ -0,0 +1,75 @@
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+
+from api.async_views import AsyncPartDetailView, AsyncPartListView
+from api.views import PartViewSet
+
+from .base import PartsAPITestCase
+
+
+class AsyncNegotiationTests(PartsAPITestCase):
+    """
+    Асинхронные вьюхи согласуют формат как DRF: компактный JSON отдают
+    сами, остальное - синхронная вьюха, в том числе 406
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.part = self.create_part()
+        self.factory = AsyncRequestFactory()
+        self.sync_calls = 0
+        sync_view = PartViewSet.as_view({'get': 'list'})
+
+        def counting_sync_view(request, *args, **kwargs):
+            self.sync_calls += 1
+            return sync_view(request, *args, **kwargs)
+
+        counting_sync_view.cls = PartViewSet
+        self.list_view = AsyncPartListView.as_view(sync_view=counting_sync_view)
+
+    async def get(self, accept=None, **params):
+        headers = {'Accept': accept} if accept else {}
+        request = self.factory.get(reverse('part-list'), params, headers=headers)
+        response = await self.list_view(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    async def test_json(self):
+        for accept in (None, '*/*', 'application/json', 'application/*'):
+            with self.subTest(accept=accept):
+                response = await self.get(accept)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(self.sync_calls, 0)
+
+    async def test_not_acceptable(self):
+        response = await self.get('application/xml')
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(self.sync_calls, 1)
+
+    async def test_unknown_format(self):
+        response = await self.get(format='xml')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.sync_calls, 1)
+
+    async def test_browsable_api(self):
+        response = await self.get('text/html')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertEqual(self.sync_calls, 1)
+
+    async def test_indent(self):
+        response = await self.get('application/json; indent=4')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'\n    ', response.content)
+        self.assertEqual(self.sync_calls, 1)
+
+    async def test_detail_etag_matches_sync(self):
+        view = AsyncPartDetailView.as_view(
+            sync_view=PartViewSet.as_view({'get': 'retrieve'})
+        )
+        url = reverse('part-detail', args=[self.part.pk])
+        response = await view(self.factory.get(url), pk=self.part.pk)
+        sync_response = await self.async_client.get(url)
+        self.assertEqual(response['ETag'], sync_response['ETag'])
@@ -0,0 +1,55 @@
+from django.urls import reverse
+
+from .base import PartsAPITestCase
+
+
+class RoleRevocationTests(PartsAPITestCase):
+    """
+    Вьюхи, доступ к которым дает роль, читают пользователя из БД и на
+    GET: бан и снятие роли действуют сразу, кэш версий токенов не
+    продлевает доступ
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.create_part(is_approved=False, moder_checked=False)
+        self.url = reverse('moderation-list')
+
+    def get(self, url=None):
+        return self.client.get(url or self.url)
+
+    def test_moderator(self):
+        self.authenticate(self.moder)
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_demoted_moderator(self):
+        self.authenticate(self.moder)
+        # Версия токена прогрета в кэше процесса
+        self.assertEqual(self.get(reverse('part-list')).status_code, 200)
+        self.assertEqual(self.get().status_code, 200)
+        self.moder.is_moder = False
+        self.moder.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_banned_moderator(self):
+        self.authenticate(self.moder)
+        self.assertEqual(self.get().status_code, 200)
+        self.moder.is_active = False
+        self.moder.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_demoted_admin(self):
+        admin = self.create_user('admin', is_staff=True)
+        url = reverse('catalog-cache-stats')
+        self.authenticate(admin)
+        self.assertEqual(self.get(url).status_code, 200)
+        admin.is_staff = False
+        admin.save()
+        self.assertEqual(self.get(url).status_code, 401)
+
+    def test_anonymous(self):
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_not_moderator(self):
+        self.authenticate(self.other)
+        self.assertEqual(self.get().status_code, 403)
@@ -0,0 +1,78 @@
+import re
+import threading
+from random import Random
+
+from django.test import SimpleTestCase
+
+from api.automaton import PatternAutomaton
+from api.validators import RegexpProc
+
+# Буквы из шаблонов, их латинские двойники, разделители и обычный текст
+alphabet = (
+    'хуйпизбляеёнтрдоаксчцмшщьъыэжгвф'
+    'xyeopcakbnthmu3467'
+    'ХУЙПЕЁXYEOPCAKBMſK'
+    '@!#$%^&*+-|/_ .,\t\n0123456789'
+)
+
+
+def make_corpus(size, seed):
+    random = Random(seed)
+    return [
+        ''.join(random.choice(alphabet) for _ in range(random.randint(0, 60)))
+        for _ in range(size)
+    ]
+
+
+def regexp_test(text):
+    return bool(RegexpProc.regexp.findall(text))
+
+
+class PatternAutomatonTests(SimpleTestCase):
+
+    def make_automaton(self, **limits):
+        automaton = PatternAutomaton(RegexpProc.PATTERN_1, re.U | re.I)
+        for name, value in limits.items():
+            setattr(automaton, name, value)
+        return automaton
+
+    def test_parity_with_regexp(self):
+        automaton = self.make_automaton()
+        for text in make_corpus(20000, seed=0):
+            self.assertEqual(automaton.search(text), regexp_test(text), text)
+
+    def test_samples(self):
+        automaton = self.make_automaton()
+        for text in (
+            '',
+            'Амортизатор задний в хорошем состоянии',
+            'ё' * 250,
+            ('пи' + '!' * 5) * 40,
+        ):
+            self.assertEqual(automaton.search(text), regexp_test(text), text)
+
+    def test_caches_bounded(self):
+        automaton = self.make_automaton(max_states=50, max_transitions=200)
+        for text in make_corpus(2000, seed=1):
+            self.assertEqual(automaton.search(text), regexp_test(text), text)
+            self.assertLessEqual(len(automaton.cache.states), 50 + 1)
+            self.assertLessEqual(len(automaton.cache.transitions), 200 + 1)
+
+    def test_threads_share_automaton(self):
+        # Маленькие лимиты: кэш часто заменяется посреди чужого поиска
+        automaton = self.make_automaton(max_states=30, max_transitions=100)
+        errors = []
+
+        def worker(seed):
+            for text in make_corpus(1000, seed):
+                if automaton.search(text) != regexp_test(text):
+                    errors.append(text)
+
+        threads = [
+            threading.Thread(target=worker, args=(seed,)) for seed in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
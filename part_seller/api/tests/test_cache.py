@@ -0,0 +1,60 @@
+from django.urls import reverse
+
+from parts.catalog import bump_catalog_version, get_catalog_version
+
+from .base import PartsAPITestCase
+
+
+class CatalogResponseCacheTests(PartsAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.part = cls.create_part()
+        cls.admin = cls.create_user('admin', is_staff=True)
+        cls.url = reverse('part-list')
+
+    def test_hit_after_miss(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(1):
+            # Только версия каталога из БД
+            self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+    def test_authenticated_bypass(self):
+        self.authenticate(self.other)
+        self.assertNotIn('X-Cache', self.client.get(self.url))
+
+    def test_version_in_database(self):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_catalog_version()
+        self.assertGreater(get_catalog_version(), version)
+
+    def test_edit_invalidates(self):
+        self.client.get(self.url)
+        self.authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse('part-detail', args=[self.part.pk]),
+                {'sold': True},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['result'], [])
+
+    def test_stats(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        url = reverse('catalog-cache-stats')
+        self.authenticate(self.other)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.authenticate(self.admin)
+        stats = self.client.get(url).json()
+        self.assertEqual(
+            (stats['hits'], stats['misses'], stats['hit_ratio']),
+            (1, 1, 0.5)
+        )
+        self.assertEqual(stats['version'], get_catalog_version())
@@ -0,0 +1,46 @@
+from django.urls import reverse
+from django.utils.cache import has_vary_header
+
+from .base import PartsAPITestCase
+
+
+class ConditionalGetTests(PartsAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.part = cls.create_part()
+        cls.urls = (
+            reverse('part-detail', args=[cls.part.pk]),
+            reverse('mark-list'),
+        )
+
+    def test_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_media_type(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(has_vary_header(response, 'Accept'))
+                for accept in ('text/html', 'application/json; indent=4'):
+                    other = self.client.get(
+                        url,
+                        HTTP_ACCEPT=accept,
+                        HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                    self.assertEqual(other.status_code, 200, accept)
+                    self.assertNotEqual(other['ETag'], response['ETag'])
+
+    def test_author_rename_changes_etag(self):
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        self.author.username = 'renamed'
+        self.author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['author'], 'renamed')
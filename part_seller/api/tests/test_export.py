@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.urls import reverse
+
+from .base import PartsAPITestCase
+
+
+class ExportTests(PartsAPITestCase):
+    """Потоковая выгрузка каталога, фильтры как у списка"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cheap = cls.create_part(name='Фара «левая»', price=Decimal('500.00'))
+        cls.expensive = cls.create_part(
+            price=Decimal('150000.00'),
+            json_data={'color': 'белый', 'side': 'левая'}
+        )
+        # Не попадают в выгрузку
+        cls.create_part(is_approved=False)
+        cls.create_part(sold=True)
+
+    def export(self, **params):
+        response = self.client.get(reverse('part-export'), params)
+        content = b''.join(getattr(response, 'streaming_content', [])).decode()
+        return response, content
+
+    def test_ndjson(self):
+        response, content = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'],
+            'application/x-ndjson; charset=utf-8'
+        )
+        self.assertIn('parts.ndjson', response['Content-Disposition'])
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            [self.cheap.pk, self.expensive.pk]
+        )
+        self.assertEqual(rows[0]['name'], 'Фара «левая»')
+        self.assertEqual(rows[0]['mark'], 'Лада')
+        self.assertEqual(rows[0]['price'], '500.00')
+        self.assertEqual(rows[1]['json_data']['side'], 'левая')
+
+    def test_csv(self):
+        response, content = self.export(output='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            [self.cheap.pk, self.expensive.pk]
+        )
+        self.assertEqual(rows[0]['category'], 'Двигатель')
+        self.assertEqual(json.loads(rows[1]['json_data'])['color'], 'белый')
+
+    def test_filter_subset(self):
+        for output in ('ndjson', 'csv'):
+            with self.subTest(output=output):
+                response, content = self.export(output=output, price_gte=1000)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(str(self.expensive.pk), content)
+                self.assertNotIn('Фара', content)
+
+    def test_invalid_filter(self):
+        # Как у списка: 400, а не весь каталог без фильтра
+        list_response = self.client.get(reverse('part-list'), {'price_gte': 'abc'})
+        self.assertEqual(list_response.status_code, 400)
+        response, _ = self.export(price_gte='abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('price_gte', response.json())
+
+    def test_unknown_output(self):
+        response, _ = self.export(output='xml')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,51 @@
+from django.urls import reverse
+
+from parts.models import Part
+
+from .base import PartsAPITestCase
+
+
+class ColorFilterTests(PartsAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.black = cls.create_part(json_data={'color': ' Чёрный '})
+        cls.white = cls.create_part(json_data={'color': 'белый'})
+        cls.create_part(json_data={'side': 'левая'})
+
+    def filter(self, **params):
+        response = self.client.get(reverse('part-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return {part['id'] for part in response.json()['result']}
+
+    def test_color_substring(self):
+        # Как прежний json_data__color__icontains
+        cases = {
+            'ый': {self.black.pk, self.white.pk},
+            'ерн': {self.black.pk},
+            'ЧЕРНЫЙ': {self.black.pk},
+            'зеленый': set(),
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(self.filter(color=value), expected)
+
+    def test_color_prefix(self):
+        cases = {
+            'чёр': {self.black.pk},
+            'Бел': {self.white.pk},
+            'ый': set(),
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(self.filter(color_prefix=value), expected)
+
+    def test_colors_containing(self):
+        # Каждый цвет один раз, без строк без цвета
+        self.create_part(json_data={'color': 'ЧЕРНЫЙ'})
+        self.assertEqual(
+            sorted(Part.objects.colors_containing('ый')),
+            ['белый', 'черный']
+        )
+        self.assertEqual(Part.objects.colors_containing('зел'), [])
@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from parts.images import executor, process_image
+from parts.models import PartImage
+
+from .base import PartsAPITestCase, PartsDataMixin
+
+
+def make_jpeg(size=(800, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class MediaRootMixin:
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ImageUploadTests(MediaRootMixin, PartsAPITestCase):
+
+    def create(self, *images):
+        self.authenticate(self.author)
+        return self.client.post(reverse('part-list'), {
+            'name': 'Поршень',
+            'description': 'Поршень в сборе',
+            'mark': self.mark.name,
+            'model': self.model.name,
+            'category': self.category.name,
+            'location': self.location.name,
+            'price': '1000.00',
+            'json_data': '{"color": "черный"}',
+            'contact': '89990000000',
+            'images': list(images),
+        }, format='multipart')
+
+    def test_valid_image(self):
+        response = self.create(
+            SimpleUploadedFile('part.jpg', make_jpeg(), 'image/jpeg')
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(PartImage.objects.count(), 1)
+
+    def test_broken_image_rejected_before_response(self):
+        png = BytesIO()
+        Image.new('RGB', (10, 10)).save(png, 'PNG')
+        # Заголовок PNG цел, контрольная сумма блока данных нет
+        broken = bytearray(png.getvalue())
+        broken[-20] ^= 0xFF
+        for content in (bytes(broken), b'not an image'):
+            with self.subTest(content=content[:12]):
+                response = self.create(
+                    SimpleUploadedFile('part.png', content, 'image/png')
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(PartImage.objects.count(), 0)
+
+
+class ProcessImageTests(MediaRootMixin, PartsDataMixin, TransactionTestCase):
+    """Обработка в потоке пула, как в работе: у потока свое соединение"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_test_data()
+        self.part = self.create_part()
+
+    def process(self, content):
+        image = PartImage.objects.create(
+            part=self.part,
+            image=SimpleUploadedFile('part.jpg', content, 'image/jpeg')
+        )
+        executor.submit(process_image, image.pk).result()
+        return PartImage.objects.filter(pk=image.pk).first()
+
+    def test_thumbnails(self):
+        image = self.process(make_jpeg())
+        self.assertEqual(image.status, PartImage.READY)
+        for field in (image.thumbnail, image.thumbnail_webp):
+            with Image.open(field.path) as thumbnail:
+                self.assertLessEqual(max(thumbnail.size), 320)
+
+    def test_truncated_image_logged_and_removed(self):
+        with self.assertLogs('parts.images', 'WARNING'):
+            image = self.process(make_jpeg()[:-500])
+        self.assertIsNone(image)
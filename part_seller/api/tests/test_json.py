@@ -0,0 +1,207 @@
+import datetime
+import uuid
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from api.rows import part_rows
+from api.serializers import MarkSerializer, ModelSerializer, PartSerializer
+from parts.models import Mark, Model, Part, PartImage
+
+from .base import PartsAPITestCase
+
+utc = datetime.timezone.utc
+
+# Данные, на которых orjson и json расходятся чаще всего
+samples = {
+    'пусто': {},
+    'юникод': {'name': 'Фара «левая» ✓ 😀', 'line': 'a b c'},
+    'управляющие символы': {'text': 'tab\t\n\r\x00\x1f"\\/'},
+    'числа': {
+        'int': -2 ** 63,
+        'big': 2 ** 64,
+        'float': 0.1,
+        'price': 1000.5,
+        'negative zero': -0.0,
+    },
+    'decimal': {
+        'price': Decimal('1000.50'),
+        'exponent': Decimal('1E+3'),
+        'small': Decimal('0.000001'),
+        'large': Decimal('1E+16'),
+    },
+    'даты': {
+        'utc': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=utc),
+        'offset': datetime.datetime(
+            2024, 5, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=3))
+        ),
+        'naive': datetime.datetime(2024, 5, 1, 12, 0),
+        'date': datetime.date(2024, 5, 1),
+        'time': datetime.time(12, 30),
+        'duration': datetime.timedelta(hours=1, seconds=1),
+    },
+    'прочие типы': {
+        'uuid': uuid.UUID(int=1),
+        'lazy': gettext_lazy('Марка'),
+        'error': [ErrorDetail('Не корректные данные', code='invalid')],
+        'tuple': (1, 'a', None, True),
+        'set': frozenset({1}),
+        'bytes': b'abc',
+    },
+    'нестроковые ключи': {1: 'a', True: 'b', None: 'c', 1.5: 'd'},
+}
+
+parser_samples = (
+    b'{"mark":"honda","json_data":{"color":"\\u0421\\u0438\\u043d\\u0438\\u0439"}}',
+    '{"name":"Фара","price":"100.50","sold":false,"list":[1,2.5,null]}'.encode(),
+    b'{"big":123456789012345678901234567890}',
+    b'{"float":1e400}',
+    b'{"surrogate":"\\ud800"}',
+    b'{"dup":1,"dup":2}',
+    b'  [1, 2]  ',
+    b'{"nan":NaN}',
+    b'{"inf":Infinity}',
+    b'{"inf":-Infinity}',
+    b'{"broken":',
+    b'\xef\xbb\xbf{}',
+    b'"\xff"',
+    b'',
+)
+
+
+def parse(parser, body):
+    try:
+        return 'ok', parser.parse(BytesIO(body), parser_context={})
+    except Exception as exc:
+        return type(exc).__name__, str(exc)
+
+
+class JSONCompatTests(SimpleTestCase):
+    """ORJSONRenderer и ORJSONParser побайтно повторяют JSON DRF"""
+
+    def test_renderer(self):
+        for name, data in samples.items():
+            with self.subTest(name):
+                self.assertEqual(
+                    ORJSONRenderer().render(data),
+                    JSONRenderer().render(data)
+                )
+
+    def test_renderer_float_exponent(self):
+        # Единственное расхождение: запись float в экспоненте
+        data = {'small': 1e-6, 'large': 1e16}
+        actual = ORJSONRenderer().render(data)
+        self.assertEqual(actual, b'{"small":1e-6,"large":1e16}')
+        self.assertEqual(
+            JSONParser().parse(BytesIO(actual)),
+            JSONParser().parse(BytesIO(JSONRenderer().render(data)))
+        )
+
+    def test_renderer_indent(self):
+        # С отступами работает стандартный рендерер
+        data = samples['юникод']
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type)
+        )
+
+    def test_renderer_nan(self):
+        # JSONRenderer DRF не пишет NaN и Infinity, orjson пишет null.
+        # Проверять float в каждом ответе дороже самого orjson, а в ответы
+        # они не попадают: парсеры их не принимают, jsonb их не хранит
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'value': value})
+                self.assertEqual(
+                    ORJSONRenderer().render({'value': value}),
+                    b'{"value":null}'
+                )
+        # Decimal идет через JSONEncoder, тут поведение как у DRF
+        for value in (Decimal('NaN'), Decimal('Infinity')):
+            with self.subTest(value=value):
+                for renderer in (JSONRenderer(), ORJSONRenderer()):
+                    with self.assertRaises(ValueError):
+                        renderer.render({'value': value})
+
+    def test_parser(self):
+        bodies = list(parser_samples) + [
+            JSONRenderer().render(data) for data in samples.values()
+        ]
+        for body in bodies:
+            with self.subTest(body=body[:100]):
+                expected = parse(JSONParser(), body)
+                actual = parse(ORJSONParser(), body)
+                self.assertEqual(repr(actual), repr(expected))
+
+    def test_parser_rejects_nan(self):
+        for body in (b'{"nan":NaN}', b'{"inf":Infinity}', b'[-Infinity]'):
+            with self.subTest(body=body):
+                self.assertEqual(parse(ORJSONParser(), body)[0], 'ParseError')
+
+
+class JSONResponsesCompatTests(PartsAPITestCase):
+    """То же на ответах API из БД"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.create_part(name='Фара «левая»', price=Decimal('123456.78'))
+        part = cls.create_part(category=None, price=Decimal('0.50'))
+        PartImage.objects.create(part=part, image='part_images/front.jpg')
+
+    def get_responses(self):
+        request = Request(APIRequestFactory().get('/api/v1/part/'))
+        parts = Part.objects.with_related().order_by('id')
+        return {
+            'список запчастей': {
+                'next': None,
+                'previous': None,
+                'result': part_rows.map(part_rows.values(parts), request),
+            },
+            'карточка запчасти': PartSerializer(
+                parts.last(), context={'request': request}
+            ).data,
+            'марки': MarkSerializer(Mark.objects.all(), many=True).data,
+            'модели': ModelSerializer(
+                Model.objects.select_related('mark'), many=True
+            ).data,
+        }
+
+    def test_renderer(self):
+        for name, data in self.get_responses().items():
+            with self.subTest(name):
+                self.assertEqual(
+                    ORJSONRenderer().render(data),
+                    JSONRenderer().render(data)
+                )
+
+    def test_parser(self):
+        for name, data in self.get_responses().items():
+            body = JSONRenderer().render(data)
+            with self.subTest(name):
+                self.assertEqual(
+                    repr(parse(ORJSONParser(), body)),
+                    repr(parse(JSONParser(), body))
+                )
+
+    def test_nan_in_request(self):
+        self.authenticate(self.author)
+        part = Part.objects.first()
+        response = self.client.patch(
+            reverse('part-detail', args=[part.pk]),
+            b'{"json_data":{"color":"black","weight":NaN}}',
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,149 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from parts import moderation
+from parts.models import Part
+
+from .base import PartsAPITestCase, PartsDataMixin
+
+
+class ModerationQueueTests(PartsAPITestCase):
+    """Аренда запчастей из очереди модерации"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.second = cls.create_user('second', is_moder=True)
+
+    def setUp(self):
+        super().setUp()
+        self.queue = [
+            self.create_part(is_approved=False).pk for _ in range(5)
+        ]
+        # Не в очереди: уже проверенная и удаленная
+        self.create_part(moder_checked=True)
+        self.create_part(is_approved=False, is_visible=False)
+
+    def test_claim_disjoint(self):
+        first, until = moderation.claim(self.moder, 3)
+        second, _ = moderation.claim(self.second, 3)
+        self.assertEqual(first, self.queue[:3])
+        self.assertEqual(second, self.queue[3:])
+        self.assertEqual(
+            set(Part.objects.filter(moder_claimed_by=self.moder).values_list(
+                'moder_claimed_until', flat=True
+            )),
+            {until}
+        )
+        # Очередь разобрана, третьему ничего не достается
+        self.assertEqual(moderation.claim(self.other, 3)[0], [])
+
+    def test_expired_lease(self):
+        moderation.claim(self.moder, 2)
+        Part.objects.filter(pk=self.queue[0]).update(
+            moder_claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+        ids, _ = moderation.claim(self.second, 2)
+        self.assertEqual(ids, [self.queue[0], self.queue[2]])
+        # Просроченная аренда не дает сохранить решение
+        self.assertEqual(
+            moderation.submit(self.moder, {self.queue[0]: (True, '')}),
+            []
+        )
+
+    def test_release(self):
+        moderation.claim(self.moder, 2)
+        self.assertEqual(moderation.release(self.moder), 2)
+        ids, _ = moderation.claim(self.second, 2)
+        self.assertEqual(ids, self.queue[:2])
+
+    def test_submit(self):
+        moderation.claim(self.moder, 2)
+        moderation.claim(self.second, 1)
+        saved = moderation.submit(self.moder, {
+            self.queue[0]: (True, ''),
+            self.queue[1]: (False, 'Нет фото'),
+            # Чужая и не взятая запчасти пропускаются
+            self.queue[2]: (True, ''),
+            self.queue[3]: (True, ''),
+        })
+        self.assertEqual(sorted(saved), self.queue[:2])
+        parts = Part.objects.in_bulk(self.queue)
+        self.assertTrue(parts[self.queue[0]].is_approved)
+        self.assertEqual(parts[self.queue[1]].moder_comment, 'Нет фото')
+        for pk in self.queue[:2]:
+            self.assertTrue(parts[pk].moder_checked)
+            self.assertIsNone(parts[pk].moder_claimed_by)
+        for pk in self.queue[2:]:
+            self.assertFalse(parts[pk].moder_checked)
+        self.assertEqual(parts[self.queue[2]].moder_claimed_by, self.second)
+        # Повторно уже проверенные не сохраняются
+        self.assertEqual(
+            moderation.submit(self.moder, {self.queue[0]: (False, '')}),
+            []
+        )
+
+    def test_stats(self):
+        now = timezone.now()
+        for age, pk in enumerate(self.queue):
+            Part.objects.filter(pk=pk).update(
+                uploaded_at=now - timedelta(hours=5 - age)
+            )
+        moderation.claim(self.moder, 2)
+        stats = moderation.get_stats()
+        self.assertEqual(
+            {key: stats[key] for key in ('depth', 'claimed', 'available')},
+            {'depth': 5, 'claimed': 2, 'available': 3}
+        )
+        self.assertAlmostEqual(stats['oldest_age'], 5 * 3600, delta=60)
+        self.assertAlmostEqual(
+            stats['oldest_available_age'],
+            3 * 3600,
+            delta=60
+        )
+
+    def test_stats_empty(self):
+        Part.objects.update(moder_checked=True)
+        self.assertEqual(moderation.get_stats(), {
+            'depth': 0,
+            'claimed': 0,
+            'available': 0,
+            'oldest_age': 0,
+            'oldest_available_age': 0,
+        })
+
+
+class ModerationClaimLockTests(PartsDataMixin, TransactionTestCase):
+    """SKIP LOCKED: строки, которые забирает другой модератор, пропускаются"""
+
+    def setUp(self):
+        self.create_test_data()
+
+    def test_claim_skips_locked(self):
+        queue = [self.create_part(is_approved=False).pk for _ in range(4)]
+        locked, done = threading.Event(), threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    list(Part.objects.filter(
+                        pk__in=queue[:2]
+                    ).select_for_update())
+                    locked.set()
+                    done.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(5))
+            ids, _ = moderation.claim(self.moder, 4)
+        finally:
+            done.set()
+            thread.join()
+        self.assertEqual(ids, queue[2:])
@@ -0,0 +1,85 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.urls import reverse
+
+from .base import PartsAPITestCase
+
+
+def get_cursor(link):
+    return parse_qs(urlparse(link).query)['cursor'][0]
+
+
+def tamper(cursor, **changes):
+    data = json.loads(urlsafe_b64decode(cursor))
+    data.update(changes)
+    return urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+class KeysetPaginatorTests(PartsAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Одинаковые цены: порядок внутри цены задает id
+        cls.parts = [
+            cls.create_part(price=Decimal(100 * (i % 4)))
+            for i in range(25)
+        ]
+        cls.url = reverse('part-list')
+
+    def test_pages_cover_catalog_once(self):
+        seen = []
+        response = self.client.get(self.url, {'ordering': '-price'})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen += [(Decimal(part['price']), part['id'])
+                     for part in response.json()['result']]
+            link = response.json()['next']
+            if link is None:
+                break
+            response = self.client.get(link)
+        self.assertEqual(
+            seen,
+            sorted(((part.price, part.id) for part in self.parts),
+                   key=lambda item: (-item[0], -item[1]))
+        )
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(self.url, {'ordering': 'price'}).json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['result'], first['result'])
+
+    def test_tampered_cursor_value(self):
+        response = self.client.get(self.url, {'ordering': 'price'})
+        cursor = get_cursor(response.json()['next'])
+        for position in (['abc', 1], ['NaN', 1], [None, 1], ['1', 'x']):
+            with self.subTest(position=position):
+                response = self.client.get(self.url, {
+                    'ordering': 'price',
+                    'cursor': tamper(cursor, position=position),
+                })
+                self.assertEqual(response.status_code, 404)
+
+    def test_cursor_from_other_ordering(self):
+        response = self.client.get(self.url, {'ordering': 'price'})
+        cursor = get_cursor(response.json()['next'])
+        for ordering in ('uploaded_at', '-price', 'id'):
+            with self.subTest(ordering=ordering):
+                response = self.client.get(
+                    self.url,
+                    {'ordering': ordering, 'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_garbage_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'не курсор'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_count_only_on_request(self):
+        self.assertNotIn('count', self.client.get(self.url).json())
+        response = self.client.get(self.url, {'count': 1})
+        self.assertEqual(response.json()['count'], len(self.parts))
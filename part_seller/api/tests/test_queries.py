@@ -0,0 +1,128 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from parts.models import Favorite, PartImage
+from parts.references import reference_cache
+
+from .base import PartsAPITestCase
+
+
+class QueryBudgetTests(PartsAPITestCase):
+    """
+    Число запросов к БД на эндпоинт не зависит от числа строк на
+    странице. Бюджет считается с прогретыми справочниками и версиями
+    токенов, они живут в процессе дольше запроса; кэш ответов каталога
+    сброшен.
+    """
+    sizes = (1, 10)
+
+    def add_rows(self, count):
+        """count строк каждого вида, у запчастей по две фотографии"""
+        for _ in range(count):
+            live = self.create_part()
+            Favorite.objects.create(user=self.other, part=live)
+            for part in (
+                live,
+                self.create_part(author=self.other, is_approved=False),
+                self.create_part(author=self.other, sold=True),
+            ):
+                PartImage.objects.bulk_create([
+                    PartImage(part=part, image='part_images/front.jpg'),
+                    PartImage(part=part, image='part_images/back.jpg'),
+                ])
+
+    def assertBudget(self, budget, url, user=None):
+        if user is not None:
+            self.authenticate(user)
+        added = 0
+        for size in self.sizes:
+            self.add_rows(size - added)
+            added = size
+            self.client.get(url)
+            cache.clear()
+            reference_cache.get_snapshot()
+            with self.subTest(rows=size), self.assertNumQueries(budget):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['result']), size)
+
+    def test_part_list(self):
+        # + версия каталога для ключа кэша ответов
+        self.assertBudget(3, reverse('part-list'))
+
+    def test_part_list_authenticated(self):
+        # is_favorited - EXISTS в том же запросе
+        self.assertBudget(2, reverse('part-list'), self.other)
+
+    def test_user_parts(self):
+        # + проверка, что пользователь существует
+        self.assertBudget(3, reverse('user-parts', args=[self.author.pk]))
+
+    def test_user_parts_author(self):
+        self.assertBudget(
+            2,
+            reverse('user-parts', args=[self.author.pk]),
+            self.author
+        )
+
+    def test_moderation_list(self):
+        # Модератор из БД (доступ по роли), COUNT пагинатора и страница
+        self.assertBudget(3, reverse('moderation-list'), self.moder)
+
+    def test_favorites(self):
+        self.assertBudget(2, reverse('favorites-list'), self.other)
+
+    def test_part_detail(self):
+        part = self.create_part()
+        PartImage.objects.create(part=part, image='part_images/front.jpg')
+        url = reverse('part-detail', args=[part.pk])
+        for user in (None, self.other, self.author):
+            with self.subTest(user=user):
+                self.client.credentials()
+                if user is not None:
+                    self.authenticate(user)
+                self.client.get(url)
+                cache.clear()
+                reference_cache.get_snapshot()
+                # Запчасть со справочниками и фотографии
+                with self.assertNumQueries(2):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_part_detail_not_modified(self):
+        part = self.create_part()
+        url = reverse('part-detail', args=[part.pk])
+        etag = self.client.get(url)['ETag']
+        cache.clear()
+        reference_cache.get_snapshot()
+        # Только запчасть для штампа, фотографии не нужны
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_part_update(self):
+        part = self.create_part()
+        url = reverse('part-detail', args=[part.pk])
+        self.authenticate(self.author)
+        self.client.get(url)
+        for size in self.sizes:
+            PartImage.objects.bulk_create(
+                PartImage(part=part, image='part_images/front.jpg')
+                for _ in range(size)
+            )
+            reference_cache.get_snapshot()
+            # Пользователь, запчасть, фотографии; в транзакции - блокировка
+            # лимита автора и UPDATE
+            with self.subTest(images=size), self.assertNumQueries(7):
+                response = self.client.patch(
+                    url, {'price': '1500.00'}, format='json'
+                )
+            self.assertEqual(response.status_code, 200)
+
+    def test_user_parts_other_user(self):
+        # Чужой профиль: + проверка, что пользователь существует
+        self.assertBudget(
+            3,
+            reverse('user-parts', args=[self.author.pk]),
+            self.other
+        )
@@ -0,0 +1,96 @@
+from django.contrib.admin import site
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from parts import quota
+from parts.admin import PartAdmin
+from parts.models import Part
+
+from .base import PartsAPITestCase
+
+
+@override_settings(COUNT_OF_POSTS=2)
+class QuotaTests(PartsAPITestCase):
+    """Счетчик активных запчастей автора и лимит COUNT_OF_POSTS"""
+
+    def assertCount(self, user, expected):
+        user.refresh_from_db()
+        self.assertEqual(user.active_parts_count, expected)
+
+    def set_count(self, user, count):
+        type(user).objects.filter(pk=user.pk).update(active_parts_count=count)
+
+    def test_acquire_limit(self):
+        self.set_count(self.author, 1)
+        quota.acquire(self.author.pk)
+        self.assertCount(self.author, 2)
+        with self.assertRaises(quota.PartLimitExceeded):
+            quota.acquire(self.author.pk)
+        self.assertCount(self.author, 2)
+        # Модератор может превысить лимит
+        quota.acquire(self.author.pk, enforce=False)
+        self.assertCount(self.author, 3)
+
+    def test_release(self):
+        self.set_count(self.author, 1)
+        quota.release(self.author.pk)
+        self.assertCount(self.author, 0)
+        # Ниже нуля счетчик не уходит
+        quota.release(self.author.pk)
+        self.assertCount(self.author, 0)
+
+    def test_recount(self):
+        self.create_part()
+        self.create_part()
+        self.create_part(sold=True)
+        self.create_part(is_visible=False)
+        self.create_part(author=self.other)
+        self.set_count(self.other, 5)
+        self.assertEqual(quota.recount(), 2)
+        self.assertCount(self.author, 2)
+        self.assertCount(self.other, 1)
+        self.assertEqual(quota.recount(), 0)
+
+    def patch(self, part, **data):
+        return self.client.patch(
+            reverse('part-detail', args=[part.pk]),
+            data,
+            format='json'
+        )
+
+    def test_restore_and_sell(self):
+        part = self.create_part(sold=True)
+        self.authenticate(self.author)
+        # Повторное восстановление не занимает место второй раз
+        for _ in range(2):
+            self.assertEqual(self.patch(part, sold=False).status_code, 200)
+            self.assertCount(self.author, 1)
+        for _ in range(2):
+            self.assertEqual(self.patch(part, sold=True).status_code, 200)
+            self.assertCount(self.author, 0)
+        self.assertEqual(quota.recount(), 0)
+
+    def test_restore_over_limit(self):
+        self.create_part()
+        self.create_part()
+        part = self.create_part(sold=True)
+        quota.recount()
+        self.authenticate(self.author)
+        self.assertEqual(self.patch(part, sold=False).status_code, 400)
+        part.refresh_from_db()
+        self.assertTrue(part.sold)
+        self.assertCount(self.author, 2)
+        # Остальные правки проданной запчасти лимит не проверяют
+        self.assertEqual(self.patch(part, price='900.00').status_code, 200)
+        self.assertEqual(quota.recount(), 0)
+
+    def test_admin_save(self):
+        # Форма админки уже применена к объекту до блокировки строки
+        part = self.create_part()
+        quota.recount()
+        part.sold = True
+        request = RequestFactory().post('/')
+        PartAdmin(Part, site).save_model(request, part, None, True)
+        part.refresh_from_db()
+        self.assertTrue(part.sold)
+        self.assertCount(self.author, 0)
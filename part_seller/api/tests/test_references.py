@@ -0,0 +1,59 @@
+from django.urls import reverse
+
+from parts.models import Mark, Model
+from parts.references import reference_cache
+
+from .base import PartsAPITestCase
+
+
+class ReferenceCacheTests(PartsAPITestCase):
+    """
+    Справочник, созданный в другом процессе, доступен до сброса версии.
+    TestCase не выполняет on_commit, поэтому версия в кэше не меняется,
+    как у воркера, который не видит LocMem другого процесса.
+    """
+
+    def setUp(self):
+        super().setUp()
+        reference_cache.get_snapshot()
+
+    def create_new_model(self):
+        mark = Mark.objects.create(name='Нива', producer_country_name='Россия')
+        return mark, Model.objects.create(name='Тревел', mark=mark)
+
+    def test_known_names_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(reference_cache.get_by_name('mark', 'лада'), self.mark)
+            self.assertEqual(reference_cache.get('model', self.model.pk), self.model)
+
+    def test_unknown_name_one_query(self):
+        # Без перечитывания снимка: объекта нет и в БД
+        with self.assertNumQueries(1):
+            self.assertIsNone(reference_cache.get_by_name('mark', 'Нет такой'))
+        with self.assertNumQueries(1):
+            self.assertIsNone(reference_cache.get('mark', 10 ** 6))
+
+    def test_created_elsewhere(self):
+        mark, model = self.create_new_model()
+        # Проверка по БД и перечитывание четырех справочников
+        with self.assertNumQueries(5):
+            self.assertEqual(reference_cache.get_by_name('mark', 'НИВА'), mark)
+        with self.assertNumQueries(0):
+            self.assertEqual(reference_cache.get('model', model.pk), model)
+
+    def test_create_part_with_new_reference(self):
+        mark, model = self.create_new_model()
+        self.authenticate(self.author)
+        response = self.client.post(reverse('part-list'), {
+            'name': 'Поршень',
+            'description': 'Поршень в сборе',
+            'mark': mark.name,
+            'model': model.name,
+            'category': self.category.name,
+            'location': self.location.name,
+            'price': '1000.00',
+            'json_data': {'color': 'черный'},
+            'contact': '89990000000',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['mark']['name'], 'Нива')
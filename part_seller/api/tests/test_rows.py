@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import FavoriteSerializer, PartSerializer
+from parts.models import Favorite, Part, PartImage
+
+from .base import PartsAPITestCase
+
+
+class RowMapperParityTests(PartsAPITestCase):
+    """
+    Список и избранное собираются api.rows без сериалайзеров, ответ
+    должен совпадать с PartSerializer и FavoriteSerializer поле в поле
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.plain = cls.create_part()
+        cls.without_category = cls.create_part(
+            category=None,
+            price=Decimal('0.50'),
+            json_data={'color': 'серебристый', 'is_new_part': False},
+        )
+        cls.with_images = cls.create_part(
+            author=cls.other,
+            name='Фара «левая»',
+            price=Decimal('123456.78'),
+        )
+        PartImage.objects.bulk_create([
+            PartImage(
+                part=cls.with_images,
+                image='part_images/front.jpg',
+                thumbnail='part_images/thumbnails/front.jpg',
+                thumbnail_webp='part_images/thumbnails/front.webp',
+            ),
+            # Миниатюры еще не готовы
+            PartImage(part=cls.with_images, image='part_images/back.jpg'),
+        ])
+        Favorite.objects.create(user=cls.other, part=cls.with_images)
+        Favorite.objects.create(user=cls.other, part=cls.without_category)
+
+    def render(self, data):
+        """Сравниваем то, что уходит клиенту: JSON рендерера DRF"""
+        return JSONRenderer().render(data)
+
+    def get_request(self, user=None):
+        request = Request(APIRequestFactory().get('/'))
+        if user is not None:
+            request.user = user
+        return request
+
+    def get_page(self, user=None):
+        self.client.credentials()
+        if user is not None:
+            self.authenticate(user)
+        response = self.client.get(reverse('part-list'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['result']
+
+    def assertParity(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for actual_item, expected_item in zip(actual, expected):
+            # Тот же порядок ключей, те же значения и типы после JSON
+            self.assertEqual(self.render(actual_item), self.render(expected_item))
+
+    def serialize_parts(self, ids, user=None):
+        request = self.get_request(user)
+        parts = Part.objects.with_related().with_favorited(request.user)
+        parts = sorted(parts.filter(pk__in=ids), key=lambda part: ids.index(part.pk))
+        return PartSerializer(parts, many=True, context={'request': request}).data
+
+    def test_part_list_anonymous(self):
+        page = self.get_page()
+        self.assertEqual(len(page), 3)
+        self.assertParity(page, self.serialize_parts([part['id'] for part in page]))
+
+    def test_part_list_authenticated(self):
+        page = self.get_page(self.other)
+        self.assertEqual(
+            sorted(part['id'] for part in page if part['is_favorited']),
+            sorted([self.with_images.pk, self.without_category.pk])
+        )
+        self.assertParity(
+            page,
+            self.serialize_parts([part['id'] for part in page], self.other)
+        )
+
+    def test_favorites(self):
+        self.authenticate(self.other)
+        response = self.client.get(reverse('favorites-list'))
+        self.assertEqual(response.status_code, 200)
+        page = response.json()['result']
+        self.assertEqual(len(page), 2)
+        favorites = {
+            favorite.part_id: favorite
+            for favorite in Favorite.objects.filter(user=self.other)
+        }
+        expected = FavoriteSerializer(
+            [favorites[favorite['part']['id']] for favorite in page],
+            many=True,
+            context={'request': self.get_request(self.other)}
+        ).data
+        self.assertParity(page, expected)
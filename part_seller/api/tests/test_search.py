@@ -0,0 +1,70 @@
+from django.urls import reverse
+
+from api.filters import PartFilter
+from parts.models import Part
+
+from .base import PartsAPITestCase
+
+
+class FullTextSearchTests(PartsAPITestCase):
+    """Поиск по нормальным формам слов и сортировка по рангу"""
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def search(self, text, **params):
+        page = self.get_page(reverse('part-list'), {'search': text, **params})
+        return [part['id'] for part in page['result']]
+
+    def test_word_forms(self):
+        shock = self.create_part(
+            name='Амортизатор задний',
+            description='Без подтеков'
+        )
+        self.create_part(name='Амортизатор передний', description='Без подтеков')
+        self.create_part(name='Фара задняя', description='Без сколов')
+        self.assertEqual(self.search('амортизаторы задние'), [shock.pk])
+        self.assertEqual(sorted(self.search('АМОРТИЗАТОРОВ')), sorted(
+            Part.objects.filter(name__startswith='Амортизатор')
+            .values_list('id', flat=True)
+        ))
+
+    def test_rank_ordering(self):
+        # Слово в названии и описании весит больше, чем только в описании
+        weak = self.create_part(name='Фара', description='Подходит генератор')
+        strong = self.create_part(
+            name='Генератор',
+            description='Генератор в сборе, генератор исправен'
+        )
+        self.assertEqual(self.search('генератор'), [strong.pk, weak.pk])
+        # Явная сортировка заменяет ранг
+        self.assertEqual(
+            self.search('генератор', ordering='id'),
+            [weak.pk, strong.pk]
+        )
+
+    def test_rank_cursor(self):
+        # Больше страницы, ранги разные и совпадающие
+        for number in range(25):
+            self.create_part(
+                name='Стартер' if number % 3 else 'Стартер стартер',
+                description=' '.join(['стартер'] * (number % 4)) or 'Исправен'
+            )
+        # Равный ранг KeysetPaginator разрешает id в том же направлении
+        expected = list(PartFilter(
+            {'search': 'стартер'},
+            queryset=Part.objects.all()
+        ).qs.order_by('-rank', '-id').values_list('id', flat=True))
+        self.assertEqual(len(expected), 25)
+        pages = [self.get_page(reverse('part-list'), {'search': 'стартер'})]
+        while pages[-1]['next'] is not None:
+            pages.append(self.get_page(pages[-1]['next']))
+        ids = [part['id'] for page in pages for part in page['result']]
+        self.assertEqual(ids, expected)
+        # И обратно по previous
+        page = pages[-1]
+        for expected_page in reversed(pages[:-1]):
+            page = self.get_page(page['previous'])
+            self.assertEqual(page['result'], expected_page['result'])
@@ -0,0 +1,108 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import AnonSlidingWindowThrottle, SlidingWindowStore
+
+# Начало окна, чтобы смещения в тестах были точными
+BASE = 1000 * 60.0
+
+
+class SlidingWindowStoreTests(SimpleTestCase):
+    """Счетчики скользящего окна: 3 запроса за 60 секунд"""
+    limit = 3
+    duration = 60
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'throttle.sqlite3')
+        with override_settings(THROTTLE_STORE_PATH=path):
+            self.store = SlidingWindowStore(settings.THROTTLE_STORE_PATH)
+        self.addCleanup(lambda: self.store.connection.close())
+
+    def hit(self, now, key='user_1'):
+        return self.store.hit(key, self.limit, self.duration, now)
+
+    def test_limit(self):
+        for _ in range(self.limit):
+            self.assertEqual(self.hit(BASE + 10), (True, None))
+        # Текущее окно заполнено: ждать его конца и еще долю следующего
+        self.assertEqual(self.hit(BASE + 10), (False, 50.0))
+        # Отказ не засчитывается, другие ключи не затронуты
+        self.assertEqual(self.hit(BASE + 10)[1], 50.0)
+        self.assertEqual(self.hit(BASE + 10, 'user_2'), (True, None))
+
+    def test_window_boundary(self):
+        for _ in range(self.limit):
+            self.hit(BASE + 59)
+        # Предыдущее окно целиком в оценке на границе нового
+        self.assertFalse(self.hit(BASE + 60)[0])
+        # Через секунду его вес 59/60, место для одного запроса
+        self.assertEqual(self.hit(BASE + 61), (True, None))
+        allowed, wait = self.hit(BASE + 61)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 19.0)
+        # Через wait секунд оценка опускается ниже лимита
+        self.assertFalse(self.hit(BASE + 61 + wait - 0.01)[0])
+        self.assertTrue(self.hit(BASE + 61 + wait + 0.01)[0])
+
+    def test_expired_windows(self):
+        for _ in range(self.limit):
+            self.hit(BASE)
+        # Через окно без запросов старые счетчики не учитываются
+        for _ in range(self.limit):
+            self.assertEqual(self.hit(BASE + 2 * self.duration), (True, None))
+
+    def count_rows(self):
+        return self.store.connection.execute(
+            'SELECT count(*) FROM throttle'
+        ).fetchone()[0]
+
+    def test_hit_prunes_expired(self):
+        self.store.cleanup_every = 2
+        self.hit(BASE, 'user_1')
+        self.hit(BASE + 60, 'user_2')
+        self.assertEqual(self.count_rows(), 2)
+        # Ключ user_1 истек в конце окна, следующего за его окном
+        self.hit(BASE + 2 * self.duration + 1, 'user_3')
+        self.hit(BASE + 2 * self.duration + 1, 'user_3')
+        self.assertEqual(
+            [key for key, in self.store.connection.execute(
+                'SELECT key FROM throttle ORDER BY key'
+            )],
+            ['user_2', 'user_3']
+        )
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = SlidingWindowStore(
+            os.path.join(directory.name, 'throttle.sqlite3')
+        )
+        self.addCleanup(lambda: store.connection.close())
+        self.throttle_class = type('Throttle', (AnonSlidingWindowThrottle,), {
+            'rate': '2/min',
+            'store': store,
+        })
+
+    def allow(self, now):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = AnonymousUser()
+        throttle = self.throttle_class()
+        throttle.timer = lambda: now
+        return throttle.allow_request(request, None), throttle.wait()
+
+    def test_wait(self):
+        self.assertEqual(self.allow(BASE), (True, None))
+        self.assertEqual(self.allow(BASE + 15), (True, None))
+        # Retry-After до конца текущего окна
+        self.assertEqual(self.allow(BASE + 15), (False, 45.0))
@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import (AnonRateThrottle, SimpleRateThrottle,
+                                       UserRateThrottle)
+
+UPSERT = (
+    'INSERT INTO throttle (key, window, current, previous, expires) '
+    'VALUES (?, ?, ?, ?, ?) '
+    'ON CONFLICT (key) DO UPDATE SET window = excluded.window, '
+    'current = excluded.current, previous = excluded.previous, '
+    'expires = excluded.expires'
+)
+
+
+class SlidingWindowStore:
+    """
+    Счетчики скользящего окна в файле SQLite, общем для всех воркеров узла.
+
+    На ключ одна строка: номер текущего окна фиксированной длины и число
+    запросов в нем и в предыдущем. Оценка за последние duration секунд -
+    предыдущее окно с весом его оставшейся доли плюс текущее. Проверка -
+    SELECT и UPSERT по первичному ключу, сколько бы запросов ни было в
+    лимите, вместо списка меток времени в кэше у SimpleRateThrottle.
+    """
+    # Раз в столько записей процесс удаляет истекшие ключи
+    cleanup_every = 10000
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.writes = 0
+
+    @property
+    def connection(self):
+        # Свое соединение на поток и на процесс, после fork старое не годится
+        local = self.local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection = self.connect()
+            local.pid = os.getpid()
+        return local.connection
+
+    def connect(self):
+        connection = sqlite3.connect(
+            self.path,
+            timeout=5,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        # WAL: читатели не ждут писателя. Счетчики не переживут сбой ОС,
+        # для лимитов это допустимо, зато нет fsync на каждый запрос
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=OFF')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS throttle ('
+            'key TEXT PRIMARY KEY, '
+            'window INTEGER NOT NULL, '
+            'current INTEGER NOT NULL, '
+            'previous INTEGER NOT NULL, '
+            'expires REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS throttle_expires ON throttle (expires)'
+        )
+        return connection
+
+    @staticmethod
+    def roll(row, window):
+        """(current, previous) для окна window по сохраненной строке"""
+        if row is None or row[0] < window - 1:
+            return 0, 0
+        if row[0] == window - 1:
+            return 0, row[1]
+        return row[1], row[2]
+
+    @staticmethod
+    def get_wait(current, previous, limit, duration, offset):
+        """Секунд до момента, когда оценка опустится ниже limit"""
+        if current < limit:
+            # Ждем, пока уменьшится вес предыдущего окна
+            return max(0.0, duration * (1 - (limit - current) / previous) - offset)
+        # Текущее окно заполнено, в следующем оно станет предыдущим
+        return duration - offset + duration * (1 - limit / current)
+
+    def hit(self, key, limit, duration, now=None):
+        """
+        Засчитать запрос, если он укладывается в limit за duration секунд.
+        Возвращает (разрешен, секунд до следующей попытки или None).
+        """
+        now = time.time() if now is None else now
+        window, offset = divmod(now, duration)
+        window = int(window)
+        connection = self.connection
+        # IMMEDIATE: чтение и запись счетчика атомарны между процессами
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT window, current, previous FROM throttle WHERE key = ?',
+                (key,)
+            ).fetchone()
+            current, previous = self.roll(row, window)
+            allowed = previous * (1 - offset / duration) + current < limit
+            if allowed:
+                connection.execute(UPSERT, (
+                    key, window, current + 1, previous, (window + 2) * duration
+                ))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        if allowed:
+            self.writes += 1
+            if self.writes % self.cleanup_every == 0:
+                self.cleanup(now)
+            return True, None
+        return False, self.get_wait(current, previous, limit, duration, offset)
+
+    def cleanup(self, now=None):
+        now = time.time() if now is None else now
+        self.connection.execute('DELETE FROM throttle WHERE expires < ?', (now,))
+
+
+throttle_store = SlidingWindowStore(settings.THROTTLE_STORE_PATH)
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle со счетчиками в throttle_store.
+    Ставки (scope, DEFAULT_THROTTLE_RATES) и ключи get_cache_key те же,
+    лимит общий для всех воркеров узла.
+    """
+    store = throttle_store
+    wait_time = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.wait_time = self.store.hit(
+            self.key,
+            self.num_requests,
+            self.duration,
+            self.timer()
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class AnonSlidingWindowThrottle(SlidingWindowRateThrottle, AnonRateThrottle):
+    """Лимит анонимных запросов по IP"""
+
+
+class UserSlidingWindowThrottle(SlidingWindowRateThrottle, UserRateThrottle):
+    """Лимит запросов по пользователю, для анонимных - по IP"""
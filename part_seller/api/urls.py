@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.urls import include, path
 from django.views.generic import TemplateView
 from rest_framework import routers
 
-from .views import (CategoryViewSet, LocationViewSet, MarkViewSet,
+from .views import (CatalogCacheStatsView, CategoryViewSet,
+                    DatabasePoolStatsView, LocationViewSet, MarkViewSet,
                     ModelViewSet, ModeratorViewSet, PartViewSet,
                     UserDetailView, UserPartsListView, FavoriteViewSet)
 
@@ -25,5 +27,46 @@ urlpatterns = [
         UserPartsListView.as_view(),
         name='user-parts'
     ),
+    path(
+        'v1/db/pool/',
+        DatabasePoolStatsView.as_view(),
+        name='db-pool-stats'
+    ),
+    path(
+        'v1/cache/catalog/',
+        CatalogCacheStatsView.as_view(),
+        name='catalog-cache-stats'
+    ),
     path('docs/', TemplateView.as_view(template_name='swagger_ui.html'), name='swagger-ui')
 ]
+
+if settings.ASYNC_VIEWS:
+    from .async_views import (AsyncPartDetailView, AsyncPartListView,
+                              AsyncReferenceListView, AsyncUserPartsListView)
+
+    # Те же вьюхи, что обслуживает роутер, для методов кроме GET
+    sync_views = {url.name: url.callback for url in router_v1.urls if url.name}
+    # Раньше роутера: GET горячих эндпоинтов асинхронно
+    urlpatterns = [
+        path(
+            'v1/part/',
+            AsyncPartListView.as_view(sync_view=sync_views['part-list'])
+        ),
+        path(
+            'v1/part/<int:pk>/',
+            AsyncPartDetailView.as_view(sync_view=sync_views['part-detail'])
+        ),
+        *(
+            path(
+                f'v1/{prefix}/',
+                AsyncReferenceListView.as_view(
+                    sync_view=sync_views[f'{prefix}-list']
+                )
+            )
+            for prefix in ('mark', 'model', 'location', 'category')
+        ),
+        path(
+            'v1/user/<int:pk>/parts/',
+            AsyncUserPartsListView.as_view(sync_view=UserPartsListView.as_view())
+        ),
+    ] + urlpatterns
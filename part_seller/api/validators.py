@@ -5,6 +5,8 @@ from PIL import Image
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from .automaton import PatternAutomaton
+
 CONFUSABLE = "This name cannot be registered. Please choose a different name."
 CONFUSABLE_EMAIL = "This email address cannot be registered. Please supply a different email address."
 RESERVED_NAME = "This name is reserved and cannot be registered."
@@ -201,12 +203,14 @@ def validate_image(image):
     if image.size > max_size_kb * 1024:
         raise ValidationError(f"Размер файла не должен превышать {max_size_kb} KB (2 MB).")
 
-    # Проверка типа файла
+    # Проверка структуры файла до ответа клиенту, без декодирования
+    # пикселей. Миниатюры создаются в фоне (parts.images)
     try:
-        img = Image.open(image)
-        img.verify()  # Проверяет, является ли файл изображением
-    except (IOError, SyntaxError):
+        Image.open(image).verify()
+    except (IOError, SyntaxError, ValueError, Image.DecompressionBombError):
         raise ValidationError("Загружаемый файл должен быть изображением.")
+    finally:
+        image.seek(0)
 
 
 class RegexpProc(object):
@@ -250,13 +254,18 @@ class RegexpProc(object):
     ))
 
     regexp = re.compile(PATTERN_1, re.U | re.I)
+    # Та же регулярка без возвратов, для проверки текста при записи
+    automaton = PatternAutomaton(PATTERN_1, re.U | re.I)
 
     @staticmethod
     def test(text):
-        return bool(RegexpProc.regexp.findall(text))
+        return RegexpProc.automaton.search(text)
 
     @staticmethod
     def replace(text, repl='[censored]'):
+        # Границы замены задает регулярка, чистый текст ее не запускает
+        if not RegexpProc.test(text):
+            return text
         return RegexpProc.regexp.sub(repl, text)
 
     @staticmethod
@@ -266,7 +275,7 @@ class RegexpProc(object):
         for word in re.findall(word_pattern, text):
             if len(word) < 3:
                 continue
-            if RegexpProc.regexp.findall(word):
+            if RegexpProc.test(word):
                 words[word] = u'%s%s%s' % (wrap[0], word, wrap[1],)
         for word, wrapped in words.items():
             text = text.replace(word, wrapped)
@@ -1,133 +1,284 @@
+from functools import cached_property
+
 from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import Http404, StreamingHttpResponse
+from django_filters.utils import translate_validation
 from rest_framework import viewsets, status, mixins
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import (
     ListAPIView,
     RetrieveAPIView,
     get_object_or_404
 )
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser
 from rest_framework.response import Response
-from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+from rest_framework.views import APIView
 
+from parts import moderation, pool, quota
+from parts.catalog import bump_catalog_version
+from parts.export import EXPORT_FORMATS, get_export_queryset, iter_export
 from parts.models import (
-    Category, Location, Mark,
+    ARCHIVE_STATUSES, ArchivedPart, Category, Location, Mark,
     Model, Part, PartImage,
     User, Favorite)
 
+from .authentication import UserJWTAuthentication
+from .cache import catalog_cache
+from .conditional import (ConditionalGetMixin, ReferenceConditionalGetMixin,
+                          part_stamp)
 from .filters import LocationFilter, MarkFilter, ModelFilter, PartFilter
-from .pagination import TenOnPagePaginator
+from .negotiation import IgnoreClientContentNegotiation
+from .pagination import KeysetPaginator, TenOnPagePaginator
 from .permissions import IsAuthorOrReadOnly, IsModerOnly, IsAuthorOnly
+from .rows import favorite_part_rows, part_rows
 from .serializers import (AuthorPartSerializer, CategorySerializer,
                           LocationSerializer, MarkSerializer, ModelSerializer,
-                          ModerPartSerializer, PartSerializer, UserSerializer, FavoriteSerializer)
+                          ModerPartSerializer, ModerationClaimSerializer,
+                          ModerationDecisionSerializer, PartSerializer,
+                          UserSerializer, FavoriteSerializer)
+from .throttling import AnonSlidingWindowThrottle, UserSlidingWindowThrottle
 from .validators import validate_image
 
 
-class MarkViewSet(viewsets.ReadOnlyModelViewSet):
+def get_catalog_queryset(user):
+    """Опубликованный каталог, общий для синхронных и асинхронных вьюх"""
+    return Part.objects.with_related().with_favorited(user).filter(
+        sold=False,
+        is_visible=True,
+        is_approved=True
+    ).order_by('id')
+
+
+def get_user_parts_queryset(author_id, is_author, user):
+    # Автор при входе в свой профиль видит все свои посты
+    if is_author:
+        return Part.objects.with_related().filter(
+            author_id=author_id,
+            is_visible=True
+        ).order_by('id')
+    return Part.objects.with_related().with_favorited(user).filter(
+        author_id=author_id,
+        is_visible=True,
+        is_approved=True
+    )
+
+
+def get_archive_queryset(request):
+    """Проданные и удаленные запчасти, ?status= сужает до одного статуса"""
+    archive_status = request.query_params.get('status')
+    if archive_status is not None and archive_status not in ARCHIVE_STATUSES:
+        raise ValidationError(
+            {'status': f'Допустимые статусы: {", ".join(ARCHIVE_STATUSES)}'}
+        )
+    queryset = ArchivedPart.objects.select_related(
+        'model', 'mark', 'location', 'category', 'author'
+    )
+    if archive_status is not None:
+        queryset = queryset.filter(ARCHIVE_STATUSES[archive_status])
+    return queryset.order_by('id')
+
+
+class MarkViewSet(ReferenceConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для марки"""
     queryset = Mark.objects.filter(is_visible=True).order_by('id')
     permission_classes = (IsAuthorOrReadOnly,)
     serializer_class = MarkSerializer
     pagination_class = TenOnPagePaginator
-    throttle_classes = (AnonRateThrottle, UserRateThrottle)
+    throttle_classes = (AnonSlidingWindowThrottle, UserSlidingWindowThrottle)
+    stamp_models = (Mark,)
     filterset_class = MarkFilter
 
 
-class ModelViewSet(viewsets.ReadOnlyModelViewSet):
+class ModelViewSet(ReferenceConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для модели"""
     queryset = Model.objects.select_related('mark').filter(is_visible=True).order_by('id')
     permission_classes = (IsAuthorOrReadOnly,)
     serializer_class = ModelSerializer
     pagination_class = TenOnPagePaginator
-    throttle_classes = (AnonRateThrottle, UserRateThrottle)
+    throttle_classes = (AnonSlidingWindowThrottle, UserSlidingWindowThrottle)
+    stamp_models = (Model, Mark)
     filterset_class = ModelFilter
 
 
-class LocationViewSet(viewsets.ReadOnlyModelViewSet):
+class LocationViewSet(ReferenceConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для локации"""
     queryset = Location.objects.filter(is_visible=True).order_by('id')
     permission_classes = (IsAuthorOrReadOnly,)
     serializer_class = LocationSerializer
     pagination_class = TenOnPagePaginator
-    throttle_classes = (AnonRateThrottle, UserRateThrottle)
+    throttle_classes = (AnonSlidingWindowThrottle, UserSlidingWindowThrottle)
+    stamp_models = (Location,)
     filterset_class = LocationFilter
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ReferenceConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для категории"""
     queryset = Category.objects.filter(is_visible=True).order_by('id')
     permission_classes = (IsAuthorOrReadOnly,)
     pagination_class = TenOnPagePaginator
-    throttle_classes = (AnonRateThrottle, UserRateThrottle)
+    throttle_classes = (AnonSlidingWindowThrottle, UserSlidingWindowThrottle)
+    stamp_models = (Category,)
     serializer_class = CategorySerializer
 
 
-class PartViewSet(viewsets.ModelViewSet):
+class PartViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Вьюсет для запчасти"""
     permission_classes = (IsAuthorOrReadOnly,)
-    pagination_class = TenOnPagePaginator
-    throttle_classes = (AnonRateThrottle, UserRateThrottle)
+    pagination_class = KeysetPaginator
+    throttle_classes = (AnonSlidingWindowThrottle, UserSlidingWindowThrottle)
     filterset_class = PartFilter
+    export_content_types = {
+        'ndjson': 'application/x-ndjson; charset=utf-8',
+        'csv': 'text/csv; charset=utf-8',
+    }
 
     def perform_create(self, serializer):
         author = self.request.user
-        self.check_count_of_parts()
-        part = serializer.save(author=author)
-        if images := self.request.FILES.getlist('images'):
-            for image in images[:settings.COUNT_OF_IMAGES]:
-                validate_image(image)
+        images = self.request.FILES.getlist('images')[:settings.COUNT_OF_IMAGES]
+        for image in images:
+            validate_image(image)
+        with transaction.atomic():
+            self.check_count_of_parts(
+                False,
+                not serializer.validated_data.get('sold', False)
+            )
+            part = serializer.save(author=author)
+            # Миниатюры создаются в фоне, см. parts.images
+            for image in images:
                 PartImage.objects.create(part=part, image=image)
 
     def perform_destroy(self, instance):
-        # Не удаляем что бы не блокировать бд
-        instance.is_visible = False
-        instance.save()
+        # Не удаляем: запчасть уходит в архив, см. ArchivedPart
+        with transaction.atomic():
+            was_active = quota.lock_active(instance)
+            instance.is_visible = False
+            instance.save()
+            quota.update_counter(instance.author_id, was_active, False)
+        bump_catalog_version()
         return Response({'detail': 'Запись удалена'}, status=status.HTTP_204_NO_CONTENT)
 
     def perform_update(self, serializer):
-        self.check_count_of_parts()
-        # Каждая запчасть при редактировании должна проходить модерацию
-        serializer.save(
-            is_approved=False,
-            moder_checked=False
+        with transaction.atomic():
+            was_active = quota.lock_active(serializer.instance)
+            # Каждая запчасть при редактировании должна проходить модерацию
+            part = serializer.save(
+                is_approved=False,
+                moder_checked=False
+            )
+            # Лимит проверяется только если запчасть снята с продажи
+            self.check_count_of_parts(was_active, quota.is_active(part))
+        # Запчасть ушла на модерацию или продана
+        bump_catalog_version()
+
+    def list(self, request, *args, **kwargs):
+        # Анонимный каталог одинаков для всех, отдаем из кэша
+        if request.user.is_authenticated:
+            return self.list_rows(request)
+        return catalog_cache.get_response(
+            request,
+            lambda: self.list_rows(request)
         )
 
+    def list_rows(self, request):
+        """Список без PartSerializer, вывод тот же, см. api.rows"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(part_rows.values(queryset))
+        return self.get_paginated_response(part_rows.map(page, request))
+
+    @cached_property
+    def part(self):
+        """Запчасть из URL, выбирается один раз на весь запрос"""
+        return get_object_or_404(
+            Part.objects.with_related(images=False).with_favorited(
+                self.request.user
+            ),
+            pk=self.kwargs['pk'],
+            is_visible=True
+        )
+
+    @property
+    def is_author(self):
+        return self.part.author_id == self.request.user.id
+
+    def get_version_stamp(self, request, *args, **kwargs):
+        # Только карточка запчасти: своя версия и версии справочников в ней
+        if 'pk' not in kwargs:
+            return None
+        part = self.part
+        if not (part.is_approved or self.is_author):
+            return None
+        return part_stamp(part, self.is_author)
+
+    def get_object(self):
+        part = self.part
+        # Не опубликованый пост видит только автор,
+        # удалять и изменять можно и не прошедшие модерацию
+        if self.request.method in SAFE_METHODS and not (
+            part.is_approved or self.is_author
+        ):
+            raise Http404
+        self.check_object_permissions(self.request, part)
+        if self.request.method != 'DELETE':
+            prefetch_related_objects([part], 'images')
+        return part
+
     def get_serializer_class(self):
-        try:
-            part = Part.objects.get(pk=self.kwargs.get('pk'))
-        except Part.DoesNotExist:
-            part = None
-        if part and self.request.user == part.author:
+        if 'pk' in self.kwargs and self.is_author:
             return AuthorPartSerializer
         return PartSerializer
 
     def get_queryset(self):
-        """Получение кверисета в зависимости от разрешений"""
+        """Опубликованный каталог, карточку выбирает get_object"""
+        return get_catalog_queryset(self.request.user)
 
-        # Что бы можно было удалять все посты, даже не прошедшие модерацию
-        if self.request.method in ('DELETE', 'PATCH', 'PUT'):
-            return Part.objects.filter(
-                pk=self.kwargs['pk'],
-                is_visible=True
+    @action(
+        detail=False,
+        content_negotiation_class=IgnoreClientContentNegotiation
+    )
+    def export(self, request):
+        """Потоковая выгрузка каталога в NDJSON или CSV, фильтры как у списка"""
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {'output': f'Допустимые форматы: {", ".join(EXPORT_FORMATS)}'}
             )
-        # Не опубликованый пост видит только автор
-        if pk := self.kwargs.get('pk'):
-            part = Part.objects.filter(pk=pk, is_visible=True)
-            if part.first().author == self.request.user:
-                return part
-            return part.filter(is_approved=True)
-
-        return Part.objects.filter(
-            sold=False,
-            is_visible=True,
-            is_approved=True
-        ).order_by('id')
+        filterset = PartFilter(
+            request.query_params,
+            queryset=get_export_queryset()
+        )
+        # Как у списка: неверный фильтр - 400, а не весь каталог
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        response = StreamingHttpResponse(
+            iter_export(export_format, filterset.qs),
+            content_type=self.export_content_types[export_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="parts.{export_format}"'
+        )
+        return response
 
-    def check_count_of_parts(self):
-        """Проверка колличествa постов у автора."""
-        author = self.request.user
-        post_count = author.user_parts.filter(is_visible=True, sold=False).count()
-        if post_count >= settings.COUNT_OF_POSTS:
+    @action(detail=False, permission_classes=(IsAuthorOnly,))
+    def archive(self, request):
+        """Проданные и удаленные запчасти автора"""
+        page = self.paginate_queryset(
+            get_archive_queryset(request).filter(author=request.user)
+        )
+        serializer = AuthorPartSerializer(
+            page,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    def check_count_of_parts(self, was_active, now_active):
+        """Проверка колличествa постов у автора по счетчику в User."""
+        try:
+            quota.update_counter(self.request.user.id, was_active, now_active)
+        except quota.PartLimitExceeded:
             raise ValidationError(
                 F"Вы не можете создать более {settings.COUNT_OF_POSTS} постов."
             )
@@ -142,51 +293,137 @@ class UserDetailView(RetrieveAPIView):
 class UserPartsListView(ListAPIView):
     """Вьюха для просмотра запчастей конкретного пользователя"""
     serializer_class = PartSerializer
-    pagination_class = TenOnPagePaginator
+    pagination_class = KeysetPaginator
     permission_classes = (IsAuthorOrReadOnly,)
 
+    @cached_property
+    def is_author(self):
+        return self.kwargs['pk'] == self.request.user.id
+
     def get_serializer_class(self):
-        try:
-            part = Part.objects.filter(author=self.kwargs['pk']).first()
-        except Part.DoesNotExist:
-            part = None
-        if part and self.request.user == part.author:
+        if self.is_author:
             return AuthorPartSerializer
         return PartSerializer
 
     def get_queryset(self):
-        # Автор при входе в свой профиль видит все свои посты
-        user_id = self.kwargs['pk']
-        user = get_object_or_404(User, pk=user_id)
-        if self.request.user == user:
-            return user.user_parts.filter(is_visible=True).order_by('id')
-        return user.user_parts.filter(
-            is_visible=True,
-            is_approved=True)
+        if not self.is_author:
+            get_object_or_404(User, pk=self.kwargs['pk'])
+        return get_user_parts_queryset(
+            self.kwargs['pk'],
+            self.is_author,
+            self.request.user
+        )
+
+
+class DatabasePoolStatsView(APIView):
+    """Метрики пула соединений с БД процесса, который принял запрос"""
+    authentication_classes = (UserJWTAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(pool.get_pool_stats())
+
+
+class CatalogCacheStatsView(APIView):
+    """Попадания в кэш ответов каталога и текущая версия каталога"""
+    authentication_classes = (UserJWTAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(catalog_cache.stats())
 
 
 class ModeratorViewSet(viewsets.ModelViewSet):
     """Вьюсет для модератора"""
-    queryset = Part.objects.filter(
-        is_approved=False,
-        moder_checked=False,
-        is_visible=True
-    )
     serializer_class = ModerPartSerializer
     pagination_class = TenOnPagePaginator
+    # Доступ по роли: пользователь из БД, а не из claims токена
+    authentication_classes = (UserJWTAuthentication,)
     permission_classes = (IsModerOnly,)
 
+    def get_queryset(self):
+        # Запчасти в аренде у других модераторов не видны и не меняются
+        return moderation.get_queue().with_related(images=False).filter(
+            moderation.free_or_claimed_by(self.request.user)
+        ).order_by('id')
+
+    @action(detail=False, methods=['post'])
+    def claim(self, request):
+        """Взять пачку запчастей из очереди в аренду"""
+        serializer = ModerationClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids, until = moderation.claim(
+            request.user,
+            serializer.validated_data['size']
+        )
+        parts = Part.objects.with_related(images=False).filter(
+            id__in=ids
+        ).order_by('id')
+        return Response({
+            'claimed_until': until,
+            'result': self.get_serializer(parts, many=True).data,
+        })
+
+    @action(detail=False, methods=['post'])
+    def submit(self, request):
+        """Решения по взятым запчастям одним запросом"""
+        serializer = ModerationDecisionSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        decisions = {
+            decision['id']: (decision['is_approved'], decision['moder_comment'])
+            for decision in serializer.validated_data
+        }
+        saved = moderation.submit(request.user, decisions)
+        return Response({
+            'saved': saved,
+            'skipped': sorted(set(decisions) - set(saved)),
+        })
+
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        """Вернуть взятые запчасти в очередь"""
+        return Response({'released': moderation.release(request.user)})
+
+    @action(detail=False)
+    def stats(self, request):
+        """Глубина и возраст очереди, секунды"""
+        return Response(moderation.get_stats())
+
+    @action(detail=False)
+    def archive(self, request):
+        """Проданные и удаленные запчасти всех авторов"""
+        page = self.paginate_queryset(get_archive_queryset(request))
+        return self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
+
     def perform_destroy(self, instance):
-        # Не удаляем что бы не блокировать бд
-        instance.is_visible = False
-        instance.save()
+        # Не удаляем: запчасть уходит в архив, см. ArchivedPart
+        with transaction.atomic():
+            was_active = quota.lock_active(instance)
+            instance.is_visible = False
+            instance.save()
+            quota.update_counter(instance.author_id, was_active, False)
+        bump_catalog_version()
         return Response({'detail': 'Запись удалена'}, status=status.HTTP_204_NO_CONTENT)
 
     def perform_update(self, serializer):
-        # Автоматически проставляется проверка модератором
-        serializer.save(
-            moder_checked=True
-        )
+        with transaction.atomic():
+            was_active = quota.lock_active(serializer.instance)
+            # Автоматически проставляется проверка модератором
+            part = serializer.save(
+                moder_checked=True,
+                moder_claimed_by=None,
+                moder_claimed_until=None
+            )
+            # Модератор может превысить лимит автора
+            quota.update_counter(
+                part.author_id,
+                was_active,
+                quota.is_active(part),
+                enforce=False
+            )
+        bump_catalog_version()
 
 
 class FavoriteViewSet(mixins.CreateModelMixin,
@@ -196,7 +433,13 @@ class FavoriteViewSet(mixins.CreateModelMixin,
     queryset = Favorite.objects.all()
     serializer_class = FavoriteSerializer
     permission_classes = (IsAuthorOnly,)
-    pagination_class = TenOnPagePaginator
+    pagination_class = KeysetPaginator
+    # id - порядок добавления в избранное
+    keyset_ordering_fields = {
+        'id': 'id',
+        'price': 'part__price',
+        'uploaded_at': 'part__uploaded_at',
+    }
 
     def perform_create(self, serializer):
         part_id = self.request.data['part']
@@ -213,8 +456,26 @@ class FavoriteViewSet(mixins.CreateModelMixin,
             )
         serializer.save(user=self.request.user, part=part)
 
+    def list(self, request, *args, **kwargs):
+        """Избранное без сериалайзера на каждую запчасть, см. api.rows"""
+        page = self.paginate_queryset(favorite_part_rows.values(
+            self.get_queryset(),
+            'id',
+            *self.keyset_ordering_fields.values()
+        ))
+        data = favorite_part_rows.map(page, request)
+        for part in data:
+            part['is_favorited'] = True
+        return self.get_paginated_response([{'part': part} for part in data])
+
     def get_queryset(self):
-        return Favorite.objects.filter(
+        return Favorite.objects.select_related(
+            'part__model',
+            'part__mark',
+            'part__location',
+            'part__category',
+            'part__author'
+        ).prefetch_related('part__images').filter(
             user=self.request.user,
             part__is_visible=True,
             part__is_approved=True
@@ -9,8 +9,10 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+import copy
 import os
 import re
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -37,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'parts.apps.PartsConfig',
     'api.apps.ApiConfig',
     'rest_framework',
@@ -46,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'parts.routers.replica_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,6 +92,53 @@ DATABASES = {
     }
 }
 
+# Пул соединений psycopg3 (parts.pool), свой в каждом процессе: воркеров
+# uvicorn/gunicorn * DB_POOL_MAX_SIZE не больше max_connections Postgres.
+# DB_POOL=0 - постоянные соединения на поток без пула
+DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+if DB_POOL:
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            # Сколько секунд запрос ждет свободное соединение, потом ошибка
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            # Лишние сверх min_size закрываются после простоя, все -
+            # после max_lifetime, что бы не копить память на сервере БД
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+            # SELECT 1 перед выдачей: разорванное соединение не попадет в запрос
+            'check': ConnectionPool.check_connection,
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(
+        os.environ.get('DB_CONN_MAX_AGE', 60)
+    )
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Реплики для чтения (parts.routers): DB_REPLICAS=host[:port],... с теми
+# же NAME/USER/PASSWORD и пулом, что у default. Для проверки локально
+# реплика может указывать на ту же БД: DB_REPLICAS=127.0.0.1
+for number, address in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1
+):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': host,
+        'PORT': int(port or DATABASES['default']['PORT']),
+        # В тестах реплика - та же тестовая БД
+        'TEST': {'MIRROR': 'default'},
+    }
+DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['parts.routers.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной БД
+# (parts.routers.pin), должно быть больше отставания реплик
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -133,6 +184,23 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Версия справочников и ответы каталога хранятся здесь. При
+# нескольких воркерах нужен общий бэкенд (Redis, Memcached), иначе сброс
+# справочников другие процессы увидят по TTL. Версия каталога - в БД
+# (parts.catalog), устаревших ответов каталога не будет и с LocMem
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Счетчики лимитов запросов (api.throttling): файл SQLite, общий для
+# всех воркеров узла. Должен лежать на локальном диске, не на NFS
+THROTTLE_STORE_PATH = os.environ.get(
+    'THROTTLE_STORE_PATH',
+    os.path.join(tempfile.gettempdir(), 'part_seller_throttle.sqlite3')
+)
+
 REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'user': '35/min',
@@ -142,17 +210,17 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        'api.parsers.ORJSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ),
@@ -163,6 +231,9 @@ SIMPLE_JWT = {
 
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Роли и версия пользователя в токене, см. api.authentication
+    'TOKEN_OBTAIN_SERIALIZER': 'api.authentication.UserTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.authentication.UserTokenRefreshSerializer',
 }
 
 DJOSER = {
@@ -174,6 +245,28 @@ DJOSER = {
 
 COUNT_OF_POSTS = 10
 COUNT_OF_IMAGES = 3
+# Фоновая обработка фотографий запчастей
+IMAGE_WORKERS = 2
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_QUALITY = 80
+# Максимальный возраст снимка справочников в памяти процесса, секунд
+REFERENCE_CACHE_TTL = 5 * 60
+# Время жизни ответа каталога для анонимных пользователей, секунд
+CATALOG_CACHE_TTL = 60
+# Очередь модерации: аренда взятых запчастей, секунд, и размер пачки
+MODERATION_LEASE = 15 * 60
+MODERATION_CLAIM_SIZE = 10
+MODERATION_MAX_CLAIM_SIZE = 50
+# Архив: проданные и удаленные запчасти, не менявшиеся столько дней,
+# команда archive_parts переносит из parts_part пачками по столько строк
+ARCHIVE_MOVE_AFTER_DAYS = 30
+ARCHIVE_MOVE_BATCH_SIZE = 1000
+# Сколько секунд процесс доверяет версии токенов пользователя без БД
+USER_CACHE_TTL = 30
+# GET каталога, карточки, справочников и запчастей пользователя через
+# async ORM (api.async_views). Включает part_seller/asgi.py, под WSGI
+# асинхронные вьюхи только добавили бы переход между потоками
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
 PATTERN_CONTACT_PART = re.compile(
     r'^(telegram\s*:?\s*@\w{3,32}|'
     r'whatsapp\s*:?\s*\+?\d{11}|'
@@ -0,0 +1,22 @@
+"""
+Профиль настроек для прода:
+DJANGO_SETTINGS_MODULE=part_seller.settings_production
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    host
+    for host in os.environ.get('ALLOWED_HOSTS', '').split(',')  # noqa: F405
+    if host
+]
+
+# Только JSON, без HTML страниц BrowsableAPIRenderer
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+    ),
+}
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import quota
 from .models import Location, Mark, Model, Part, PartImage, User
 
 
@@ -83,3 +84,24 @@ class PartAdmin(admin.ModelAdmin):
     )
 
     inlines = [PhotoInline]
+
+    # Счетчик активных запчастей автора, лимит админка не проверяет
+    def save_model(self, request, obj, form, change):
+        was_active = change and quota.lock_active(obj)
+        super().save_model(request, obj, form, change)
+        quota.update_counter(
+            obj.author_id,
+            was_active,
+            quota.is_active(obj),
+            enforce=False
+        )
+
+    def delete_model(self, request, obj):
+        was_active = quota.lock_active(obj)
+        super().delete_model(request, obj)
+        quota.update_counter(obj.author_id, was_active, False)
+
+    def delete_queryset(self, request, queryset):
+        authors = set(queryset.values_list('author_id', flat=True))
+        super().delete_queryset(request, queryset)
+        quota.recount(authors)
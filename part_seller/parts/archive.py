@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedPart, Part, PartArchive
+
+# Колонки, которые переносятся в архивную таблицу
+FIELDS = [field.attname for field in ArchivedPart._meta.concrete_fields]
+
+
+def move_batch(before, batch_size=None):
+    """
+    Перенести пачку проданных и удаленных запчастей, не менявшихся с
+    before, из parts_part в PartArchive. Возвращает число перенесенных.
+
+    SKIP LOCKED: строки, которые сейчас правит запрос API, остаются до
+    следующего запуска. Фотографии и избранное перенесенных запчастей
+    удаляются: архив их не выводит.
+    """
+    batch_size = batch_size or settings.ARCHIVE_MOVE_BATCH_SIZE
+    with transaction.atomic():
+        rows = list(
+            Part.objects.archived().filter(
+                updated_at__lt=before
+            ).select_for_update(skip_locked=True).order_by('id').values(
+                *FIELDS
+            )[:batch_size]
+        )
+        if not rows:
+            return 0
+        PartArchive.objects.bulk_create(PartArchive(**row) for row in rows)
+        Part.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def move(days=None, batch_size=None):
+    """Перенести весь старый архив, каждая пачка в своей транзакции"""
+    if days is None:
+        days = settings.ARCHIVE_MOVE_AFTER_DAYS
+    before = timezone.now() - timedelta(days=days)
+    moved = 0
+    while True:
+        batch = move_batch(before, batch_size)
+        if not batch:
+            return moved
+        moved += batch
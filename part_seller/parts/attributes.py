@@ -0,0 +1,27 @@
+from django.db.models import Case, Q, TextField, Value, When
+from django.db.models.fields.json import KT
+from django.db.models.functions import Lower, Replace, Trim
+
+# Известные ключи json_data и их тип, остальные ключи - свободные строки
+ATTRIBUTE_TYPES = {
+    'color': str,
+    'is_new_part': bool,
+}
+
+# Выражения для сгенерированных колонок Part, считаются в БД
+COLOR_EXPRESSION = Replace(
+    Lower(Trim(KT('json_data__color'))),
+    Value('ё'),
+    Value('е'),
+    output_field=TextField()
+)
+IS_NEW_PART_EXPRESSION = Case(
+    When(Q(json_data__is_new_part=True), then=Value(True)),
+    When(Q(json_data__is_new_part=False), then=Value(False)),
+    default=None
+)
+
+
+def normalize_color(value):
+    """Тоже самое, что COLOR_EXPRESSION, для значения из запроса"""
+    return value.strip(' ').lower().replace('ё', 'е')
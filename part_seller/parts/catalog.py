@@ -0,0 +1,36 @@
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+CATALOG_VERSION_SEQUENCE = 'parts_catalog_version'
+
+
+def get_catalog_version():
+    """
+    Версия опубликованного каталога, часть ключа кэша ответов.
+    Хранится в последовательности Postgres, поэтому сброс сразу виден
+    всем воркерам при любом бэкенде CACHES. Читается из основной БД:
+    реплика получает изменения последовательности пачками, а не на
+    каждый nextval.
+    """
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            'SELECT CASE WHEN is_called THEN last_value ELSE 0 END '
+            f'FROM {CATALOG_VERSION_SEQUENCE}'
+        )
+        return cursor.fetchone()[0]
+
+
+async def aget_catalog_version():
+    """get_catalog_version для асинхронных вьюх"""
+    return await sync_to_async(get_catalog_version)()
+
+
+def increment_catalog_version():
+    # nextval не ждет блокировок и не откатывается, горячей строки нет
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute('SELECT nextval(%s)', [CATALOG_VERSION_SEQUENCE])
+
+
+def bump_catalog_version():
+    # После коммита, что бы новая версия не закэшировала старые строки
+    transaction.on_commit(increment_catalog_version)
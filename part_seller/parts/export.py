@@ -0,0 +1,74 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Part
+
+# Имя колонки в выгрузке -> поле для values_list
+EXPORT_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'mark': 'mark__name',
+    'model': 'model__name',
+    'category': 'category__name',
+    'location': 'location__name',
+    'price': 'price',
+    'json_data': 'json_data',
+    'description': 'description',
+    'contact': 'contact',
+    'uploaded_at': 'uploaded_at',
+}
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+def get_export_queryset():
+    """Опубликованный каталог, как в PartViewSet"""
+    return Part.objects.filter(
+        sold=False,
+        is_visible=True,
+        is_approved=True
+    ).order_by('id')
+
+
+def iter_rows(queryset, chunk_size):
+    # Серверный курсор: в памяти только одна пачка плоских строк
+    return queryset.values_list(*EXPORT_FIELDS.values()).iterator(
+        chunk_size=chunk_size
+    )
+
+
+def iter_ndjson(rows):
+    names = tuple(EXPORT_FIELDS)
+    for row in rows:
+        yield json.dumps(
+            dict(zip(names, row)),
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False
+        ) + '\n'
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу отдает записанную строку"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    json_index = tuple(EXPORT_FIELDS).index('json_data')
+    for row in rows:
+        row = list(row)
+        row[json_index] = json.dumps(row[json_index], ensure_ascii=False)
+        yield writer.writerow(row)
+
+
+def iter_export(export_format, queryset=None, chunk_size=2000):
+    if queryset is None:
+        queryset = get_export_queryset()
+    rows = iter_rows(queryset, chunk_size)
+    if export_format == 'csv':
+        return iter_csv(rows)
+    return iter_ndjson(rows)
@@ -0,0 +1,112 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .catalog import bump_catalog_version
+from .models import Part, PartImage
+
+logger = logging.getLogger(__name__)
+
+# PIL отпускает GIL на декодировании и ресайзе, потоков достаточно
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS,
+    thread_name_prefix='part-images'
+)
+
+variants = (
+    ('thumbnail', 'JPEG', '.jpg'),
+    ('thumbnail_webp', 'WEBP', '.webp'),
+)
+
+
+def schedule_processing(image_id):
+    """Обработка фото в фоне, после коммита записи"""
+    transaction.on_commit(lambda: executor.submit(process_image, image_id))
+
+
+@contextmanager
+def database_work():
+    """
+    Соединение потока обработки только на время запросов к БД: как
+    обработчик запроса, проверяем его до и возвращаем (в пул) после,
+    а не держим, пока PIL уменьшает фото.
+    """
+    close_old_connections()
+    try:
+        yield
+    finally:
+        connections.close_all()
+
+
+def render_thumbnail(file):
+    Image.open(file).verify()
+    file.seek(0)
+    picture = Image.open(file)
+    # JPEG декодируется сразу в уменьшенном масштабе
+    picture.draft('RGB', settings.THUMBNAIL_SIZE)
+    picture = ImageOps.exif_transpose(picture).convert('RGB')
+    picture.thumbnail(settings.THUMBNAIL_SIZE)
+    return picture
+
+
+def save_variants(image, picture):
+    name = os.path.splitext(os.path.basename(image.image.name))[0]
+    for field, image_format, extension in variants:
+        buffer = BytesIO()
+        picture.save(
+            buffer,
+            image_format,
+            quality=settings.THUMBNAIL_QUALITY,
+            optimize=True
+        )
+        getattr(image, field).save(
+            name + extension,
+            ContentFile(buffer.getvalue()),
+            save=False
+        )
+    image.status = PartImage.READY
+    image.save(update_fields=[field for field, *_ in variants] + ['status'])
+
+
+def process_image(image_id):
+    """Поворот по EXIF и миниатюры JPEG/WebP для фото запчасти"""
+    try:
+        with database_work():
+            image = PartImage.objects.filter(pk=image_id).first()
+        if image is None:
+            return
+        try:
+            with image.image.open('rb') as file:
+                picture = render_thumbnail(file)
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+            # validate_image проверил файл при загрузке, сюда попадают
+            # прошедшие verify, но не декодируемые (обрезанные) файлы
+            logger.warning(
+                'Фото %s запчасти %s не декодируется, удалено',
+                image_id,
+                image.part_id,
+                exc_info=True
+            )
+            picture = None
+        with database_work():
+            if picture is None:
+                image.image.delete(save=False)
+                image.delete()
+            else:
+                save_variants(image, picture)
+            # Карточка запчасти изменилась: новый ETag и версия каталога
+            Part.objects.filter(pk=image.part_id).update(
+                updated_at=timezone.now()
+            )
+            bump_catalog_version()
+    except Exception:
+        # Исключение в потоке пула иначе осталось бы в Future
+        logger.exception('Ошибка обработки фото %s', image_id)
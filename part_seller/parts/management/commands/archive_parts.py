@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from parts.archive import move
+
+
+class Command(BaseCommand):
+    help = (
+        'Перенос проданных и удаленных запчастей, не менявшихся '
+        'ARCHIVE_MOVE_AFTER_DAYS дней, из parts_part в архивную таблицу '
+        'пачками. Запускать по расписанию, например раз в сутки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ARCHIVE_MOVE_AFTER_DAYS
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ARCHIVE_MOVE_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        moved = move(options['days'], options['batch_size'])
+        self.stdout.write(f'Перенесено в архив: {moved}')
@@ -0,0 +1,365 @@
+import json
+import tempfile
+import threading
+from collections import defaultdict
+from contextlib import ExitStack
+from io import BytesIO
+from itertools import cycle
+from statistics import mean, quantiles
+from time import perf_counter
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.authentication import UserRefreshToken
+from api.throttling import SlidingWindowRateThrottle
+from parts.images import executor
+from parts.models import Category, Location, Mark, Part, User
+from parts.quota import recount
+
+PASSWORD = 'benchmark-password'
+search_queries = cycle((
+    'амортизатор',
+    'передний привод',
+    'форсунки',
+    'блок управления',
+    'подушка пассажира',
+))
+orderings = cycle(('id', '-price', 'uploaded_at', '-id', 'price'))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон API через api/urls.py параллельными клиентами. '
+        'Для каждого эндпоинта: запросов в секунду, p50/p95/p99 и запросов '
+        'к БД на запрос, результат в JSON. Пишет в БД, запускать на '
+        'отдельной базе'
+    )
+    scenarios = (
+        'auth', 'catalog', 'search', 'detail',
+        'create', 'moderation', 'favorites',
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            action='store_true',
+            help='Заполнить БД через generate_mark_model и generate_parts'
+        )
+        parser.add_argument('--parts', type=int, default=5000)
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Итераций каждого сценария'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=self.scenarios,
+            help='Сценарий, можно указать несколько раз, по умолчанию все'
+        )
+        parser.add_argument('--output', help='Файл для JSON, иначе stdout')
+
+    def seed(self, parts):
+        if not Mark.objects.exists():
+            call_command('generate_mark_model')
+        location = Location.objects.first() or Location.objects.create(
+            name='Москва'
+        )
+        if not Category.objects.exists():
+            Category.objects.create(name='Подвеска')
+        for i in range(5):
+            User.objects.get_or_create(
+                username=f'bench_seller_{i}',
+                defaults={
+                    'email': f'bench_seller_{i}@example.com',
+                    'location': location,
+                    'contact': '79990000000',
+                }
+            )
+        missing = parts - Part.objects.count()
+        # Статусы модерации и счетчики авторов проставляет generate_parts
+        if missing > 0:
+            call_command('generate_parts', count=missing)
+
+    def prepare(self, clients):
+        location = Location.objects.first()
+        buyers = []
+        for i in range(clients):
+            user, _ = User.objects.get_or_create(
+                username=f'bench_client_{i}',
+                defaults={
+                    'email': f'bench_client_{i}@example.com',
+                    'location': location,
+                    'contact': '79990000000',
+                }
+            )
+            user.set_password(PASSWORD)
+            user.save()
+            buyers.append(user)
+        # generate_parts мог раздать им запчасти, для create нужен лимит
+        Part.objects.filter(author__in=buyers).update(is_visible=False)
+        recount([user.id for user in buyers])
+        moderator, _ = User.objects.get_or_create(
+            username='bench_moderator',
+            defaults={
+                'email': 'bench_moderator@example.com',
+                'location': location,
+                'contact': '79990000000',
+                'is_moder': True,
+            }
+        )
+        catalog = list(Part.objects.filter(
+            sold=False,
+            is_visible=True,
+            is_approved=True
+        ).values_list('id', flat=True)[:1000])
+        queue = list(Part.objects.filter(
+            is_approved=False,
+            moder_checked=False,
+            is_visible=True
+        ).values_list('id', flat=True)[:1000])
+        if not catalog or not queue:
+            raise CommandError('Нет данных, запустите с --seed')
+        return {
+            'users': buyers,
+            # Токены как у /api/auth/jwt/create/, с ролями и версией
+            'tokens': [
+                str(UserRefreshToken.for_user(user).access_token)
+                for user in buyers
+            ],
+            'moderator': str(UserRefreshToken.for_user(moderator).access_token),
+            'catalog': catalog,
+            'queue': queue,
+            'mark': Mark.objects.first().name,
+            'model': Part.objects.filter(
+                mark__name=Mark.objects.first().name
+            ).values_list('model__name', flat=True).first(),
+            'location': location.name,
+            'category': Category.objects.first().name,
+        }
+
+    @staticmethod
+    def make_image():
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 900), 'gray').save(buffer, 'JPEG')
+        return SimpleUploadedFile(
+            'bench.jpg',
+            buffer.getvalue(),
+            content_type='image/jpeg'
+        )
+
+    def record(self, samples, name, client, method, path, token=None, **kwargs):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        # Запросы всех БД: с DB_REPLICAS чтения идут на реплики
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in connections
+            ]
+            start = perf_counter()
+            response = getattr(client, method)(path, **headers, **kwargs)
+            latency = perf_counter() - start
+        queries = sum(len(queries) for queries in captured)
+        samples[name].append((latency, queries, response.status_code < 400))
+        return response
+
+    # Сценарии: клиент, номер клиента, номер итерации, данные prepare
+
+    def run_auth(self, samples, client, worker, i, data):
+        self.record(
+            samples, 'auth_jwt_create', client, 'post', '/api/auth/jwt/create/',
+            data={'username': data['users'][worker].username, 'password': PASSWORD},
+            content_type='application/json'
+        )
+
+    def run_catalog(self, samples, client, worker, i, data):
+        # Анонимный каталог, ответы из кэша по версии каталога
+        self.record(
+            samples, 'catalog_anonymous', client, 'get', '/api/v1/part/',
+            data={'ordering': next(orderings)}
+        )
+
+    def run_search(self, samples, client, worker, i, data):
+        self.record(
+            samples, 'catalog_search', client, 'get', '/api/v1/part/',
+            token=data['tokens'][worker],
+            data={'search': next(search_queries)}
+        )
+
+    def run_detail(self, samples, client, worker, i, data):
+        pk = data['catalog'][i % len(data['catalog'])]
+        self.record(
+            samples, 'part_detail', client, 'get', f'/api/v1/part/{pk}/',
+            token=data['tokens'][worker]
+        )
+
+    def run_create(self, samples, client, worker, i, data):
+        token = data['tokens'][worker]
+        response = self.record(
+            samples, 'part_create', client, 'post', '/api/v1/part/',
+            token=token,
+            data={
+                'mark': data['mark'],
+                'model': data['model'],
+                'location': data['location'],
+                'category': data['category'],
+                'name': 'Фара передняя',
+                'description': 'Нагрузочный тест',
+                'price': '1500',
+                'contact': '79990000000',
+                'json_data': '{"color": "Белый"}',
+                'images': [self.make_image()],
+            }
+        )
+        if response.status_code == 201:
+            # Удаление освобождает место в лимите автора
+            self.record(
+                samples, 'part_delete', client, 'delete',
+                f'/api/v1/part/{response.json()["id"]}/',
+                token=token
+            )
+
+    def run_moderation(self, samples, client, worker, i, data):
+        token = data['moderator']
+        self.record(
+            samples, 'moderation_list', client, 'get', '/api/v1/moderation/',
+            token=token
+        )
+        pk = data['queue'][i % len(data['queue'])]
+        self.record(
+            samples, 'moderation_review', client, 'patch',
+            f'/api/v1/moderation/{pk}/',
+            token=token,
+            data={'moder_comment': 'ok', 'is_approved': False},
+            content_type='application/json'
+        )
+        # Запчасть возвращается в очередь для следующих итераций
+        Part.objects.filter(pk=pk).update(moder_checked=False)
+
+    def run_favorites(self, samples, client, worker, i, data):
+        token = data['tokens'][worker]
+        pk = data['catalog'][i % len(data['catalog'])]
+        self.record(
+            samples, 'favorites_add', client, 'post', '/api/v1/favorites/',
+            token=token,
+            data={'part': pk},
+            content_type='application/json'
+        )
+        self.record(
+            samples, 'favorites_list', client, 'get', '/api/v1/favorites/',
+            token=token
+        )
+        self.record(
+            samples, 'favorites_remove', client, 'delete',
+            f'/api/v1/favorites/{pk}/',
+            token=token
+        )
+
+    def run_scenario(self, scenario, data, clients, requests):
+        handler = getattr(self, f'run_{scenario}')
+        results = []
+        counter = iter(range(requests))
+        lock = threading.Lock()
+
+        def worker(number):
+            samples = defaultdict(list)
+            client = Client()
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    break
+                handler(samples, client, number, i, data)
+            connections.close_all()
+            results.append(samples)
+
+        threads = [
+            threading.Thread(target=worker, args=(number,))
+            for number in range(clients)
+        ]
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+
+        merged = defaultdict(list)
+        for samples in results:
+            for name, values in samples.items():
+                merged[name].extend(values)
+        return {
+            name: self.summarize(values, elapsed)
+            for name, values in merged.items()
+        }
+
+    @staticmethod
+    def summarize(values, elapsed):
+        latencies = sorted(latency * 1000 for latency, _, _ in values)
+        if len(latencies) > 1:
+            percentiles = quantiles(latencies, n=100, method='inclusive')
+        else:
+            percentiles = latencies * 99
+        return {
+            'requests': len(values),
+            'errors': sum(1 for _, _, ok in values if not ok),
+            'throughput_rps': round(len(values) / elapsed, 1),
+            'mean_ms': round(mean(latencies), 2),
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'queries_per_request': round(mean(q for _, q, _ in values), 2),
+        }
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['parts'])
+        data = self.prepare(options['clients'])
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'clients': options['clients'],
+            'requests_per_scenario': options['requests'],
+            'parts': Part.objects.count(),
+            'endpoints': {},
+        }
+        # Лимиты частоты запросов отключены: меряется API, а не троттлинг.
+        # Фото пишутся во временный MEDIA_ROOT
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root,
+            ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ['testserver'],
+        ), mock.patch.object(
+            SlidingWindowRateThrottle,
+            'allow_request',
+            lambda throttle, request, view: True
+        ), mock.patch.object(
+            SimpleRateThrottle,
+            'allow_request',
+            lambda throttle, request, view: True
+        ):
+            for scenario in options['scenario'] or self.scenarios:
+                report['endpoints'].update(self.run_scenario(
+                    scenario,
+                    data,
+                    options['clients'],
+                    options['requests']
+                ))
+            # Дожидаемся фоновой обработки фото до удаления MEDIA_ROOT
+            executor.shutdown(wait=True)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import os
+import random
+import shlex
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from statistics import mean, quantiles
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.authentication import UserRefreshToken
+from parts.models import Part, User
+
+SERVER_COMMANDS = {
+    'asgi': (
+        'uvicorn part_seller.asgi:application --host 127.0.0.1 '
+        '--port {port} --workers {workers} --no-access-log --log-level warning'
+    ),
+    'wsgi': (
+        'gunicorn part_seller.wsgi:application --bind 127.0.0.1:{port} '
+        '--workers {workers} --threads {threads} --log-level warning'
+    ),
+}
+# Настройки сервера на время прогона: без лимитов частоты и DEBUG,
+# иначе меряются 429 и рост connection.queries
+SERVER_SETTINGS = '''from {module} import *  # noqa
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1']
+REST_FRAMEWORK = {{
+    **REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {{'user': None, 'anon': None}},
+}}
+'''
+
+
+class HttpConnection:
+    """Минимальный HTTP/1.1 клиент на asyncio с keep-alive"""
+
+    def __init__(self, port, headers):
+        self.port = port
+        self.headers = ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+        self.reader = self.writer = None
+
+    async def get(self, path):
+        """Статус ответа, тело читается целиком"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                '127.0.0.1', self.port
+            )
+        self.writer.write((
+            f'GET {path} HTTP/1.1\r\n'
+            f'Host: 127.0.0.1:{self.port}\r\n'
+            f'Accept: application/json\r\n{self.headers}\r\n'
+        ).encode('latin-1'))
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Сервер закрыл соединение')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding') == 'chunked':
+            while size := int((await self.reader.readline()).split(b';')[0], 16):
+                await self.reader.readexactly(size + 2)
+            await self.reader.readline()
+        else:
+            await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection') == 'close':
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускная способность GET эндпоинтов под uvicorn (ASGI, '
+        'api.async_views) и gunicorn (WSGI) при множестве одновременных '
+        'keep-alive соединений: запросов в секунду и p50/p95/p99, '
+        'результат в JSON. Серверы запускаются на той же БД'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servers',
+            nargs='+',
+            choices=tuple(SERVER_COMMANDS),
+            default=list(SERVER_COMMANDS)
+        )
+        parser.add_argument('--connections', type=int, default=200)
+        parser.add_argument('--seconds', type=float, default=20)
+        parser.add_argument('--warmup', type=float, default=3)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Потоков на воркер gunicorn'
+        )
+        parser.add_argument('--port', type=int, default=8765)
+        for name, command in SERVER_COMMANDS.items():
+            parser.add_argument(
+                f'--{name}-command',
+                default=command,
+                help='Подстановки {port}, {workers}, {threads}'
+            )
+        parser.add_argument(
+            '--auth',
+            action='store_true',
+            help='Запросы с JWT пользователя, иначе анонимные'
+        )
+        parser.add_argument('--output', help='Файл для JSON, иначе stdout')
+
+    @staticmethod
+    def get_paths():
+        """Смесь каталога, карточек, справочников и запчастей автора"""
+        parts = list(
+            Part.objects.filter(is_visible=True, is_approved=True)
+            .order_by('?')
+            .values_list('pk', 'author_id')[:200]
+        )
+        if not parts:
+            raise CommandError('В БД нет опубликованных запчастей')
+        paths = [
+            '/api/v1/part/',
+            '/api/v1/part/?ordering=-price',
+            '/api/v1/part/?ordering=uploaded_at',
+            '/api/v1/mark/',
+            '/api/v1/category/',
+            '/api/v1/location/',
+        ]
+        paths += [f'/api/v1/part/{pk}/' for pk, _ in parts]
+        paths += [
+            f'/api/v1/user/{author_id}/parts/'
+            for author_id in {author_id for _, author_id in parts[:20]}
+        ]
+        return paths
+
+    @staticmethod
+    def get_headers(auth):
+        if not auth:
+            return {}
+        user = User.objects.filter(is_active=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('В БД нет активных пользователей')
+        token = UserRefreshToken.for_user(user).access_token
+        return {'Authorization': f'Bearer {token}'}
+
+    @staticmethod
+    def wait_port(process, port, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(
+                    f'Сервер завершился с кодом {process.returncode}'
+                )
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Сервер не открыл порт {port} за {timeout} с')
+
+    def start_server(self, command, directory):
+        executable = shutil.which(command[0])
+        if executable is None:
+            raise CommandError(
+                f'Не найдена команда {command[0]}, '
+                'установите зависимости из requirements.txt'
+            )
+        with open(os.path.join(directory, 'benchmark_server_settings.py'), 'w') as file:
+            file.write(SERVER_SETTINGS.format(module=settings.SETTINGS_MODULE))
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE='benchmark_server_settings',
+            PYTHONPATH=os.pathsep.join(filter(None, (
+                directory,
+                str(settings.BASE_DIR),
+                os.environ.get('PYTHONPATH'),
+            )))
+        )
+        # Режим вьюх решает точка входа: asgi.py включает ASYNC_VIEWS
+        env.pop('ASYNC_VIEWS', None)
+        return subprocess.Popen(
+            [executable, *command[1:]],
+            cwd=settings.BASE_DIR,
+            env=env,
+            start_new_session=True
+        )
+
+    @staticmethod
+    async def load(port, headers, paths, connections, seconds):
+        """Список (задержка, статус) за seconds секунд"""
+        samples = []
+        deadline = time.perf_counter() + seconds
+
+        async def worker(number):
+            connection = HttpConnection(port, headers)
+            paths_cycle = random.Random(number).sample(paths, len(paths))
+            index = 0
+            try:
+                while time.perf_counter() < deadline:
+                    path = paths_cycle[index % len(paths_cycle)]
+                    index += 1
+                    start = time.perf_counter()
+                    try:
+                        status = await connection.get(path)
+                    except (OSError, ValueError, IndexError,
+                            asyncio.IncompleteReadError):
+                        connection.close()
+                        status = None
+                    samples.append((time.perf_counter() - start, status))
+            finally:
+                connection.close()
+
+        await asyncio.gather(*(worker(number) for number in range(connections)))
+        return samples
+
+    @staticmethod
+    def summarize(samples, seconds):
+        latencies = sorted(latency * 1000 for latency, _ in samples)
+        if len(latencies) > 1:
+            percentiles = quantiles(latencies, n=100, method='inclusive')
+        else:
+            percentiles = (latencies or [0]) * 99
+        statuses = {}
+        for _, status in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, status in samples if status != 200),
+            'statuses': statuses,
+            'throughput_rps': round(len(samples) / seconds, 1),
+            'mean_ms': round(mean(latencies), 2) if latencies else None,
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+        }
+
+    def run_server(self, name, options, paths, headers):
+        command = shlex.split(options[f'{name}_command'].format(
+            port=options['port'],
+            workers=options['workers'],
+            threads=options['threads']
+        ))
+        with tempfile.TemporaryDirectory() as directory:
+            process = self.start_server(command, directory)
+            try:
+                self.wait_port(process, options['port'])
+                asyncio.run(self.load(
+                    options['port'], headers, paths,
+                    options['connections'], options['warmup']
+                ))
+                samples = asyncio.run(self.load(
+                    options['port'], headers, paths,
+                    options['connections'], options['seconds']
+                ))
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        return {'command': shlex.join(command), **self.summarize(
+            samples, options['seconds']
+        )}
+
+    def handle(self, *args, **options):
+        paths = self.get_paths()
+        headers = self.get_headers(options['auth'])
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'connections': options['connections'],
+            'seconds': options['seconds'],
+            'workers': options['workers'],
+            'auth': options['auth'],
+            'paths': len(paths),
+            'servers': {},
+        }
+        for name in options['servers']:
+            self.stderr.write(f'{name}: {options["connections"]} соединений...')
+            report['servers'][name] = self.run_server(name, options, paths, headers)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,200 @@
+import json
+import threading
+from statistics import mean, quantiles
+from time import perf_counter
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.throttling import SlidingWindowRateThrottle
+from parts.pool import get_pool_stats
+
+MODES = ('connect', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = (
+        'Задержка коротких GET запросов при разных способах подключения '
+        'к Postgres: новое соединение на запрос (CONN_MAX_AGE=0), '
+        'постоянное соединение на поток и пул psycopg3. Для каждого режима '
+        'запросов в секунду, p50/p95/p99 и сколько соединений открыто, '
+        'результат в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=MODES)
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Запросов на клиента'
+        )
+        parser.add_argument(
+            '--pool-size',
+            type=int,
+            help='max_size пула, по умолчанию из настроек или --clients'
+        )
+        parser.add_argument('--path', default='/api/v1/category/')
+        parser.add_argument('--output', help='Файл для JSON, иначе stdout')
+
+    @staticmethod
+    def get_settings(base, mode, pool_size):
+        """Копия настроек default для режима"""
+        options = dict(base['OPTIONS'])
+        pool_options = options.pop('pool', None)
+        settings_dict = dict(
+            base,
+            OPTIONS=options,
+            CONN_MAX_AGE=0,
+            CONN_HEALTH_CHECKS=False
+        )
+        if mode == 'persistent':
+            settings_dict.update(CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+        elif mode == 'pool':
+            from psycopg_pool import ConnectionPool
+
+            pool_options = dict(pool_options or {
+                'check': ConnectionPool.check_connection,
+            })
+            if pool_size:
+                pool_options.update(min_size=pool_size, max_size=pool_size)
+            options['pool'] = pool_options
+        return settings_dict
+
+    @staticmethod
+    def pool_available():
+        try:
+            import psycopg_pool  # noqa: F401
+            from django.db.backends.postgresql.psycopg_any import is_psycopg3
+        except ImportError:
+            return False
+        return is_psycopg3
+
+    def run_mode(self, settings_dict, clients, requests, path):
+        connections.close_all()
+        connections.settings[DEFAULT_DB_ALIAS] = settings_dict
+        # Главный поток тоже получит соединение с настройками режима
+        del connections[DEFAULT_DB_ALIAS]
+        # Пул из настроек проекта уже мог создаться, нужен пул режима
+        connections[DEFAULT_DB_ALIAS].close_pool()
+        results = []
+        opened = []
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            with lock:
+                opened.append(connection.alias)
+
+        def worker():
+            client = Client()
+            latencies = []
+            for i in range(requests):
+                start = perf_counter()
+                response = client.get(path)
+                # Тестовый клиент не закрывает соединения после ответа,
+                # в отличие от обработчика WSGI/ASGI
+                close_old_connections()
+                latencies.append((perf_counter() - start, response.status_code))
+            connections.close_all()
+            results.append(latencies)
+
+        threads = [threading.Thread(target=worker) for _ in range(clients)]
+        connection_created.connect(count_connection)
+        try:
+            start = perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = perf_counter() - start
+        finally:
+            connection_created.disconnect(count_connection)
+        report = self.summarize(
+            [sample for latencies in results for sample in latencies],
+            elapsed
+        )
+        report['connections_opened'] = len(opened)
+        pool_stats = get_pool_stats().get(DEFAULT_DB_ALIAS)
+        if pool_stats is not None:
+            report['pool'] = pool_stats
+            connections[DEFAULT_DB_ALIAS].close_pool()
+        return report
+
+    @staticmethod
+    def summarize(samples, elapsed):
+        latencies = sorted(latency * 1000 for latency, _ in samples)
+        if len(latencies) > 1:
+            percentiles = quantiles(latencies, n=100, method='inclusive')
+        else:
+            percentiles = latencies * 99
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, status in samples if status >= 400),
+            'throughput_rps': round(len(samples) / elapsed, 1),
+            'mean_ms': round(mean(latencies), 2),
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+        }
+
+    def handle(self, *args, **options):
+        modes = options['modes'] or MODES
+        if not self.pool_available():
+            if options['modes'] and 'pool' in modes:
+                raise CommandError('Для режима pool нужен psycopg[pool] 3')
+            modes = [mode for mode in modes if mode != 'pool']
+            self.stderr.write('psycopg[pool] 3 не установлен, режим pool пропущен')
+        base = connections.settings[DEFAULT_DB_ALIAS]
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'clients': options['clients'],
+            'requests_per_client': options['requests'],
+            'path': options['path'],
+            'host': base['HOST'],
+            'modes': {},
+        }
+        # Лимиты частоты запросов отключены, как в benchmark_api
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ['testserver'],
+            ), mock.patch.object(
+                SlidingWindowRateThrottle,
+                'allow_request',
+                lambda throttle, request, view: True
+            ), mock.patch.object(
+                SimpleRateThrottle,
+                'allow_request',
+                lambda throttle, request, view: True
+            ):
+                for mode in modes:
+                    report['modes'][mode] = self.run_mode(
+                        self.get_settings(
+                            base,
+                            mode,
+                            options['pool_size'] or (
+                                None if base['OPTIONS'].get('pool')
+                                else options['clients']
+                            )
+                        ),
+                        options['clients'],
+                        options['requests'],
+                        options['path']
+                    )
+        finally:
+            connections.close_all()
+            connections.settings[DEFAULT_DB_ALIAS] = base
+            del connections[DEFAULT_DB_ALIAS]
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
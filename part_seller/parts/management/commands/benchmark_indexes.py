@@ -0,0 +1,103 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from parts.models import Part
+
+# Индексы из миграции 0006, на время замера "до" удаляются в транзакции
+PARTIAL_INDEXES = (
+    'part_catalog_id_idx',
+    'part_catalog_price_idx',
+    'part_catalog_uploaded_idx',
+    'part_moderation_queue_idx',
+    'part_author_active_idx',
+    'part_author_visible_idx',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN ANALYZE и время горячих запросов из api/views.py без '
+        'частичных индексов и с ними. Данные - generate_parts на миллионы '
+        'записей. Замер "до" держит блокировку parts_part, не запускать на проде'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Вывести полные планы запросов'
+        )
+
+    @staticmethod
+    def get_querysets():
+        catalog = Part.objects.filter(
+            sold=False,
+            is_visible=True,
+            is_approved=True
+        )
+        author_id = Part.objects.values('author_id').annotate(
+            total=Count('id')
+        ).order_by('-total').values_list('author_id', flat=True).first()
+        return {
+            'каталог, id': catalog.order_by('id')[:11],
+            'каталог, price': catalog.order_by('price', 'id')[:11],
+            'каталог, -uploaded_at': catalog.order_by('-uploaded_at', '-id')[:11],
+            'модерация': Part.objects.filter(
+                is_approved=False,
+                moder_checked=False,
+                is_visible=True
+            ).order_by('id')[:10],
+            'лимит автора': Part.objects.filter(
+                author_id=author_id,
+                is_visible=True,
+                sold=False
+            ).values('author_id').annotate(total=Count('id')),
+            'запчасти автора': Part.objects.filter(
+                author_id=author_id,
+                is_visible=True
+            ).order_by('id')[:11],
+        }
+
+    def measure(self, querysets, repeat, plans):
+        results = {}
+        for name, queryset in querysets.items():
+            plan = queryset.explain(analyze=True, buffers=True)
+            timings = []
+            for _ in range(repeat):
+                start = perf_counter()
+                list(queryset.all())
+                timings.append((perf_counter() - start) * 1000)
+            # Узел чтения таблицы: Seq Scan или Index Scan с именем индекса
+            scan = next(
+                (line.strip(' ->') for line in plan.splitlines() if 'Scan' in line),
+                plan.splitlines()[0]
+            )
+            results[name] = (median(timings), scan)
+            if plans:
+                self.stdout.write(f'--- {name}\n{plan}')
+        return results
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Записей в parts_part: {Part.objects.count()}')
+        querysets = self.get_querysets()
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in PARTIAL_INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS {index}')
+            self.stdout.write('Без частичных индексов:')
+            before = self.measure(querysets, options['repeat'], options['plans'])
+            # DDL в Postgres транзакционный, индексы вернутся
+            transaction.set_rollback(True)
+        self.stdout.write('С частичными индексами:')
+        after = self.measure(querysets, options['repeat'], options['plans'])
+        for name in querysets:
+            self.stdout.write(
+                f'{name:<22} {before[name][0]:9.2f} мс -> {after[name][0]:9.2f} мс\n'
+                f'    до:    {before[name][1]}\n'
+                f'    после: {after[name][1]}'
+            )
@@ -0,0 +1,55 @@
+from io import BytesIO
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from api.rows import part_rows
+from parts.models import Part
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер ORJSONRenderer/ORJSONParser против стандартных рендерера и '
+        'парсера DRF на странице из 1000 запчастей. Совместимость вывода '
+        'проверяет api.tests.test_json'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    @staticmethod
+    def get_page():
+        request = Request(APIRequestFactory().get('/api/v1/part/'))
+        parts = Part.objects.with_related().order_by('id')
+        return {
+            'next': None,
+            'previous': None,
+            'result': part_rows.map(part_rows.values(parts)[:1000], request),
+        }
+
+    def measure(self, func, data, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            func(data)
+            timings.append(perf_counter() - start)
+        return median(timings) * 1000
+
+    def handle(self, *args, **options):
+        data = self.get_page()
+        body = JSONRenderer().render(data)
+        for label, func, value in (
+            ('JSONRenderer', JSONRenderer().render, data),
+            ('ORJSONRenderer', ORJSONRenderer().render, data),
+            ('JSONParser', lambda body: JSONParser().parse(BytesIO(body)), body),
+            ('ORJSONParser', lambda body: ORJSONParser().parse(BytesIO(body)), body),
+        ):
+            timing = self.measure(func, value, options['repeat'])
+            self.stdout.write(f'{label:<15} {timing:8.2f} мс на 1000 запчастей')
@@ -0,0 +1,51 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from api.validators import RegexpProc
+
+samples = {
+    'обычный текст': (
+        'Амортизатор задний в хорошем состоянии, '
+        'без пробега по РФ, оригинал. '
+    ) * 4,
+    'ё x 250': 'ё' * 250,
+    'x x 250': 'x' * 250,
+    'пи!!!!!': ('пи' + '!' * 5) * 40,
+    'х + пробелы': ('х' + ' ' * 5) * 42,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер скорости проверки текста автоматом RegexpProc и '
+        'регуляркой. Совпадение результатов проверяет '
+        'api.tests.test_automaton'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    @staticmethod
+    def regexp_test(text):
+        return bool(RegexpProc.regexp.findall(text))
+
+    def measure(self, func, text, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            func(text)
+            timings.append((perf_counter() - start) * 1000000)
+        return median(timings)
+
+    def handle(self, *args, **options):
+        for name, text in samples.items():
+            text = text[:250]
+            regexp = self.measure(self.regexp_test, text, options['repeat'])
+            automaton = self.measure(RegexpProc.test, text, options['repeat'])
+            self.stdout.write(
+                f'{name:<15} регулярка {regexp:8.1f} мкс, '
+                f'автомат {automaton:8.1f} мкс, '
+                f'x{regexp / automaton:.1f}'
+            )
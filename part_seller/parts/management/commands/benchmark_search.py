@@ -0,0 +1,63 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from api.filters import PartFilter
+from parts.models import Part
+
+queries = (
+    "амортизаторы задние",
+    "форсунка",
+    "блок управления",
+    "подушки безопасности",
+    "привод",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение поиска через icontains и полнотекстового поиска. '
+        'Запускать на таблице от 1М записей (generate_parts)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Вывести план запроса для каждого режима'
+        )
+
+    @staticmethod
+    def get_queryset():
+        return Part.objects.filter(
+            sold=False,
+            is_visible=True,
+            is_approved=True
+        ).order_by('id')
+
+    def run_filter(self, params):
+        # Как в каталоге: COUNT для пагинатора и первая страница
+        qs = PartFilter(params, queryset=self.get_queryset()).qs
+        start = perf_counter()
+        count = qs.count()
+        list(qs[:10])
+        return perf_counter() - start, count, qs
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Записей в parts_part: {Part.objects.count()}')
+        for text in queries:
+            for mode in ('part_name', 'search'):
+                params = {mode: text}
+                timings = []
+                for _ in range(options['repeat']):
+                    elapsed, count, qs = self.run_filter(params)
+                    timings.append(elapsed * 1000)
+                self.stdout.write(
+                    f'{mode:<10} "{text}": найдено {count}, '
+                    f'медиана {median(timings):.1f} мс, '
+                    f'мин {min(timings):.1f} мс'
+                )
+                if options['explain']:
+                    self.stdout.write(qs[:10].explain(analyze=True))
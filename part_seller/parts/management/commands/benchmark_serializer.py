@@ -0,0 +1,71 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.rows import part_rows
+from api.serializers import PartSerializer
+from parts.models import Part
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка вывода api.rows.part_rows с PartSerializer и замер '
+        'строк в секунду на страницах разного размера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10, 100, 1000]
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    @staticmethod
+    def get_queryset():
+        return Part.objects.with_related().filter(
+            sold=False,
+            is_visible=True,
+            is_approved=True
+        ).order_by('id')
+
+    @staticmethod
+    def serializer_page(request, size):
+        parts = Command.get_queryset()[:size]
+        return PartSerializer(parts, many=True, context={'request': request}).data
+
+    @staticmethod
+    def rows_page(request, size):
+        return part_rows.map(part_rows.values(Command.get_queryset())[:size], request)
+
+    def measure(self, func, request, size, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            JSONRenderer().render(func(request, size))
+            timings.append(perf_counter() - start)
+        return median(timings)
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/api/v1/part/'))
+        total = self.get_queryset().count()
+        self.stdout.write(f'Опубликованных запчастей: {total}')
+        for size in options['sizes']:
+            size = min(size, total)
+            expected = JSONRenderer().render(self.serializer_page(request, size))
+            actual = JSONRenderer().render(self.rows_page(request, size))
+            if expected != actual:
+                raise CommandError(f'Вывод отличается на странице {size}')
+            serializer = self.measure(
+                self.serializer_page, request, size, options['repeat']
+            )
+            rows = self.measure(self.rows_page, request, size, options['repeat'])
+            self.stdout.write(
+                f'{size:>5} строк: PartSerializer {size / serializer:9.0f} стр/с, '
+                f'part_rows {size / rows:9.0f} стр/с, x{serializer / rows:.1f}'
+            )
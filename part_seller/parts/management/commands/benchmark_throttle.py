@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from time import perf_counter, time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework.throttling import SimpleRateThrottle, UserRateThrottle
+
+from api.throttling import SlidingWindowStore
+
+
+def hammer(store, prefix, keys, limit, duration, seconds, worker):
+    """Проверки по кругу ключей, возвращает (проверок, разрешено)"""
+    checks = allowed = 0
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        key = f'{prefix}_{(worker + checks) % keys}'
+        allowed += store.hit(key, limit, duration)[0]
+        checks += 1
+    return checks, allowed
+
+
+def run_process(args):
+    # Отдельный процесс как воркер gunicorn, внутри несколько потоков
+    path, prefix, threads, keys, limit, duration, seconds, number = args
+    store = SlidingWindowStore(path)
+    results = []
+
+    def worker(index):
+        results.append(hammer(
+            store, prefix, keys, limit, duration, seconds,
+            number * threads + index
+        ))
+
+    pool = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return [sum(values) for values in zip(*results)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверок лимита в секунду у api.throttling при конкуренции '
+        'нескольких процессов и потоков, точность общего лимита и '
+        'сравнение с SimpleRateThrottle на кэше Django'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=1000,
+            help='Запросов в минуту на ключ'
+        )
+
+    def run(self, path, prefix, processes, threads, keys, limit, seconds):
+        context = multiprocessing.get_context('fork')
+        start = perf_counter()
+        with context.Pool(processes) as pool:
+            results = pool.map(run_process, [
+                (path, prefix, threads, keys, limit, 60, seconds, number)
+                for number in range(processes)
+            ])
+        elapsed = perf_counter() - start
+        checks, allowed = (sum(values) for values in zip(*results))
+        return checks, allowed, elapsed
+
+    @staticmethod
+    def run_simple(keys, limit, seconds):
+        """SimpleRateThrottle в одном процессе: список меток в кэше на ключ"""
+        throttle_class = type(
+            'BenchmarkRateThrottle',
+            (UserRateThrottle,),
+            {'rate': f'{limit}/min'}
+        )
+        checks = 0
+        deadline = perf_counter() + seconds
+        while perf_counter() < deadline:
+            request = SimpleNamespace(
+                user=SimpleNamespace(is_authenticated=True, pk=checks % keys)
+            )
+            throttle_class().allow_request(request, None)
+            checks += 1
+        cache.delete_many([
+            SimpleRateThrottle.cache_format % {'scope': 'user', 'ident': pk}
+            for pk in range(keys)
+        ])
+        return checks
+
+    def handle(self, *args, **options):
+        processes, threads = options['processes'], options['threads']
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'throttle.sqlite3')
+            SlidingWindowStore(path).connection
+
+            checks, allowed, elapsed = self.run(
+                path, 'throttle_user', processes, threads, options['keys'],
+                options['limit'], options['seconds']
+            )
+            self.stdout.write(
+                f'{processes} проц. x {threads} потоков, {options["keys"]} ключей: '
+                f'{checks / elapsed:.0f} проверок/с, разрешено {allowed}'
+            )
+
+            # Один ключ на всех: разрешенных не больше лимита окна
+            limit = 50
+            started = time()
+            _, allowed, _ = self.run(
+                path, 'throttle_shared', processes, threads, 1, limit,
+                min(options['seconds'], 1)
+            )
+            # Запуск мог попасть на границу минутного окна
+            expected = limit if int(started // 60) == int(time() // 60) else None
+            self.stdout.write(
+                f'Общий ключ, лимит {limit}/мин: разрешено {allowed}'
+                + (f', ожидалось {expected}' if expected else '')
+            )
+
+        checks = self.run_simple(options['keys'], options['limit'], options['seconds'])
+        self.stdout.write(
+            f'SimpleRateThrottle ({settings.CACHES["default"]["BACKEND"]}), '
+            f'1 поток: '
+            f'{checks / options["seconds"]:.0f} проверок/с'
+        )
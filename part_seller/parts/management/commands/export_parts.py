@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from parts.export import EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка опубликованного каталога в NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='ndjson',
+            dest='export_format'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки, по умолчанию stdout'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        output = sys.stdout
+        if options['output']:
+            output = open(options['output'], 'w', encoding='utf-8', newline='')
+        try:
+            for line in iter_export(
+                options['export_format'],
+                chunk_size=options['chunk_size']
+            ):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -1,66 +1,373 @@
-from random import choice, randrange
+import csv
+import json
+import math
+import multiprocessing
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from itertools import accumulate
+from random import Random
+from time import perf_counter
 
-from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
 
-from parts.models import Location, Mark, Model, Part, User
+from parts.catalog import bump_catalog_version
+from parts.models import Category, Location, Model, Part, User
+from parts.quota import recount
 
-part_names = (
-    "Амортизатор задний",
-    "Привод правый передний",
-    "Блок управления двигателем",
-    "Форсунка топливная",
-    "Подушка безопасности пассажира"
+# Категория -> типовые названия запчастей
+part_names = {
+    "Подвеска": (
+        "Амортизатор задний",
+        "Амортизатор передний",
+        "Рычаг передний нижний",
+        "Стойка стабилизатора",
+        "Пружина подвески",
+    ),
+    "Трансмиссия": (
+        "Привод правый передний",
+        "Привод левый передний",
+        "Коробка передач",
+        "Сцепление в сборе",
+    ),
+    "Двигатель": (
+        "Блок управления двигателем",
+        "Форсунка топливная",
+        "Генератор",
+        "Стартер",
+        "Турбина",
+    ),
+    "Кузов": (
+        "Фара передняя",
+        "Бампер передний",
+        "Крыло переднее",
+        "Зеркало боковое",
+        "Дверь задняя",
+    ),
+    "Салон": (
+        "Подушка безопасности пассажира",
+        "Сиденье водителя",
+        "Панель приборов",
+        "Руль",
+    ),
+}
+
+descriptions = (
+    "Оригинал, снято с автомобиля без пробега по РФ.",
+    "В хорошем состоянии, без сколов и трещин.",
+    "Новая запчасть в упаковке.",
+    "Есть следы эксплуатации, полностью рабочая.",
+    "Отправка в регионы транспортной компанией.",
+    "Возможен торг при осмотре.",
+    "Подходит на несколько модификаций, уточняйте по VIN.",
+)
+
+locations = (
+    "Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург",
+    "Казань", "Владивосток", "Краснодар", "Самара", "Омск", "Хабаровск",
 )
 
+# Разное написание одного цвета, в колонке color оно сводится к одному
 colors = (
     "Белый",
+    "белый",
     "Чёрный",
+    "черный",
+    "ЧЁРНЫЙ ",
     "Синий",
     "Красный",
-    "Серый"
+    "Серый",
+    "Серебристый",
+    "Зелёный",
+    "Бордовый"
 )
 
+extra_attributes = {
+    "side": ("левая", "правая"),
+    "condition": ("отличное", "хорошее", "требует ремонта"),
+    "original": (True, False),
+    "year": tuple(range(1995, 2024)),
+}
 
-class Command(BaseCommand):
-    help = 'Создание записей в таблице Part'
+# Колонки parts_part для COPY, search_vector заполняет триггер,
+# color и is_new_part - сгенерированные колонки
+columns = (
+    'name', 'is_visible', 'updated_at', 'description', 'location_id',
+    'mark_id', 'model_id', 'price', 'json_data', 'contact', 'is_approved',
+    'author_id', 'sold', 'uploaded_at', 'moder_checked', 'moder_comment',
+    'category_id',
+)
+
+
+def zipf_weights(size, exponent=1.1):
+    """Накопленные веса: первые элементы популярнее, длинный хвост"""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(size)))
+
+
+class Generator:
+    """
+    Строки запчастей для одной пачки.
+    Пачка с номером n всегда одинакова при том же seed, сколько бы
+    процессов ни генерировали данные.
+    """
+
+    def __init__(self, references, seed):
+        self.references = dict(references)
+        self.seed = seed
+        self.now = references['now']
+        # Популярность моделей не зависит от порядка id, но повторяется при seed
+        self.references['models'] = Random(seed).sample(
+            references['models'],
+            len(references['models'])
+        )
+        self.model_weights = zipf_weights(len(references['models']), 0.8)
+        self.author_weights = zipf_weights(len(references['authors']))
+        self.location_weights = zipf_weights(len(references['locations']), 0.8)
 
     @staticmethod
-    def get_json_data():
-        # Генерирует случайный json_data
+    def get_json_data(rng):
+        # Цвет у 80%, новизна у 60% и пара произвольных признаков,
+        # как в реальных объявлениях
         json_data = {}
-        if choice((True, False)):
-            json_data["color"] = choice(colors)
-        if choice((True, False)):
-            json_data["is_new_part"] = choice((True, False))
+        if rng.random() < 0.8:
+            json_data["color"] = rng.choice(colors)
+        if rng.random() < 0.6:
+            json_data["is_new_part"] = rng.random() < 0.3
+        for key in rng.sample(tuple(extra_attributes), rng.randrange(3)):
+            json_data[key] = rng.choice(extra_attributes[key])
         return json_data
 
+    @staticmethod
+    def get_price(rng):
+        # Логнормальное: много дешевых запчастей и редкие дорогие
+        price = rng.lognormvariate(math.log(8000), 1.0)
+        return Decimal(max(100, min(2000000, round(price, -2))))
+
+    @staticmethod
+    def get_contact(rng):
+        phone = f'+79{rng.randrange(10 ** 9):09d}'
+        return rng.choice((
+            phone,
+            phone[1:],
+            f'whatsapp: {phone}',
+            f'telegram: @seller{rng.randrange(10 ** 6)}',
+        ))
+
+    def get_status(self, rng):
+        # (is_visible, sold, is_approved, moder_checked, moder_comment)
+        if rng.random() < 0.05:
+            return True, False, False, False, ''
+        if rng.random() < 0.03:
+            return True, False, False, True, 'Уточните описание'
+        return rng.random() > 0.03, rng.random() < 0.15, True, True, ''
+
+    def rows(self, batch, size):
+        rng = Random(self.seed * 1000003 + batch)
+        references = self.references
+        models = rng.choices(references['models'], cum_weights=self.model_weights, k=size)
+        authors = rng.choices(references['authors'], cum_weights=self.author_weights, k=size)
+        for (mark_id, model_id), author_id in zip(models, authors):
+            category, category_id = rng.choice(references['categories'])
+            is_visible, sold, is_approved, moder_checked, comment = self.get_status(rng)
+            # Свежие объявления чаще, хвост до двух лет
+            uploaded_at = self.now - timedelta(
+                days=min(730, rng.expovariate(1 / 120)),
+                seconds=rng.randrange(86400)
+            )
+            yield (
+                rng.choice(part_names.get(category, part_names['Кузов'])),
+                is_visible,
+                uploaded_at,
+                ' '.join(rng.sample(descriptions, rng.randint(1, 3))),
+                rng.choices(references['locations'], cum_weights=self.location_weights)[0],
+                mark_id,
+                model_id,
+                self.get_price(rng),
+                self.get_json_data(rng),
+                self.get_contact(rng),
+                is_approved,
+                author_id,
+                sold,
+                uploaded_at,
+                moder_checked,
+                comment,
+                category_id,
+            )
+
+
+def copy_rows(rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # \N - NULL, пустая строка остается пустой строкой
+        row = [r'\N' if value is None else value for value in row]
+        row[8] = json.dumps(row[8], ensure_ascii=False)
+        writer.writerow(row)
+    buffer.seek(0)
+    sql = (
+        f'COPY parts_part ({", ".join(columns)}) '
+        "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            raw.copy_expert(sql, buffer)
+        else:
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def bulk_rows(rows, batch_size):
+    parts = [Part(**dict(zip(columns, row))) for row in rows]
+    # bulk_create вызывает pre_save: auto_now_add и auto_now ставят
+    # текущее время вместо сгенерированного. Даты возвращаются UPDATE
+    # после вставки, bulk_update pre_save не вызывает
+    dates = [(part.uploaded_at, part.updated_at) for part in parts]
+    with transaction.atomic():
+        Part.objects.bulk_create(parts, batch_size=batch_size)
+        for part, (uploaded_at, updated_at) in zip(parts, dates):
+            part.uploaded_at = uploaded_at
+            part.updated_at = updated_at
+        Part.objects.bulk_update(
+            parts,
+            ('uploaded_at', 'updated_at'),
+            batch_size=batch_size
+        )
+
+
+def load_batches(generator, batches, batch_size, total, method):
+    loaded = 0
+    for batch in batches:
+        size = min(batch_size, total - batch * batch_size)
+        rows = generator.rows(batch, size)
+        if method == 'copy':
+            copy_rows(rows)
+        else:
+            bulk_rows(rows, 1000)
+        loaded += size
+    return loaded
+
+
+def close_connections():
+    """
+    Закрыть соединения всех алиасов и их пулы psycopg (DB_POOL=1).
+    close_all() только возвращает соединение в пул: сокеты пула и его
+    потоки остались бы открытыми и после fork достались бы процессам
+    """
+    for alias in connections:
+        connections[alias].close()
+        close_pool = getattr(connections[alias], 'close_pool', None)
+        if close_pool is not None:
+            close_pool()
+
+
+def load_in_worker(args):
+    # Пулы и соединения родителя закрыты до fork, процесс открывает свои
+    references, seed, batches, batch_size, total, method = args
+    try:
+        return load_batches(
+            Generator(references, seed), batches, batch_size, total, method
+        )
+    finally:
+        close_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Создание записей в таблице Part: марки, цены, признаки и авторы '
+        'с реалистичным распределением. Загрузка пачками через COPY, '
+        'при необходимости в нескольких процессах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument(
+            '--method',
+            choices=('copy', 'bulk'),
+            default='copy',
+            help='bulk - bulk_create, если COPY недоступен'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=100,
+            help='Сколько продавцов должно быть в БД, недостающие создаются'
+        )
+
+    def ensure_references(self, users):
+        if not Model.objects.exists():
+            raise CommandError('Нет моделей, сначала generate_mark_model')
+        for name in locations:
+            Location.objects.get_or_create(name=name)
+        for name in part_names:
+            Category.objects.get_or_create(name=name)
+        missing = users - User.objects.count()
+        if missing > 0:
+            # Один хэш на всех: make_password на каждого слишком долгий
+            password = make_password(None)
+            start = User.objects.count()
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=f'seller_{start + i}',
+                        email=f'seller_{start + i}@example.com',
+                        password=password,
+                        contact='79990000000',
+                    )
+                    for i in range(missing)
+                ],
+                batch_size=5000,
+                ignore_conflicts=True
+            )
+
+    @staticmethod
+    def get_references():
+        return {
+            'now': timezone.now(),
+            'models': list(Model.objects.order_by('id').values_list('mark_id', 'id')),
+            'authors': list(User.objects.order_by('id').values_list('id', flat=True)),
+            'locations': list(Location.objects.order_by('id').values_list('id', flat=True)),
+            'categories': list(Category.objects.order_by('id').values_list('name', 'id')),
+        }
+
     def handle(self, *args, **options):
-        parts = []
-        models = Model.objects.all()
-        mark_model = [(model.mark_id, model.id) for model in models]
-        users = User.objects.all()
-        locations = Location.objects.all()
-
-        for _ in range(500):
-            name = choice(part_names)
-            mark, model = choice(mark_model)
-            author = choice(users)
-            location = choice(locations)
-            contact = '12345'
-            description = 'test'
-            price = float(randrange(1000, 50001, 500))
-            json_data = self.get_json_data()
-
-            part = Part(
-                name=name,
-                mark_id=mark,
-                model_id=model,
-                price=price,
-                json_data=json_data,
-                author=author,
-                location=location,
-                contact=contact,
-                description=description
+        self.ensure_references(options['users'])
+        references = self.get_references()
+        total, batch_size = options['count'], options['batch_size']
+        batches = list(range(math.ceil(total / batch_size)))
+        start = perf_counter()
+        workers = min(options['workers'], len(batches))
+        if workers > 1:
+            close_connections()
+            chunks = [batches[i::workers] for i in range(workers)]
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers) as pool:
+                loaded = sum(pool.map(load_in_worker, [
+                    (references, options['seed'], chunk, batch_size, total,
+                     options['method'])
+                    for chunk in chunks
+                ]))
+        else:
+            loaded = load_batches(
+                Generator(references, options['seed']),
+                batches,
+                batch_size,
+                total,
+                options['method']
             )
-            parts.append(part)
-        Part.objects.bulk_create(parts)
+        elapsed = perf_counter() - start
+        self.stdout.write(
+            f'Загружено {loaded} запчастей за {elapsed:.1f} с '
+            f'({loaded / elapsed:.0f} в секунду)'
+        )
+        # Загрузка идет мимо API: счетчики авторов и статистика планировщика
+        recount()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE parts_part')
+        bump_catalog_version()
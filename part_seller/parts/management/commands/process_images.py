@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from parts.images import executor, process_image
+from parts.models import PartImage
+
+
+class Command(BaseCommand):
+    help = (
+        'Создание миниатюр для фото, которые не успели обработаться '
+        '(перезапуск сервера, загрузка до появления миниатюр)'
+    )
+
+    def handle(self, *args, **options):
+        image_ids = list(
+            PartImage.objects.filter(
+                status=PartImage.PENDING
+            ).values_list('id', flat=True)
+        )
+        list(executor.map(process_image, image_ids))
+        self.stdout.write(f'Обработано фото: {len(image_ids)}')
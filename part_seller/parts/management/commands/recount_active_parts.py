@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from parts.quota import recount
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет User.active_parts_count по таблице запчастей, '
+        'например после правок в обход API'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            help='id пользователя, можно указать несколько раз'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = recount(options['user'], options['batch_size'])
+        self.stdout.write(f'Исправлено счетчиков: {fixed}')
@@ -0,0 +1,53 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Вектор собирается в БД, поэтому он актуален и для bulk_create/update()
+CREATE_TRIGGER = """
+CREATE FUNCTION parts_part_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(
+            jsonb_to_tsvector(
+                'russian', coalesce(NEW.json_data, '{}'::jsonb), '["string"]'
+            ),
+            'C'
+        );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER parts_part_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, json_data, search_vector
+    ON parts_part
+    FOR EACH ROW EXECUTE FUNCTION parts_part_search_vector_update();
+
+UPDATE parts_part SET name = name;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS parts_part_search_vector_trigger ON parts_part;
+DROP FUNCTION IF EXISTS parts_part_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='part',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='part_search_vector_gin'),
+        ),
+    ]
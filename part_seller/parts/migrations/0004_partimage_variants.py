@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0003_part_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='part_images/thumbnails/%Y-%m-%d', verbose_name='Миниатюра JPEG'),
+        ),
+        migrations.AddField(
+            model_name='partimage',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, upload_to='part_images/thumbnails/%Y-%m-%d', verbose_name='Миниатюра WebP'),
+        ),
+        migrations.AddField(
+            model_name='partimage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В обработке'), ('ready', 'Готово')], default='pending', max_length=10, verbose_name='Обработка'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.contrib.postgres.operations import (AddIndexConcurrently,
+                                                RemoveIndexConcurrently)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся без блокировки записи в parts_part
+    atomic = False
+
+    dependencies = [
+        ('parts', '0005_updated_at'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_approved', True), ('is_visible', True), ('sold', False)), fields=['id'], name='part_catalog_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_approved', True), ('is_visible', True), ('sold', False)), fields=['price', 'id'], name='part_catalog_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_approved', True), ('is_visible', True), ('sold', False)), fields=['uploaded_at', 'id'], name='part_catalog_uploaded_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_approved', False), ('is_visible', True), ('moder_checked', False)), fields=['id'], name='part_moderation_queue_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_visible', True), ('sold', False)), fields=['author'], name='part_author_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['author', 'id'], name='part_author_visible_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='part',
+            name='part_price_id_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='part',
+            name='part_uploaded_at_id_idx',
+        ),
+    ]
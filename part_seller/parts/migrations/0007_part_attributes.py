@@ -0,0 +1,41 @@
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся без блокировки записи в parts_part. AddField
+    # сохраняемых сгенерированных колонок - нет: таблица переписывается
+    # целиком под ACCESS EXCLUSIVE, чтение и запись ждут до конца
+    atomic = False
+
+    dependencies = [
+        ('parts', '0006_part_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='color',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Replace(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim(django.db.models.fields.json.KeyTextTransform('color', 'json_data'))), models.Value('ё'), models.Value('е'), output_field=models.TextField()), output_field=models.TextField(null=True), verbose_name='Цвет'),
+        ),
+        migrations.AddField(
+            model_name='part',
+            name='is_new_part',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('json_data__is_new_part', True)), then=models.Value(True)), models.When(models.Q(('json_data__is_new_part', False)), then=models.Value(False)), default=None), output_field=models.BooleanField(null=True), verbose_name='Новая'),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['json_data'], name='part_json_data_gin', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('color__isnull', False)), fields=['color'], name='part_color_idx', opclasses=['text_pattern_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_approved', True), ('is_visible', True), ('sold', False)), fields=['is_new_part', 'id'], name='part_catalog_is_new_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+BACKFILL = """
+UPDATE parts_user SET active_parts_count = (
+    SELECT count(*) FROM parts_part
+    WHERE parts_part.author_id = parts_user.id
+        AND parts_part.is_visible AND NOT parts_part.sold
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0007_part_attributes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='active_parts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Активных запчастей'),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
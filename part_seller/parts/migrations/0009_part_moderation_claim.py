@@ -0,0 +1,23 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0008_user_active_parts_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='moder_claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='moder_claims', to=settings.AUTH_USER_MODEL, verbose_name='Взято модератором'),
+        ),
+        migrations.AddField(
+            model_name='part',
+            name='moder_claimed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Аренда до'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся без блокировки записи в parts_part
+    atomic = False
+
+    dependencies = [
+        ('parts', '0010_user_token_version'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_visible', False), ('sold', True), _connector='OR'), fields=['id'], name='part_archive_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='part',
+            index=models.Index(condition=models.Q(('is_visible', False), ('sold', True), _connector='OR'), fields=['author', 'id'], name='part_archive_author_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+# Версия каталога для ключей кэша ответов, см. parts.catalog
+CREATE_SEQUENCE = 'CREATE SEQUENCE parts_catalog_version;'
+DROP_SEQUENCE = 'DROP SEQUENCE parts_catalog_version;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0011_part_archive_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SEQUENCE, DROP_SEQUENCE),
+    ]
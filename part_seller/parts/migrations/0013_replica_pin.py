@@ -0,0 +1,21 @@
+from django.db import migrations
+
+# Отметки о записи для чтения из основной БД, см. parts.routers
+CREATE_TABLE = """
+CREATE UNLOGGED TABLE parts_replica_pin (
+    user_id bigint PRIMARY KEY,
+    pinned_until timestamp with time zone NOT NULL
+);
+"""
+DROP_TABLE = 'DROP TABLE parts_replica_pin;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0012_catalog_version_sequence'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TABLE, DROP_TABLE),
+    ]
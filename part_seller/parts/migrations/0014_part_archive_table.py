@@ -0,0 +1,89 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+ARCHIVE_COLUMNS = (
+    'id, name, is_visible, updated_at, description, price, json_data, '
+    'contact, is_approved, sold, uploaded_at, moder_checked, moder_comment, '
+    'location_id, mark_id, model_id, author_id, category_id'
+)
+# Весь архив для чтения (ArchivedPart): недавний в parts_part по условию
+# частичных индексов part_archive_*, старый - в архивной таблице.
+# ORDER BY в подзапросе: без него внутри UNION ALL планировщик не берет
+# порядок из частичного индекса и сортирует весь недавний архив
+CREATE_VIEW = f"""
+CREATE VIEW parts_archived_part AS
+SELECT * FROM (
+    SELECT {ARCHIVE_COLUMNS} FROM parts_part
+    WHERE NOT is_visible OR sold
+    ORDER BY id
+) recent
+UNION ALL
+SELECT {ARCHIVE_COLUMNS} FROM parts_part_archive;
+"""
+DROP_VIEW = 'DROP VIEW parts_archived_part;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0013_replica_pin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('is_visible', models.BooleanField(verbose_name='В зоне видимости')),
+                ('updated_at', models.DateTimeField(verbose_name='Изменено')),
+                ('description', models.TextField(verbose_name='Описание')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена')),
+                ('json_data', models.JSONField()),
+                ('contact', models.CharField(max_length=25, verbose_name='Контакт')),
+                ('is_approved', models.BooleanField(verbose_name='Прошло модерацию')),
+                ('sold', models.BooleanField(verbose_name='Продано')),
+                ('uploaded_at', models.DateTimeField()),
+                ('moder_checked', models.BooleanField(verbose_name='Проверено модератором')),
+                ('moder_comment', models.TextField(blank=True, verbose_name='Комментарий модератора')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Перенесено в архив')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='parts.category', verbose_name='Категория')),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='parts.location', verbose_name='Местоположение')),
+                ('mark', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='parts.mark', verbose_name='Марка')),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='parts.model', verbose_name='Модель')),
+            ],
+            options={
+                'verbose_name': 'запчасть в архивной таблице',
+                'verbose_name_plural': 'Архивная таблица запчастей',
+                'db_table': 'parts_part_archive',
+                'indexes': [models.Index(fields=['author', 'id'], name='part_archive_table_author_idx')],
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+        migrations.CreateModel(
+            name='ArchivedPart',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('is_visible', models.BooleanField(verbose_name='В зоне видимости')),
+                ('updated_at', models.DateTimeField(verbose_name='Изменено')),
+                ('description', models.TextField(verbose_name='Описание')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена')),
+                ('json_data', models.JSONField()),
+                ('contact', models.CharField(max_length=25, verbose_name='Контакт')),
+                ('is_approved', models.BooleanField(verbose_name='Прошло модерацию')),
+                ('sold', models.BooleanField(verbose_name='Продано')),
+                ('uploaded_at', models.DateTimeField()),
+                ('moder_checked', models.BooleanField(verbose_name='Проверено модератором')),
+                ('moder_comment', models.TextField(blank=True, verbose_name='Комментарий модератора')),
+            ],
+            options={
+                'verbose_name': 'запчасть в архиве',
+                'verbose_name_plural': 'Архив запчастей',
+                'db_table': 'parts_archived_part',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,10 +1,23 @@
+import functools
+import operator
 from datetime import date
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxLengthValidator
-from django.db import models
+from django.db import connections, models
 from django.utils.html import format_html
 
+from .attributes import COLOR_EXPRESSION, IS_NEW_PART_EXPRESSION
+
+# Архив: проданные и удаленные запчасти (в том числе проданные, а потом
+# удаленные). Условия вместе дают условие частичных индексов архива
+ARCHIVE_STATUSES = {
+    'sold': models.Q(is_visible=True, sold=True),
+    'deleted': models.Q(is_visible=False),
+}
+
 
 class VisibleModel(models.Model):
     name = models.CharField(
@@ -17,6 +30,11 @@ class VisibleModel(models.Model):
         default=True,
         help_text='Снимите галочку, что бы убрать из поиска'
     )
+    # Метка версии для ETag/Last-Modified, queryset.update() ее не меняет
+    updated_at = models.DateTimeField(
+        verbose_name='Изменено',
+        auto_now=True
+    )
 
     class Meta:
         abstract = True
@@ -70,6 +88,67 @@ class Model(VisibleModel):
         ]
 
 
+class PartQuerySet(models.QuerySet):
+
+    def with_related(self, images=True):
+        """Связи, которые выводят сериалайзеры запчасти, без запроса на строку"""
+        queryset = self.select_related(
+            'model', 'mark', 'location', 'category', 'author'
+        )
+        if images:
+            queryset = queryset.prefetch_related('images')
+        return queryset
+
+    def with_favorited(self, user):
+        """is_favorited - запчасть в избранном у user, EXISTS в том же запросе"""
+        if not user.is_authenticated:
+            return self
+        return self.annotate(is_favorited=models.Exists(
+            Favorite.objects.filter(user=user, part=models.OuterRef('pk'))
+        ))
+
+    def colors_containing(self, fragment):
+        """
+        Различные значения color, в которых есть fragment. Обход
+        part_color_idx скачками по значениям: запрос читает по строке на
+        цвет, а не всю таблицу
+        """
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH RECURSIVE colors(color) AS (
+                    (SELECT color FROM {table} WHERE color IS NOT NULL
+                     ORDER BY color USING ~<~ LIMIT 1)
+                    UNION ALL
+                    SELECT (
+                        SELECT part.color FROM {table} part
+                        WHERE part.color IS NOT NULL
+                            AND part.color ~>~ colors.color
+                        ORDER BY part.color USING ~<~ LIMIT 1
+                    )
+                    FROM colors WHERE colors.color IS NOT NULL
+                )
+                SELECT color FROM colors WHERE strpos(color, %s) > 0
+                """,
+                [fragment]
+            )
+            return [color for color, in cursor.fetchall()]
+
+    def archived(self, status=None):
+        """
+        Проданные и удаленные запчасти, еще не перенесенные в PartArchive,
+        status - ключ ARCHIVE_STATUSES. Строки читаются по частичным
+        индексам part_archive_*, мимо опубликованного каталога
+        """
+        if status is not None:
+            return self.filter(ARCHIVE_STATUSES[status])
+        return self.filter(functools.reduce(
+            operator.or_,
+            ARCHIVE_STATUSES.values()
+        ))
+
+
 class Part(VisibleModel):
     description = models.TextField(
         verbose_name='Описание',
@@ -104,6 +183,19 @@ class Part(VisibleModel):
         decimal_places=2
     )
     json_data = models.JSONField()
+    # Известные ключи json_data в отдельных колонках под B-tree индексы
+    color = models.GeneratedField(
+        verbose_name='Цвет',
+        expression=COLOR_EXPRESSION,
+        output_field=models.TextField(null=True),
+        db_persist=True
+    )
+    is_new_part = models.GeneratedField(
+        verbose_name='Новая',
+        expression=IS_NEW_PART_EXPRESSION,
+        output_field=models.BooleanField(null=True),
+        db_persist=True
+    )
     contact = models.CharField(
         verbose_name='Контакт',
         max_length=25,
@@ -146,10 +238,241 @@ class Part(VisibleModel):
         related_name='category_parts'
 
     )
+    # Аренда в очереди модерации, см. parts.moderation
+    moder_claimed_by = models.ForeignKey(
+        'User',
+        verbose_name='Взято модератором',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='moder_claims'
+    )
+    moder_claimed_until = models.DateTimeField(
+        verbose_name='Аренда до',
+        null=True,
+        blank=True
+    )
+    # Заполняется триггером в БД из name, description и json_data
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False
+    )
+
+    objects = PartQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'запчасть'
         verbose_name_plural = 'Запчасти'
+        # Живые запчасти и недавний архив (проданные, удаленные), горячие
+        # запросы каждой части читают свои частичные индексы. Старый
+        # архив переносится в PartArchive, см. parts.archive
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='part_search_vector_gin'
+            ),
+            # Фильтр attributes, поиск по вхождению (@>)
+            GinIndex(
+                fields=['json_data'],
+                opclasses=['jsonb_path_ops'],
+                name='part_json_data_gin'
+            ),
+            # text_pattern_ops: и равенство, и поиск по началу строки
+            models.Index(
+                fields=['color'],
+                opclasses=['text_pattern_ops'],
+                condition=models.Q(color__isnull=False),
+                name='part_color_idx'
+            ),
+            models.Index(
+                fields=['is_new_part', 'id'],
+                condition=models.Q(sold=False, is_visible=True, is_approved=True),
+                name='part_catalog_is_new_idx'
+            ),
+            # Опубликованный каталог (PartViewSet) по сортировкам
+            # KeysetPaginator, id - разрешение равенства
+            models.Index(
+                fields=['id'],
+                condition=models.Q(sold=False, is_visible=True, is_approved=True),
+                name='part_catalog_id_idx'
+            ),
+            models.Index(
+                fields=['price', 'id'],
+                condition=models.Q(sold=False, is_visible=True, is_approved=True),
+                name='part_catalog_price_idx'
+            ),
+            models.Index(
+                fields=['uploaded_at', 'id'],
+                condition=models.Q(sold=False, is_visible=True, is_approved=True),
+                name='part_catalog_uploaded_idx'
+            ),
+            # Очередь ModeratorViewSet
+            models.Index(
+                fields=['id'],
+                condition=models.Q(is_approved=False, moder_checked=False, is_visible=True),
+                name='part_moderation_queue_idx'
+            ),
+            # parts.quota.recount
+            models.Index(
+                fields=['author'],
+                condition=models.Q(is_visible=True, sold=False),
+                name='part_author_active_idx'
+            ),
+            # UserPartsListView
+            models.Index(
+                fields=['author', 'id'],
+                condition=models.Q(is_visible=True),
+                name='part_author_visible_idx'
+            ),
+            # Архив модератора и автора, PartQuerySet.archived
+            models.Index(
+                fields=['id'],
+                condition=models.Q(is_visible=False) | models.Q(sold=True),
+                name='part_archive_idx'
+            ),
+            models.Index(
+                fields=['author', 'id'],
+                condition=models.Q(is_visible=False) | models.Q(sold=True),
+                name='part_archive_author_idx'
+            ),
+        ]
+
+
+class ArchiveColumns(models.Model):
+    """
+    Колонки запчасти, которые переносятся в архивную таблицу: все, что
+    выводят сериалайзеры архива. Поисковый вектор, аренда модерации и
+    колонки фильтров каталога архиву не нужны
+    """
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(verbose_name='Название', max_length=100)
+    is_visible = models.BooleanField(verbose_name='В зоне видимости')
+    updated_at = models.DateTimeField(verbose_name='Изменено')
+    description = models.TextField(verbose_name='Описание')
+    price = models.DecimalField(
+        verbose_name='Цена',
+        max_digits=10,
+        decimal_places=2
+    )
+    json_data = models.JSONField()
+    contact = models.CharField(verbose_name='Контакт', max_length=25)
+    is_approved = models.BooleanField(verbose_name='Прошло модерацию')
+    sold = models.BooleanField(verbose_name='Продано')
+    uploaded_at = models.DateTimeField()
+    moder_checked = models.BooleanField(verbose_name='Проверено модератором')
+    moder_comment = models.TextField(
+        verbose_name='Комментарий модератора',
+        blank=True
+    )
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.name
+
+
+class PartArchive(ArchiveColumns):
+    """
+    Архивная таблица: проданные и удаленные запчасти, не менявшиеся
+    ARCHIVE_MOVE_AFTER_DAYS дней, переносит сюда parts.archive. id
+    сохраняется, запчасть лежит либо здесь, либо в parts_part
+    """
+    location = models.ForeignKey(
+        'Location',
+        verbose_name='Местоположение',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    mark = models.ForeignKey(
+        Mark,
+        verbose_name='Марка',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    model = models.ForeignKey(
+        Model,
+        verbose_name='Модель',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    author = models.ForeignKey(
+        'User',
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    category = models.ForeignKey(
+        'Category',
+        verbose_name='Категория',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    archived_at = models.DateTimeField(
+        verbose_name='Перенесено в архив',
+        auto_now_add=True
+    )
+
+    class Meta:
+        db_table = 'parts_part_archive'
+        verbose_name = 'запчасть в архивной таблице'
+        verbose_name_plural = 'Архивная таблица запчастей'
+        indexes = [
+            models.Index(
+                fields=['author', 'id'],
+                name='part_archive_table_author_idx'
+            ),
+        ]
+
+
+class ArchivedPart(ArchiveColumns):
+    """
+    Весь архив для чтения: представление parts_archived_part объединяет
+    недавно проданные и удаленные строки parts_part (частичные индексы
+    part_archive_*) и архивную таблицу. Только чтение, связи без
+    ограничений и каскадов
+    """
+    location = models.ForeignKey(
+        'Location',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+'
+    )
+    mark = models.ForeignKey(
+        Mark,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    model = models.ForeignKey(
+        Model,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    author = models.ForeignKey(
+        'User',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    category = models.ForeignKey(
+        'Category',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'parts_archived_part'
+        verbose_name = 'запчасть в архиве'
+        verbose_name_plural = 'Архив запчастей'
 
 
 class Location(VisibleModel):
@@ -189,23 +512,60 @@ class User(AbstractUser):
         verbose_name='Модератор',
         default=False,
     )
+    # Видимые и не проданные запчасти, поддерживает parts.quota
+    active_parts_count = models.PositiveIntegerField(
+        verbose_name='Активных запчастей',
+        default=0,
+        editable=False
+    )
+    # Claim ver в JWT, см. api.authentication. Растет при бане, смене
+    # роли или пароля, токены со старой версией больше не принимаются
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.username
 
 
 class PartImage(models.Model):
+    PENDING = 'pending'
+    READY = 'ready'
+    STATUS_CHOICES = (
+        (PENDING, 'В обработке'),
+        (READY, 'Готово'),
+    )
+
     part = models.ForeignKey('Part', related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(
         upload_to=f'part_images/{date.today()}'
     )
+    # Миниатюры создает parts.images в фоне после загрузки
+    thumbnail = models.ImageField(
+        verbose_name='Миниатюра JPEG',
+        upload_to='part_images/thumbnails/%Y-%m-%d',
+        blank=True
+    )
+    thumbnail_webp = models.ImageField(
+        verbose_name='Миниатюра WebP',
+        upload_to='part_images/thumbnails/%Y-%m-%d',
+        blank=True
+    )
+    status = models.CharField(
+        verbose_name='Обработка',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def image_tag(self):
         if self.image:
             return format_html(
                 '<img src="{}" width="100" height="100" />',
-                self.image.url
+                (self.thumbnail or self.image).url
             )
         return "No Image"
 
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import Part
+
+
+def get_queue():
+    """Запчасти, ожидающие модератора (индекс part_moderation_queue_idx)"""
+    return Part.objects.filter(
+        is_approved=False,
+        moder_checked=False,
+        is_visible=True
+    )
+
+
+def free_or_claimed_by(user, now=None):
+    """Условие: запчасть никем не взята, аренда истекла или она у user"""
+    now = now or timezone.now()
+    return (
+        Q(moder_claimed_until__isnull=True)
+        | Q(moder_claimed_until__lt=now)
+        | Q(moder_claimed_by=user)
+    )
+
+
+def claim(user, size):
+    """
+    Взять пачку запчастей из очереди в аренду.
+    SKIP LOCKED: параллельные модераторы пропускают строки, которые
+    сейчас забирает кто-то другой, и получают разные запчасти.
+    """
+    now = timezone.now()
+    until = now + timedelta(seconds=settings.MODERATION_LEASE)
+    with transaction.atomic():
+        ids = list(
+            get_queue().filter(
+                Q(moder_claimed_until__isnull=True)
+                | Q(moder_claimed_until__lt=now)
+            ).select_for_update(skip_locked=True).order_by('id').values_list(
+                'id', flat=True
+            )[:size]
+        )
+        Part.objects.filter(id__in=ids).update(
+            moder_claimed_by=user,
+            moder_claimed_until=until
+        )
+    return ids, until
+
+
+def release(user):
+    """Вернуть в очередь все запчасти, взятые модератором"""
+    return Part.objects.filter(moder_claimed_by=user).update(
+        moder_claimed_by=None,
+        moder_claimed_until=None
+    )
+
+
+def submit(user, decisions):
+    """
+    Сохранить решения по взятым запчастям одним bulk_update.
+    decisions - {id: (is_approved, moder_comment)}. Возвращает id
+    сохраненных запчастей, запчасти с истекшей арендой пропускаются.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        parts = list(
+            get_queue().filter(
+                id__in=decisions,
+                moder_claimed_by=user,
+                moder_claimed_until__gte=now
+            ).select_for_update()
+        )
+        for part in parts:
+            part.is_approved, part.moder_comment = decisions[part.id]
+            part.moder_checked = True
+            part.moder_claimed_by = None
+            part.moder_claimed_until = None
+            part.updated_at = now
+        Part.objects.bulk_update(parts, [
+            'is_approved',
+            'moder_comment',
+            'moder_checked',
+            'moder_claimed_by',
+            'moder_claimed_until',
+            'updated_at',
+        ])
+    if parts:
+        bump_catalog_version()
+    return [part.id for part in parts]
+
+
+def get_stats():
+    """Глубина очереди, сколько в аренде и возраст старейшей запчасти"""
+    now = timezone.now()
+    stats = get_queue().aggregate(
+        depth=Count('id'),
+        claimed=Count('id', filter=Q(moder_claimed_until__gte=now)),
+        oldest=Min('uploaded_at'),
+        oldest_available=Min(
+            'uploaded_at',
+            filter=~Q(moder_claimed_until__gte=now)
+        ),
+    )
+    return {
+        'depth': stats['depth'],
+        'claimed': stats['claimed'],
+        'available': stats['depth'] - stats['claimed'],
+        'oldest_age': age(now, stats['oldest']),
+        'oldest_available_age': age(now, stats['oldest_available']),
+    }
+
+
+def age(now, date):
+    return int((now - date).total_seconds()) if date else 0
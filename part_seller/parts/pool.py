@@ -0,0 +1,34 @@
+from django.db import connections
+
+
+def get_pool_stats():
+    """
+    Метрики пулов соединений psycopg этого процесса по алиасам БД.
+    Счетчики накапливаются с запуска процесса, у каждого воркера свои.
+    Алиасы без пула (settings.DB_POOL=0) пропускаются.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        # Нулевые счетчики psycopg не возвращает
+        raw = pool.get_stats()
+        requests = raw.get('requests_num', 0)
+        wait_ms = raw.get('requests_wait_ms', 0)
+        stats[alias] = {
+            'min_size': pool.min_size,
+            'max_size': pool.max_size,
+            'size': raw.get('pool_size', 0),
+            'in_use': raw.get('pool_size', 0) - raw.get('pool_available', 0),
+            'available': raw.get('pool_available', 0),
+            'waiting': raw.get('requests_waiting', 0),
+            'requests': requests,
+            'queued': raw.get('requests_queued', 0),
+            'wait_ms': wait_ms,
+            'avg_wait_ms': round(wait_ms / requests, 2) if requests else 0,
+            'timeouts': raw.get('requests_errors', 0),
+            'connections_opened': raw.get('connections_num', 0),
+            'connections_errors': raw.get('connections_errors', 0),
+        }
+    return stats
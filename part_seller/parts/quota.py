@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
+
+from .models import Part, User
+
+
+class PartLimitExceeded(Exception):
+    """У автора уже COUNT_OF_POSTS активных запчастей"""
+
+
+def is_active(part):
+    """Активная запчасть занимает место в лимите автора"""
+    return part.is_visible and not part.sold
+
+
+def lock_active(part):
+    """
+    Блокирует строку запчасти до конца транзакции и возвращает, активна ли
+    она в БД. Блокировка по pk без условий на состояние: иначе
+    восстановление из архива не ждет параллельное и счетчик растет дважды.
+    part не меняется: в админке на нем уже значения из формы
+    """
+    # Пока запрос шел, запчасть могла уйти в архивную таблицу (parts.archive)
+    is_visible, sold = get_object_or_404(
+        Part.objects.select_for_update().values_list('is_visible', 'sold'),
+        pk=part.pk
+    )
+    return is_visible and not sold
+
+
+def acquire(author_id, enforce=True):
+    queryset = User.objects.filter(pk=author_id)
+    if enforce:
+        queryset = queryset.filter(
+            active_parts_count__lt=settings.COUNT_OF_POSTS
+        )
+    # Проверка и увеличение одним UPDATE, параллельные запросы лимит не обойдут
+    if not queryset.update(active_parts_count=F('active_parts_count') + 1):
+        raise PartLimitExceeded
+
+
+def release(author_id):
+    User.objects.filter(
+        pk=author_id,
+        active_parts_count__gt=0
+    ).update(active_parts_count=F('active_parts_count') - 1)
+
+
+def update_counter(author_id, was_active, now_active, enforce=True):
+    """Вызывать в той же транзакции, что и сохранение запчасти"""
+    if now_active and not was_active:
+        acquire(author_id, enforce)
+    elif was_active and not now_active:
+        release(author_id)
+
+
+def recount(users=None, batch_size=1000):
+    """Пересчет счетчиков по parts_part, возвращает число исправленных"""
+    actual = Part.objects.filter(
+        author=OuterRef('pk'),
+        is_visible=True,
+        sold=False
+    ).order_by().values('author').annotate(total=Count('id')).values('total')
+    queryset = User.objects.annotate(
+        actual=Coalesce(Subquery(actual), 0)
+    ).exclude(active_parts_count=F('actual')).order_by('pk')
+    if users is not None:
+        queryset = queryset.filter(pk__in=users)
+    fixed, batch = 0, []
+    for pk, count in queryset.values_list('pk', 'actual').iterator(batch_size):
+        batch.append(User(pk=pk, active_parts_count=count))
+        if len(batch) == batch_size:
+            User.objects.bulk_update(batch, ['active_parts_count'])
+            fixed, batch = fixed + len(batch), []
+    User.objects.bulk_update(batch, ['active_parts_count'])
+    return fixed + len(batch)
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Category, Location, Mark, Model
+
+Snapshot = namedtuple('Snapshot', ('version', 'loaded_at', 'by_pk', 'by_name'))
+
+
+class ReferenceCache:
+    """
+    Справочники (марки, модели, локации, категории) в памяти процесса.
+    Снимок помечен версией из кэша Django, сигналы моделей меняют версию
+    и при следующем обращении снимок перечитывается. С общим бэкендом
+    CACHES сброс виден всем воркерам, с LocMem - по REFERENCE_CACHE_TTL.
+    Поэтому промах снимка проверяется по БД: объект, созданный в другом
+    процессе, доступен сразу. Объекты справочника общие для всех
+    запросов, изменять их нельзя.
+    """
+    version_key = 'reference_cache_version'
+    models = {
+        'mark': Mark,
+        'model': Model,
+        'location': Location,
+        'category': Category,
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def get_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def invalidate(self):
+        cache.set(self.version_key, time.time_ns(), None)
+
+    def is_stale(self, snapshot, version):
+        return (
+            snapshot is None
+            or snapshot.version != version
+            or time.monotonic() - snapshot.loaded_at > settings.REFERENCE_CACHE_TTL
+        )
+
+    def load(self, version):
+        by_pk, by_name = {}, {}
+        for key, model in self.models.items():
+            by_pk[key], by_name[key] = {}, {}
+            for obj in model.objects.order_by('pk'):
+                by_pk[key][obj.pk] = obj
+                # Как и name__iexact, при совпадении берем первый объект
+                by_name[key].setdefault(obj.name.casefold(), obj)
+        return Snapshot(version, time.monotonic(), by_pk, by_name)
+
+    def get_snapshot(self):
+        version = self.get_version()
+        if self.is_stale(self._snapshot, version):
+            with self._lock:
+                if self.is_stale(self._snapshot, version):
+                    self._snapshot = self.load(version)
+        return self._snapshot
+
+    def reload(self):
+        with self._lock:
+            self._snapshot = self.load(self.get_version())
+        return self._snapshot
+
+    def get(self, key, pk):
+        obj = self.get_snapshot().by_pk[key].get(pk)
+        if obj is None and self.models[key].objects.filter(pk=pk).exists():
+            obj = self.reload().by_pk[key].get(pk)
+        return obj
+
+    def get_by_name(self, key, name):
+        """Объект справочника по названию без учета регистра"""
+        name = str(name)
+        obj = self.get_snapshot().by_name[key].get(name.casefold())
+        if obj is None and self.models[key].objects.filter(
+            name__iexact=name
+        ).exists():
+            obj = self.reload().by_name[key].get(name.casefold())
+        return obj
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,168 @@
+import random
+from contextvars import ContextVar
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+PIN_TABLE = 'parts_replica_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaState:
+    """Куда читает текущий запрос: основная БД или выбранная реплика"""
+
+    def __init__(self, primary):
+        self.primary = primary
+        # Одна реплика на запрос, что бы все его чтения видели один снимок
+        self.replica = random.choice(settings.DB_REPLICAS)
+
+
+replica_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaRouter:
+    """
+    Чтения GET запросов API - на реплики settings.DB_REPLICAS,
+    запись и все, что вне запроса (команды, фоновые потоки) - на
+    основную БД. Запросы на запись и клиенты, писавшие последние
+    REPLICA_PIN_SECONDS секунд, читают из основной: автор сразу видит
+    свою запчасть, а не отстающую реплику.
+
+    Отметка о записи - строка пользователя в PIN_TABLE основной БД,
+    общей для всех воркеров. Проверяется при аутентификации, когда
+    известен id: клиентам с JWT не нужны ни cookie, ни свои заголовки.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = replica_state.get()
+        if (
+            state is None
+            or state.primary
+            # Чтения внутри транзакции должны видеть ее запись
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии основной БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def use_primary():
+    """Весь текущий запрос читает из основной БД"""
+    state = replica_state.get()
+    if state is not None:
+        state.primary = True
+
+
+def is_pinned(user_id):
+    """Пользователь писал в БД не раньше REPLICA_PIN_SECONDS секунд назад"""
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f'SELECT 1 FROM {PIN_TABLE} '
+            'WHERE user_id = %s AND pinned_until > now()',
+            [user_id]
+        )
+        return cursor.fetchone() is not None
+
+
+def check_pin(user_id):
+    """
+    Запрос пользователя, недавно писавшего в БД, читает из основной.
+    Вызывается аутентификацией; без реплик и для запросов, уже идущих в
+    основную БД, запроса к PIN_TABLE нет
+    """
+    state = replica_state.get()
+    if needs_pin_check(state, user_id) and is_pinned(user_id):
+        state.primary = True
+
+
+async def acheck_pin(user_id):
+    """check_pin для асинхронных вьюх"""
+    state = replica_state.get()
+    if needs_pin_check(state, user_id) and await sync_to_async(is_pinned)(user_id):
+        state.primary = True
+
+
+def needs_pin_check(state, user_id):
+    return state is not None and not state.primary and user_id is not None
+
+
+def pin(user_id):
+    """После записи пользователь читает из основной БД"""
+    # Таблица UNLOGGED: на реплики не попадает, после сбоя пустая -
+    # отметки живут секунды, терять их не страшно
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {PIN_TABLE} (user_id, pinned_until) '
+            'VALUES (%s, now() + make_interval(secs => %s)) '
+            'ON CONFLICT (user_id) '
+            'DO UPDATE SET pinned_until = excluded.pinned_until',
+            [user_id, settings.REPLICA_PIN_SECONDS]
+        )
+
+
+def start_request(request):
+    if not settings.DB_REPLICAS:
+        return None
+    return replica_state.set(ReplicaState(
+        request.method not in SAFE_METHODS
+        # Сессии - админка, ее мало и ей нужна свежая БД
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+    ))
+
+
+def get_writer_id(request, response):
+    """id пользователя, успешно записавшего в БД этим запросом"""
+    if request.method in SAFE_METHODS or response.status_code >= 400:
+        return None
+    # request.user выставляет аутентификация DRF или сессии
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.id
+
+
+def pin_writer(request, response):
+    user_id = get_writer_id(request, response)
+    if user_id is not None:
+        pin(user_id)
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    """Выбор реплики на время запроса для ReplicaRouter"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = start_request(request)
+            if token is None:
+                return await get_response(request)
+            try:
+                response = await get_response(request)
+            finally:
+                replica_state.reset(token)
+            if request.method not in SAFE_METHODS:
+                # Ленивый пользователь сессии читается из БД
+                await sync_to_async(pin_writer)(request, response)
+            return response
+    else:
+        def middleware(request):
+            token = start_request(request)
+            if token is None:
+                return get_response(request)
+            try:
+                response = get_response(request)
+            finally:
+                replica_state.reset(token)
+            pin_writer(request, response)
+            return response
+    return middleware
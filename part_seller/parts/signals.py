@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .catalog import bump_catalog_version
+from .images import schedule_processing
+from .models import Category, Location, Mark, Model, PartImage, User
+from .references import reference_cache
+
+
+def invalidate_reference_cache(sender, **kwargs):
+    # После коммита, иначе другой процесс успеет закэшировать
+    # старые данные уже под новой версией
+    transaction.on_commit(reference_cache.invalidate)
+    # Названия справочников выводятся в каталоге
+    bump_catalog_version()
+
+
+for model in (Mark, Model, Location, Category):
+    post_save.connect(invalidate_reference_cache, sender=model)
+    post_delete.connect(invalidate_reference_cache, sender=model)
+
+
+def process_part_image(sender, instance, created, **kwargs):
+    if created:
+        schedule_processing(instance.pk)
+
+
+post_save.connect(process_part_image, sender=PartImage)
+
+
+# Поля, от которых зависит доступ: их изменение отзывает выданные JWT
+SECURITY_FIELDS = ('password', 'is_active', 'is_moder', 'is_superuser', 'is_staff')
+
+
+def bump_token_version(sender, instance, raw, update_fields, **kwargs):
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    old = User.objects.filter(pk=instance.pk).values(
+        'token_version', *SECURITY_FIELDS
+    ).first()
+    if old is None or all(
+        old[field] == getattr(instance, field) for field in SECURITY_FIELDS
+    ):
+        return
+    # Через UPDATE: save с update_fields может не записать token_version
+    User.objects.filter(pk=instance.pk).update(
+        token_version=F('token_version') + 1
+    )
+    instance.token_version = old['token_version'] + 1
+
+
+pre_save.connect(bump_token_version, sender=User)
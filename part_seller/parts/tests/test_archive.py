@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from api.tests.base import PartsAPITestCase
+from parts.archive import move, move_batch
+from parts.models import Favorite, Part, PartArchive, PartImage
+
+
+class ArchiveMoveTests(PartsAPITestCase):
+    """Старый архив переносится из parts_part в архивную таблицу"""
+
+    def create_old_part(self, days=31, **kwargs):
+        part = self.create_part(**kwargs)
+        Part.objects.filter(pk=part.pk).update(
+            updated_at=timezone.now() - timedelta(days=days)
+        )
+        return part
+
+    def test_move(self):
+        sold = self.create_old_part(sold=True)
+        deleted = self.create_old_part(is_visible=False)
+        recent = self.create_old_part(days=1, sold=True)
+        active = self.create_old_part()
+        PartImage.objects.create(part=sold, image='x.jpg')
+        Favorite.objects.create(user=self.other, part=sold)
+        self.assertEqual(move(days=30), 2)
+        self.assertEqual(
+            sorted(PartArchive.objects.values_list('id', flat=True)),
+            [sold.pk, deleted.pk]
+        )
+        self.assertEqual(
+            sorted(Part.objects.values_list('id', flat=True)),
+            [recent.pk, active.pk]
+        )
+        # Фотографии и избранное уходят вместе со строкой
+        self.assertFalse(PartImage.objects.filter(part_id=sold.pk).exists())
+        self.assertFalse(Favorite.objects.filter(part_id=sold.pk).exists())
+        moved = PartArchive.objects.get(pk=sold.pk)
+        self.assertTrue(moved.sold)
+        self.assertEqual(moved.author_id, self.author.pk)
+        self.assertEqual(move(days=30), 0)
+
+    def test_batches(self):
+        parts = [self.create_old_part(sold=True) for _ in range(3)]
+        before = timezone.now() - timedelta(days=30)
+        self.assertEqual(move_batch(before, batch_size=2), 2)
+        self.assertEqual(
+            list(PartArchive.objects.order_by('id').values_list('id', flat=True)),
+            [parts[0].pk, parts[1].pk]
+        )
+        self.assertEqual(move_batch(before, batch_size=2), 1)
+        self.assertEqual(move_batch(before, batch_size=2), 0)
+
+    def get_ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [part['id'] for part in response.json()['result']]
+
+    def test_read_moved(self):
+        # Недавний и перенесенный архив читаются одним запросом
+        moved = self.create_old_part(is_visible=False)
+        recent = self.create_part(sold=True)
+        move(days=30)
+        self.authenticate(self.author)
+        archive = reverse('part-archive')
+        self.assertEqual(self.get_ids(archive), [moved.pk, recent.pk])
+        self.assertEqual(self.get_ids(archive, status='deleted'), [moved.pk])
+        self.assertEqual(self.get_ids(archive, status='sold'), [recent.pk])
+        # Перенесенная запчасть только для чтения
+        url = reverse('part-detail', args=[moved.pk])
+        response = self.client.patch(url, {'sold': False}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.authenticate(self.other)
+        self.assertEqual(self.get_ids(archive), [])
+        self.authenticate(self.moder)
+        self.assertEqual(
+            self.get_ids(reverse('moderation-archive')),
+            [moved.pk, recent.pk]
+        )
+
+    def test_command(self):
+        self.create_old_part(days=10, sold=True)
+        out = StringIO()
+        call_command('archive_parts', days=30, stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Перенесено в архив: 0')
+        call_command('archive_parts', days=5, batch_size=1, stdout=out)
+        self.assertIn('Перенесено в архив: 1', out.getvalue())
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from api.tests.base import PartsDataMixin
+from parts.management.commands.generate_parts import (
+    Command, Generator, bulk_rows, columns, copy_rows
+)
+from parts.models import Part
+
+
+class LoadRowsTests(PartsDataMixin, TestCase):
+    """COPY и bulk_create сохраняют сгенерированные даты, а не now()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_data()
+
+    def get_rows(self):
+        references = Command.get_references()
+        # Все даты в прошлом, now() при вставке от них отличается
+        references['now'] = timezone.now() - timezone.timedelta(days=1)
+        return list(Generator(references, seed=1).rows(0, 20))
+
+    def assertDatesKept(self, rows):
+        uploaded_at = columns.index('uploaded_at')
+        updated_at = columns.index('updated_at')
+        expected = sorted((row[uploaded_at], row[updated_at]) for row in rows)
+        self.assertEqual(
+            sorted(Part.objects.values_list('uploaded_at', 'updated_at')),
+            expected
+        )
+
+    def test_bulk(self):
+        rows = self.get_rows()
+        bulk_rows(rows, 7)
+        self.assertDatesKept(rows)
+
+    def test_copy(self):
+        rows = self.get_rows()
+        copy_rows(rows)
+        self.assertDatesKept(rows)
+
+
+class WorkersPoolTests(PartsDataMixin, TransactionTestCase):
+    """--workers с пулом psycopg: процессы не получают сокеты пула родителя"""
+
+    def setUp(self):
+        self.create_test_data()
+        settings_dict = connection.settings_dict
+        saved = settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS']
+        connection.close()
+        settings_dict['CONN_MAX_AGE'] = 0
+        settings_dict['OPTIONS'] = {**saved[1], 'pool': {'min_size': 2}}
+        self.addCleanup(self.restore, saved)
+
+    def restore(self, saved):
+        connection.close()
+        connection.close_pool()
+        settings = connection.settings_dict
+        settings['CONN_MAX_AGE'], settings['OPTIONS'] = saved
+
+    def test_workers(self):
+        # Соединения родителя взяты из пула и открыты на момент fork
+        self.assertEqual(Part.objects.count(), 0)
+        pool = connection.pool
+        self.assertGreater(pool.get_stats()['pool_size'], 0)
+        call_command(
+            'generate_parts',
+            count=40,
+            batch_size=10,
+            workers=2,
+            users=3,
+            stdout=StringIO()
+        )
+        self.assertTrue(pool.closed)
+        # После загрузки родитель работает с новым пулом
+        self.assertIsNot(connection.pool, pool)
+        self.assertEqual(Part.objects.count(), 40)
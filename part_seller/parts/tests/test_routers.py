@@ -0,0 +1,120 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from api.authentication import StatelessJWTAuthentication, UserRefreshToken
+from api.tests.base import PartsAPITestCase
+from parts.routers import (PIN_TABLE, ReplicaRouter, ReplicaState,
+                           replica_middleware, replica_state)
+
+
+@override_settings(DB_REPLICAS=['replica'], REPLICA_PIN_SECONDS=10)
+class ReadYourWritesTests(PartsAPITestCase):
+    """
+    Отметка о записи хранится в основной БД по id пользователя: JWT
+    клиент без cookie читает свою запись сразу после нее
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.part = self.create_part()
+        self.reads = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            # В TestCase все идет в основную БД (транзакция теста),
+            # поэтому запоминается решение запроса, а не алиас
+            state = replica_state.get()
+            self.reads.append(state is None or state.primary)
+            return db_for_read(router, model, **hints)
+
+        patcher = mock.patch.object(ReplicaRouter, 'db_for_read', spy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, user):
+        """Читал ли каталог пользователя user из основной БД"""
+        self.client.cookies.clear()
+        self.authenticate(user)
+        self.reads = []
+        response = self.client.get(reverse('part-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.reads)
+        return all(self.reads)
+
+    def write(self, user, price='1500.00'):
+        self.client.cookies.clear()
+        self.authenticate(user)
+        response = self.client.patch(
+            reverse('part-detail', args=[self.part.pk]),
+            {'price': price},
+            format='json'
+        )
+        self.assertFalse(response.cookies)
+        return response
+
+    def test_read_after_write(self):
+        self.assertFalse(self.read(self.author))
+        self.assertEqual(self.write(self.author).status_code, 200)
+        self.assertTrue(self.read(self.author))
+        # Отметка только у писавшего пользователя
+        self.assertFalse(self.read(self.other))
+
+    def test_failed_write(self):
+        self.assertEqual(self.write(self.other).status_code, 403)
+        self.assertFalse(self.read(self.other))
+        self.assertEqual(self.write(self.author, 'x').status_code, 400)
+        self.assertFalse(self.read(self.author))
+
+    def test_expired_pin(self):
+        self.write(self.author)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {PIN_TABLE} SET pinned_until = now() - interval '1 s'"
+            )
+        self.assertFalse(self.read(self.author))
+
+    def test_async_authentication(self):
+        self.write(self.author)
+        token = UserRefreshToken.for_user(self.author).access_token
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        state = ReplicaState(primary=False)
+        reset = replica_state.set(state)
+        try:
+            user, _ = async_to_sync(
+                StatelessJWTAuthentication().aauthenticate
+            )(request)
+        finally:
+            replica_state.reset(reset)
+        self.assertEqual(user.pk, self.author.pk)
+        self.assertTrue(state.primary)
+
+    def call_middleware(self, user, method='post'):
+        def get_response(request):
+            request.user = user
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/api/v1/part/')
+        return replica_middleware(get_response)(request)
+
+    def count_pins(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {PIN_TABLE}')
+            return cursor.fetchone()[0]
+
+    def test_anonymous_write(self):
+        self.call_middleware(AnonymousUser())
+        self.call_middleware(self.author, method='get')
+        self.assertEqual(self.count_pins(), 0)
+
+    @override_settings(DB_REPLICAS=[])
+    def test_without_replicas(self):
+        self.call_middleware(self.author)
+        self.assertEqual(self.count_pins(), 0)